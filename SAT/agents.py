@@ -1,10 +1,12 @@
 import re
 import os
 import dvg
-import mlkg_assembler
+import reachability
+import slicing
+import taint
+import traversal
+from compact_graph import BLUE, RED, GREEN
 
-# Global variables
-global kg, functions
 entry_points = [
     "$_GET", "$_POST", "$_COOKIE", "$_REQUEST",
     "$_HTTP_GET_VARS", "$_HTTP_POST_VARS",
@@ -14,17 +16,6 @@ entry_points = [
     "$HTTP_ENV_VARS", "$GLOBALS"
 ]
 
-# Load MLKG (Machine Learning Knowledge Graph) variables
-def load_mlkg():
-    try:
-        global kg, functions
-        functions = mlkg_assembler.functions
-        kg = mlkg_assembler.kg
-        return functions, kg
-    except ImportError as e:
-        print("Error loading MLKG variables:", e)
-        return None, None
-
 # Represents an agent that receives and processes messages
 class Agent:
     def __init__(self, agent_id):
@@ -55,11 +46,16 @@ class Agent:
         recipient.receive_message(message)
 
 # Represents an agent that traverses the call graph
+# Every agent reads the knowledge graph, call graph and function bodies of the
+# file under analysis from its AnalysisContext (see context.py). The searches
+# themselves run in traversal.py (taint.py for DataAgent); the agents supply
+# what to look for.
 class TravelAgent(Agent):
-    def __init__(self, agent_id, call_graph, knowledge_graph, entry):
+    def __init__(self, agent_id, entry, context):
         super().__init__(agent_id)
-        self.call_graph = call_graph
-        self.knowledge_graph = knowledge_graph
+        self.context = context
+        self.call_graph = context.call_graph
+        self.knowledge_graph = context.kg
         self.entry = entry
 
     # Process messages specifically for path requests
@@ -73,35 +69,209 @@ class TravelAgent(Agent):
 
     # Start traversal through the call graph
     def start_traversal(self, path):
-        agent = TravelAgent(f"{self.agent_id}_sub", self.call_graph, self.knowledge_graph, self.entry)
+        agent = TravelAgent(f"{self.agent_id}_sub", self.entry, self.context)
         return agent.travel_path(path)
     
-    # Method for traversing a path
+    # Method for traversing a path: every call path extending it that ends in
+    # a function of the knowledge graph, with that function's sinks.
+    # Functions that cannot reach a sink (context.sink_reachable) are skipped.
     def travel_path(self, path):
         var = []
-        if path[-1] in self.knowledge_graph.keys():
+        allowed = self.context.sink_reachable
+        if allowed is not None and path[-1] not in allowed:
+            return var
+
+        # The call paths only depend on path; every entry point of the
+        # function reuses them
+        key = tuple(path)
+        if key not in self.context.call_paths:
+            self.context.call_paths[key] = self.call_paths(path)
+        paths, truncated = self.context.call_paths[key]
+        self.context.truncated_paths += truncated
+
+        for p in paths:
             var.append((
-                self.entry + tuple([path[0]]),
-                [x for x in self.knowledge_graph[path[-1]][1] if "sink" in x[0]],
-                path.copy()
+                self.entry + tuple([p[0]]),
+                [x for x in self.knowledge_graph[p[-1]][1] if "sink" in x[0]],
+                p
             ))
-
-        last_node = path[-1]
-        for n in list(self.call_graph.successors(last_node)):
-            if n not in path:
-                agent = TravelAgent(f"{self.agent_id}_{n}", self.call_graph, self.knowledge_graph, self.entry)
-                var.extend(agent.travel_path(path + [n]))
-
         return var
 
+    # Call paths extending path that end in a function of the knowledge
+    # graph, and the number of paths cut short by max_call_depth
+    def call_paths(self, path):
+        found = []
+        truncated = [0]
+        visits = 0
+
+        def cut(p):
+            truncated[0] += 1
+
+        for p in traversal.simple_paths(self.call_graph, path, self.context.sink_reachable,
+                                        self.context.max_call_depth, cut):
+            visits += 1
+            if p[-1] in self.knowledge_graph:
+                found.append(p)
+        if self.context.profile is not None:
+            self.context.profile.visit("TravelAgent", visits)
+        return found, truncated[0]
+
+
+# Represents an agent that slices backward from the sinks (--engine backward).
+# It returns the trials TravelAgent would, (entry, sinks, call path), but only
+# those VerificationAgent can accept. In the sink's function the taint has to
+# reach the sink, so an entry point or parameter counts when it is in the
+# sink's backward slice (slicing.py). A failed binding reaches the sink's
+# function as "-", which counts when "-" is in the slice. In the callers,
+# verification only binds the variable to the callee's parameter at a
+# reachable call (TranslationAgent), with no data flow, so an entry point or
+# parameter counts when it binds a parameter that counts in the callee.
+class SliceAgent(Agent):
+    def __init__(self, agent_id, context):
+        super().__init__(agent_id)
+        self.context = context
+        self.call_graph = context.call_graph
+        self.knowledge_graph = context.kg
+        self.translation = TranslationAgent(f"{agent_id}_translation", context)
+        self.slices = {}
+        self.calls = {}
+        self.visits = 0
+
+    # entries: function -> entry points to consider, as (kind, var, index)
+    # tuples like TravelAgent's; sinks are filtered by type like the verification
+    def start_slicing(self, entries, type=False):
+        if self.context.summaries is None:
+            from summaries import FunctionSummaries
+            self.context.summaries = FunctionSummaries(self.context)
+        self.entries = entries
+        self.found = {}
+        for func in self.knowledge_graph:
+            for sink in self.knowledge_graph[func][1]:
+                if "sink" in sink[0] and (not type or type in sink[0]):
+                    self.slice_sink(func, sink)
+        if self.context.profile is not None:
+            self.context.profile.visit("SliceAgent", self.visits)
+        return self.trials()
+
+    # Entry points of func in the slice of sink, then its callers while a
+    # parameter (or "-") is in it
+    def slice_sink(self, func, sink):
+        key = ("sink", func, sink)
+        if key not in self.slices:
+            graph = self.knowledge_graph[func][0]
+            roots = slicing.label_roots(graph, sink)
+            found = slicing.backward_slice(graph, self.context.functions[func], roots) if roots else None
+            self.visits += len(found) if found is not None else 0
+            self.slices[key] = self.accepted(func, lambda node, var: found.relevant(node, var)
+                                             if found is not None else False, "-")
+        entries, live = self.slices[key]
+        for entry in entries:
+            self.found.setdefault((func, entry, (func,)), set()).add(sink)
+        self.callers([func], live, sink)
+
+    # Entry points of path[0] whose variable binds a parameter in live at a
+    # reachable call to path[1], then its callers
+    def bind_back(self, path, live, sink):
+        caller, callee = path[0], path[1]
+        key = ("call", caller, callee, live)
+        if key not in self.slices:
+            if "" in live:
+                # A failed binding is accepted, so is every variable
+                self.slices[key] = self.accepted(caller, lambda node, var: True, "")
+            else:
+                self.slices[key] = self.accepted(
+                    caller, lambda node, var: self.binds(caller, callee, node, var, live), "")
+        entries, caller_live = self.slices[key]
+        for entry in entries:
+            self.found.setdefault((caller, entry, tuple(path)), set()).add(sink)
+        self.callers(path, caller_live, sink)
+
+    # (entry points of func, parameters of func) accepted by accept(node id,
+    # variable); unbound is the variable a failed binding has in func, added
+    # to the parameters when accepted at the header
+    def accepted(self, func, accept, unbound):
+        summaries = self.context.summaries
+        entries = tuple(entry for entry in self.entries.get(func, ())
+                        if accept(summaries.node(func, entry[2]), entry[1]))
+        live = frozenset()
+        if func != "_main" and self.context.functions.get(func):
+            try:
+                header = summaries.node(func, 0)
+            except IndexError:
+                return entries, live
+            params = dvg.get_vars_func(self.context.functions[func][0], func)
+            live = frozenset(param for param in params if accept(header, param))
+            if accept(header, unbound):
+                live |= {""}
+        return entries, live
+
+    def callers(self, path, live, sink):
+        if not live:
+            return
+        if self.context.max_call_depth and len(path) >= self.context.max_call_depth:
+            self.context.truncated_paths += 1
+            return
+        for caller in self.call_graph.predecessors(path[0]):
+            if caller in path or caller not in self.knowledge_graph:
+                continue
+            self.bind_back([caller] + path, live, sink)
+
+    # True when a call to callee reachable from node binds var to a
+    # parameter in live, as TranslationAgent does
+    def binds(self, caller, callee, node, var, live):
+        for call, line in self.call_sites(caller, callee):
+            if call == node or reachability.can_reach(self.knowledge_graph, caller, node, call):
+                if self.translation.bind(line, var, callee) in live:
+                    return True
+        return False
+
+    # (node id, line) of every call to callee in caller
+    def call_sites(self, caller, callee):
+        key = (caller, callee)
+        if key not in self.calls:
+            graph = self.knowledge_graph[caller][0]
+            lines = self.context.functions[caller]
+            func_call = re.compile(r'\b' + callee + r'\b')
+            self.calls[key] = [
+                (node, lines[graph.lines[node] - 1]) for node in range(len(graph))
+                if node != graph.return_id and func_call.search(lines[graph.lines[node] - 1])]
+        return self.calls[key]
+
+    # Trials in the order TravelAgent gives them: by function, entry point,
+    # then depth-first call path; sinks in label order
+    def trials(self):
+        order = {func: i for i, func in enumerate(self.knowledge_graph)}
+        successors = {}
+
+        def rank(path):
+            ranks = []
+            for u, v in zip(path, path[1:]):
+                if u not in successors:
+                    successors[u] = list(self.call_graph.successors(u))
+                ranks.append(successors[u].index(v))
+            return ranks
+
+        keys = sorted(self.found, key=lambda k: (
+            order[k[0]], self.entries[k[0]].index(k[1]), rank(k[2])))
+        trials = []
+        for func, entry, path in keys:
+            sinks = self.found[(func, entry, path)]
+            trials.append((
+                entry + (func,),
+                [x for x in self.knowledge_graph[path[-1]][1] if x in sinks],
+                list(path)
+            ))
+        return trials
+
 
 # Represents an agent for verification
 class VerificationAgent(Agent):
-    def __init__(self, agent_id, entry, sink, pathprint):
+    def __init__(self, agent_id, entry, sink, pathprint, context):
         super().__init__(agent_id)
         self.entry = entry
         self.sink = sink
         self.pathprint = pathprint
+        self.context = context
 
     def process_messages(self):
         for message in self.inbox:
@@ -113,61 +283,48 @@ class VerificationAgent(Agent):
                 self.send_message(sender, {'results': results})
 
     def start_verification(self, path, var):
-        agent = VerificationAgent(f"{self.agent_id}_sub", self.entry, self.sink, self.pathprint)
+        agent = VerificationAgent(f"{self.agent_id}_sub", self.entry, self.sink, self.pathprint, self.context)
         return agent.verify_path(path, var)
 
+    # Composes the per-function summaries of the file (summaries.py) along
+    # the call path instead of re-walking each function's PDG
     def verify_path(self, path, var):
-        var_list = []
         if not path:
             return (False, self.entry, self.sink)
-
-        if len(path) == 1:
-            start_node, target_var = (
-                (self.get_node(kg[path[0]][0], self.entry[2]), self.entry[1])
-                if path[0] == self.entry[3] else
-                (self.get_node(kg[path[0]][0], 0), var if var else "-")
-            )
-
-            pdg = kg[path[0]][0]
-            data_agent = DataAgent(pdg, [target_var], self.sink, path[0])
-            flow_agent = FlowAgent(pdg, self.sink)
-
-            return (
-                data_agent.data(start_node) == "vulnerable" and
-                flow_agent.flow(start_node) == "vulnerable",
-                self.entry, self.sink, path, self.pathprint
-            )
-
-        translation_agent = TranslationAgent()
-
-        translations = (
-            translation_agent.translate(kg[path[0]][0],
-                                        self.get_node(kg[path[0]][0], self.entry[2]) if path[0] == self.entry[3] else
-                                        self.get_node(kg[path[0]][0], 0), var, path[0], path[1])
-        ) if path[0] == self.entry[3] else (
-            translation_agent.translate(kg[path[0]][0], self.get_node(kg[path[0]][0], 0), var, path[0], path[1])
+        summaries = self.context.summaries
+        if summaries is None:
+            from summaries import FunctionSummaries
+            summaries = self.context.summaries = FunctionSummaries(self.context)
+
+        # Follow the call path hop by hop, translating the tainted variable
+        # into the argument it is bound to in the callee
+        while len(path) > 1:
+            if self.context.profile is not None:
+                self.context.profile.visit("VerificationAgent")
+            start = self.entry[2] if path[0] == self.entry[3] else 0
+            path, var = path[1:], summaries.binding(path[0], start, var, path[1])
+
+        if self.context.profile is not None:
+            self.context.profile.visit("VerificationAgent")
+        start, target_var = (
+            (self.entry[2], self.entry[1])
+            if path[0] == self.entry[3] else
+            (0, var if var else "-")
         )
 
-        if not translations:
-            translations.append("")
-
-        for n in list(self.call_graph.successors(path[-1])):
-            if n not in path:
-                agent = VerificationAgent(f"{self.agent_id}_{n}", self.entry, self.sink, self.pathprint)
-                var_list.extend(agent.verify_path(path + [n], translations[-1]))
-
-        return var_list
-
-    def get_node(self, graph, index):
-        return [n for n in graph if n[0] == index + 1][0]
+        return (
+            summaries.reaches_sink(path[0], start, target_var, self.sink),
+            # Report the whole call path, not just the function the sink is in
+            self.entry, self.sink, self.pathprint, self.pathprint
+        )
 
 
 # Represents an agent for translation
 class TranslationAgent(Agent):
-    def __init__(self, agent_id):
+    def __init__(self, agent_id, context):
         super().__init__(agent_id)
+        self.context = context
         self.trans = []
-        self.visited = []
 
     def process_messages(self):
         for message in self.inbox:
@@ -181,30 +338,46 @@ class TranslationAgent(Agent):
                 results = self.translate(pdg, node, var, func, prox)
                 self.send_message(sender, {'results': results})
 
+    # Parameter of prox bound to var by a call to prox reachable from node.
+    # Calls are looked for along every path from node, and the call found
+    # last in depth-first order wins. Returns [parameter], or [] if none.
     def translate(self, pdg, node, var, func, prox):
-        if not pdg.successors(node):
-            return [""]
-
-        for n in [node] + [x for x in pdg.successors(node) if x != "return"]:
-            line = functions[func][n[0] - 1]
-            func_call = re.compile(r'\b' + prox + r'\b').search(line)
-
-            if func_call and n not in self.visited:
-                possible_vars = dvg.get_vars_func(line, prox)
-
-                if var in possible_vars:
-                    self.trans.append(dvg.get_vars_func(functions[prox][0], prox)[possible_vars.index(var)])
-                elif var in entry_points and self.index_entry(line, var) != -1:
-                    self.trans.append(dvg.get_vars_func(functions[prox][0], prox)[self.index_entry(line, var)])
-
-                self.visited.append(n)
-
-            if n != node:
-                agent = TranslationAgent(f"{self.agent_id}_{n}")
-                self.trans.extend(agent.translate(pdg, n, var, func, prox))
+        functions = self.context.functions
+        func_call = re.compile(r'\b' + prox + r'\b')
+        visits = [0]
+
+        def match(n):
+            visits[0] += 1
+            line = functions[func][pdg.lines[n] - 1]
+            if not func_call.search(line):
+                return None
+            return self.bind(line, var, prox)
 
+        found = traversal.last_match(pdg, node, match)
+        if self.context.profile is not None:
+            self.context.profile.visit("TranslationAgent", visits[0])
+        if found is not None:
+            self.trans.append(found)
         return self.trans
 
+    # Parameter of prox that var is bound to by the call to prox on line, or
+    # None when var is not passed to it
+    def bind(self, line, var, prox):
+        possible_vars = dvg.get_vars_func(line, prox)
+        if var in possible_vars:
+            return self.parameter(prox, possible_vars.index(var))
+        if var in entry_points:
+            return self.parameter(prox, self.index_entry(line, var))
+        return None
+
+    # Parameter of prox at position index, or None when the call passes more
+    # arguments than prox declares (or index is -1)
+    def parameter(self, prox, index):
+        params = dvg.get_vars_func(self.context.functions[prox][0], prox)
+        if 0 <= index < len(params):
+            return params[index]
+        return None
+
     def index_entry(self, line, var):
         if "=" in line:
             line = line.split("=")[1]
@@ -220,115 +393,51 @@ class TranslationAgent(Agent):
 # Represents an agent for handling data
 class DataAgent:
     
-    def __init__(self, current_pdg, target_vars, sink, func):
+    def __init__(self, current_pdg, target_vars, sink, func, context):
         self.current_pdg = current_pdg
         self.target_vars = target_vars
         self.sink = sink
         self.func = func
-        self.visited = []
+        self.context = context
 
-    # Method to handle data flow
+    # Method to handle data flow: "vulnerable" when a tainted variable reaches
+    # the sink along data edges, else ""
     def data(self, current_node):
-        successors = self.current_pdg.successors(current_node)
-
-        if not successors:
+        # No need to solve when the sink cannot be reached at all
+        if reachability.reaches_label(self.current_pdg, current_node, self.sink, reachability.DATA) is False:
             return ""
-
-        for successor in [s for s in successors if s != "return"]:
-            try:
-                if os.getenv("MLKG_DEBUG", "0") == "1":
-                    print(f"[DEBUG][DataAgent] at {current_node} -> considering {successor}")
-            except Exception:
-                pass
-            # Always compute dependents for the current line first
-            try:
-                self.update_dependents(self.target_vars, functions[self.func][successor[0] - 1])
-                try:
-                    if os.getenv("MLKG_DEBUG", "0") == "1":
-                        print(f"[DEBUG][DataAgent] target_vars now: {self.target_vars}")
-                except Exception:
-                    pass
-            except Exception:
-                pass
-
-            # If this node represents a sanitization, drop ALL sanitized vars from the taint set
-            try:
-                if successor[1] != '' and "sanitization" in successor[1][0]:
-                    vars_sanitized = []
-                    # successor[1] is like (label, (vars...), line, meta)
-                    if len(successor[1]) > 1 and isinstance(successor[1][1], (list, tuple)):
-                        vars_sanitized = list(successor[1][1])
-                    # Remove every sanitized var from target set (including any just added as dependents)
-                    for v in list(self.target_vars):
-                        if v in vars_sanitized:
-                            try:
-                                self.target_vars.remove(v)
-                            except ValueError:
-                                pass
-            except Exception:
-                pass
-
-            etype = self.get_edge_type(self.current_pdg, current_node, successor)
-            if (
-                successor not in self.visited and
-                etype != "b"
-            ):
-
-                # Only flag vulnerable at the sink if the sink variable(s)
-                # are actually tainted (present in target_vars)
-                if successor[1] == self.sink:
-                    try:
-                        sink_vars = []
-                        if isinstance(self.sink, (list, tuple)) and len(self.sink) > 1:
-                            if isinstance(self.sink[1], (list, tuple)):
-                                sink_vars = list(self.sink[1])
-                        # If any sink var is still in the taint set, it's vulnerable
-                        if any(v in self.target_vars for v in sink_vars):
-                            return "vulnerable"
-                        else:
-                            # Not tainted at sink; continue traversal
-                            pass
-                    except Exception:
-                        pass
-
-                self.visited.append(successor)
-
-                value = self.data(successor)
-                if value:
-                    return value
-
-        return ""
-
-    # Update dependent variables
-    def update_dependents(self, target_vars, line):
-        for t in target_vars:
-            dependents = self.get_dependent_variables(line, t)
-            if dependents and dependents not in target_vars:
-                target_vars.append(dependents)
-
-    # Get dependent variables from a line
-    def get_dependent_variables(self, line, right_variable):
-        sides = line.split("=", 1)
-        if len(sides) > 1:
-            if right_variable in sides[1] and right_variable not in sides[0]:
-                pattern = r'\$([^\s]+)'
-                match = re.search(pattern, sides[0])
-
-                if match:
-                    return match.group(0).strip()
-
-        return ''
+        return "vulnerable" if self.sink_tainted(self.solve([(current_node, self.target_vars)])) else ""
+
+    # taint.Taint solution for sources given as (node id of the CompactGraph
+    # PDG, tainted variables) pairs; all of them are solved together
+    def solve(self, sources):
+        # Call sites compose the callees' return summaries (summaries.lines)
+        summaries = self.context.summaries
+        lines = summaries.lines(self.func) if summaries is not None else self.context.functions[self.func]
+        solution = taint.solve(self.current_pdg, sources, lines)
+        if self.context.profile is not None:
+            self.context.profile.visit("DataAgent", len(solution.out) + 1)
+        if os.getenv("MLKG_DEBUG", "0") == "1":
+            for node, facts in solution.out.items():
+                print(f"[DEBUG][DataAgent] {self.current_pdg.node(node)} tainted: {solution.variables(facts)}")
+        return solution
+
+    # Only flag vulnerable at the sink if the sink variable(s)
+    # are actually tainted there by sources[source]
+    def sink_tainted(self, solution, source=0):
+        sink_vars = self.sink.vars if isinstance(self.sink, dvg.Label) else \
+            self.sink[1] if isinstance(self.sink, (list, tuple)) and len(self.sink) > 1 else None
+        if not isinstance(sink_vars, (list, tuple)):
+            return False
+        return any(solution.sources(self.sink, v) >> source & 1 for v in sink_vars)
 
     # Get edge data from the graph
     def get_edge_data(self, graph, n1, n2):
         # Retain for compatibility; traversal no longer filters on edge labels.
         try:
-            labels = [
-                x[2].get("label") for x in graph.edges(data=True)
-                if x[0] == n1 and x[1] == n2
-            ][0]
+            labels = graph.edge_label(n1, n2)
             if labels:
-                return [x[2].get("label") for x in graph.edges(data=True) if x[0] == n1 and x[1] == n2][0].split(".")
+                return labels.split(".")
         except Exception:
             pass
         return []
@@ -337,13 +446,13 @@ class DataAgent:
     def get_edge_type(self, graph, n1, n2):
         # Prefer data-dependency edges ('g' over 'r') when both control ('b') and data edges coexist
         try:
-            colors = [x[2].get("color") for x in graph.edges(data=True) if x[0] == n1 and x[1] == n2]
+            colors = graph.edge_mask(n1, n2)
             if not colors:
                 return None
             # For DataAgent, any non-'b' edge should be traversed; prefer 'g' over 'r'
-            if 'g' in colors:
+            if colors & GREEN:
                 return 'g'
-            if 'r' in colors:
+            if colors & RED:
                 return 'r'
             return 'b'
         except Exception:
@@ -352,43 +461,42 @@ class DataAgent:
 # Represents an agent for handling flow
 class FlowAgent:
     
-    def __init__(self, current_pdg, sink):
+    def __init__(self, current_pdg, sink, context):
         self.current_pdg = current_pdg
         self.sink = sink
-        self.visited = []
+        self.context = context
+        self.visited = set()
 
-    # Method to handle flow traversal
+    # Method to handle flow traversal: "vulnerable" when the sink is reachable
+    # along control-flow edges, else ""
     def flow(self, current_node):
-        successors = self.current_pdg.successors(current_node)
-
-        if not successors:
-            return ""
-
-        for successor in [s for s in successors if s != "return"]:
-            if (
-                successor not in self.visited and
-                self.get_edge_type(self.current_pdg, current_node, successor) != "r"
-            ):
-                if successor[1] == self.sink:
-                    return "vulnerable"
-
-                self.visited.append(successor)
-                value = self.flow(successor)
-                if value:
-                    return value
-
-        return ""
+        # Answered by the PDG's reachability index unless the graph is too big
+        found = reachability.reaches_label(self.current_pdg, current_node, self.sink, reachability.CONTROL)
+        if found is not None:
+            if self.context.profile is not None:
+                self.context.profile.visit("FlowAgent")
+            return "vulnerable" if found else ""
+        before = len(self.visited)
+        found = traversal.reaches(
+            self.current_pdg, current_node,
+            # Control-flow edges, alone or with a data dependency
+            lambda node, successor, colors: bool(colors & (BLUE | GREEN)),
+            lambda successor: self.current_pdg.labels[successor] == self.sink,
+            visited=self.visited)
+        if self.context.profile is not None:
+            self.context.profile.visit("FlowAgent", len(self.visited) - before + 1)
+        return "vulnerable" if found else ""
 
     # Get edge type from the graph
     def get_edge_type(self, graph, n1, n2):
         # For FlowAgent, prefer control/CFG edges ('b') and allow mixed edges ('g'); avoid pure data-only ('r')
         try:
-            colors = [x[2].get("color") for x in graph.edges(data=True) if x[0] == n1 and x[1] == n2]
+            colors = graph.edge_mask(n1, n2)
             if not colors:
                 return None
-            if 'b' in colors:
+            if colors & BLUE:
                 return 'b'
-            if 'g' in colors:
+            if colors & GREEN:
                 return 'g'
             return 'r'
         except Exception:
@@ -0,0 +1,54 @@
+# annotate.py
+#
+# Per-function line annotation pass. Every line of a function is labelled and
+# scanned once here; cfg.to_cfg and dvg.to_dvg both build their graphs from
+# the resulting LineInfo list instead of re-running dvg.get_label per line.
+
+import re
+import dvg
+
+_BLANK = re.compile(r"^(}|{| )+$")
+_ELSE = re.compile(r"else|elif")
+
+
+class LineInfo:
+    __slots__ = ("node", "line_num", "text", "label", "vars", "assign",
+                 "depth", "opens", "closes", "branch", "is_else", "is_return", "blank")
+
+    def __init__(self, node, line_num, text, depth):
+        # processed line index + 1, the node id shared by CFG, DVG and PDG
+        self.node = node
+        # original file line number, used in labels
+        self.line_num = line_num
+        # line with trailing whitespace removed
+        self.text = text
+        self.label = dvg.get_label(text, line_num)
+        has_var = "$" in text
+        # variables used on the line ($name, excluding superglobals)
+        self.vars = dvg.get_vars(text) if has_var else []
+        # offset of the first '=' after the first variable (-1 if none)
+        self.assign = text[text.index("$"):].find("=") if has_var else -1
+        # CFG nesting depth at the start of the line
+        self.depth = depth
+        self.opens = text.count("{")
+        self.closes = text.count("}")
+        # starts (or continues) a conditional: if/else/elseif/case
+        self.branch = "else" in text or "if" in text or "case" in text
+        self.is_else = _ELSE.search(text) is not None
+        self.is_return = "return" in text
+        # empty, or only braces and spaces
+        self.blank = len(text) == 0 or _BLANK.search(text) is not None
+
+
+def annotate_lines(lines, line_mapping=None):
+    """LineInfo for every line of a function, in order."""
+    infos = []
+    depth = 0
+    for i in range(len(lines)):
+        text = lines[i].rstrip()
+        # label the line using original line numbers when available
+        line_num = line_mapping[i] if line_mapping and i < len(line_mapping) else (i + 1)
+        info = LineInfo(i + 1, line_num, text, depth)
+        depth += info.opens - info.closes
+        infos.append(info)
+    return infos
@@ -0,0 +1,422 @@
+# benchmark.py
+#
+# Corpus benchmark for the SAT analyzer over the labelled Samples/ folders.
+# Reports throughput, per-file latency percentiles and precision/recall/F1
+# derived from the folder labels (<KIND>_Safe / <KIND>_Unsafe), and can save
+# a baseline and fail when a later run regresses against it.
+#
+#   python SAT/benchmark.py                               # run and print
+#   python SAT/benchmark.py --save-baseline bench.json    # record a baseline
+#   python SAT/benchmark.py --baseline bench.json         # compare, exit 1 on regression
+#   python SAT/benchmark.py --profile                     # add a per-stage time breakdown
+#   python SAT/benchmark.py --lines                       # per-line labelling/DVG micro-benchmark
+#   python SAT/benchmark.py --scaling                     # DVG build time vs. uses of one variable
+#   python SAT/benchmark.py --compare-engines             # forward vs. backward engine, Samples and WebAppSample
+
+import os
+import io
+import sys
+import json
+import time
+import math
+import argparse
+import platform
+import contextlib
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CORPUS = os.path.join(BASE_DIR, "Samples")
+WEBAPP_CORPUS = os.path.join(BASE_DIR, "WebAppSample")
+ENGINES = ["forward", "backward"]
+FOLDERS = ["SQLi_Safe", "SQLi_Unsafe", "XSS_Safe", "XSS_Unsafe"]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[k]
+
+
+def classify(folder):
+    """(kind, expected_vulnerable) from a Samples folder name, e.g. ("sqli", False)."""
+    kind, _, label = folder.partition("_")
+    return kind.lower(), label.lower() == "unsafe"
+
+
+def collect_files(corpus):
+    files = []
+    for folder in FOLDERS:
+        path = os.path.join(corpus, folder)
+        if not os.path.isdir(path):
+            continue
+        kind, expected = classify(folder)
+        for name in sorted(os.listdir(path)):
+            if name.endswith(".php"):
+                files.append((os.path.join(path, name), kind, expected))
+    return files
+
+
+def corpus_files(corpus):
+    """Labelled files of a Samples-like corpus, else every .php file under it (kind None)."""
+    files = collect_files(corpus)
+    if not files:
+        for root, dirs, names in os.walk(corpus):
+            dirs.sort()
+            for name in sorted(names):
+                if name.endswith(".php"):
+                    files.append((os.path.join(root, name), None, None))
+    return files
+
+
+def analyze(mlkg, file, profile=None):
+    """Run find_vuls on one file without touching the CSVs.
+
+    Stage times are added to profile (a profiling.Profiler) when given.
+    Returns (seconds, {"xss": bool, "sqli": bool, "findings": int}, error).
+    """
+    from context import AnalysisContext
+
+    sink = []
+    context = AnalysisContext(file)
+    context.profile = profile
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            mlkg.find_vuls(file[:-4], False, csv_sink=sink, context=context)
+            error = None
+        except Exception as e:
+            error = str(e)
+    elapsed = time.perf_counter() - start
+    found = {"xss": False, "sqli": False, "findings": 0}
+    for _display, rows, xss_found, sqli_found in sink:
+        found["xss"] = found["xss"] or bool(xss_found)
+        found["sqli"] = found["sqli"] or bool(sqli_found)
+        found["findings"] += len(rows)
+    return elapsed, found, error
+
+
+def accuracy(tp, fp, fn, tn):
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"tp": tp, "fp": fp, "fn": fn, "tn": tn,
+            "precision": round(precision, 4), "recall": round(recall, 4), "f1": round(f1, 4)}
+
+
+def run(corpus, repeat=1, profile=False, engine=None):
+    import mlkg_assembler as mlkg
+    import profiling
+
+    if engine:
+        mlkg.ENGINE = engine
+    profiler = profiling.Profiler() if profile else None
+    files = collect_files(corpus)
+    latencies = []
+    counts = {}
+    errors = 0
+    total_start = time.perf_counter()
+    for file, kind, expected in files:
+        best = None
+        for _ in range(max(1, repeat)):
+            elapsed, found, error = analyze(mlkg, file, profiler)
+            best = elapsed if best is None else min(best, elapsed)
+        latencies.append(best)
+        if error:
+            errors += 1
+        c = counts.setdefault(kind, [0, 0, 0, 0])  # tp, fp, fn, tn
+        predicted = found[kind]
+        c[0 if predicted and expected else 1 if predicted else 2 if expected else 3] += 1
+    wall = time.perf_counter() - total_start
+
+    totals = [sum(c[i] for c in counts.values()) for i in range(4)]
+    result = {
+        "corpus": os.path.relpath(corpus, BASE_DIR),
+        "python": platform.python_version(),
+        "files": len(files),
+        "errors": errors,
+        "seconds": round(wall, 3),
+        "files_per_second": round(len(files) / sum(latencies), 2) if latencies and sum(latencies) else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p95": round(percentile(latencies, 95) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "max": round(max(latencies) * 1000, 3) if latencies else 0.0,
+        },
+        "accuracy": dict({kind: accuracy(*c) for kind, c in sorted(counts.items())},
+                         overall=accuracy(*totals)),
+    }
+    if profiler is not None:
+        # Summed over all repeats
+        result["stages_ms"] = profiler.record(None)["stages_ms"]
+    return result
+
+
+def compare_engines(corpora, repeat=1):
+    """Time and findings of the forward and backward engines on each corpus.
+
+    search_ms is the time spent finding and verifying trials (travel or
+    slicing, plus verification), the only stages where the engines differ.
+    """
+    import mlkg_assembler as mlkg
+    import profiling
+
+    default = mlkg.ENGINE
+    results = []
+    for corpus in corpora:
+        files = corpus_files(corpus)
+        result = {"corpus": os.path.relpath(corpus, BASE_DIR), "files": len(files), "engines": {}}
+        findings = {}
+        for engine in ENGINES:
+            mlkg.ENGINE = engine
+            profiler = profiling.Profiler()
+            latencies = []
+            counts = [0, 0, 0, 0]  # tp, fp, fn, tn
+            findings[engine] = []
+            for file, kind, expected in files:
+                best = None
+                for _ in range(max(1, repeat)):
+                    elapsed, found, _error = analyze(mlkg, file, profiler)
+                    best = elapsed if best is None else min(best, elapsed)
+                latencies.append(best)
+                findings[engine].append(found["findings"])
+                if kind is not None:
+                    predicted = found[kind]
+                    counts[0 if predicted and expected else 1 if predicted else 2 if expected else 3] += 1
+            stages = profiler.record(None)["stages_ms"]
+            search = stages.get("travel", 0.0) + stages.get("slicing", 0.0) + stages.get("verification", 0.0)
+            result["engines"][engine] = {
+                "seconds": round(sum(latencies), 3),
+                "latency_ms": {"p50": round(percentile(latencies, 50) * 1000, 3),
+                               "p95": round(percentile(latencies, 95) * 1000, 3)},
+                "search_ms": round(search / max(1, repeat), 3),
+                "findings": sum(findings[engine]),
+                "f1": accuracy(*counts)["f1"] if any(kind is not None for _, kind, _ in files) else None,
+                "visits": dict(profiler.visits),
+            }
+        result["files_differing"] = sum(1 for a, b in zip(*findings.values()) if a != b)
+        results.append(result)
+    mlkg.ENGINE = default
+    return results
+
+
+def print_engines(results):
+    for result in results:
+        print(f"Corpus: {result['corpus']} ({result['files']} files)")
+        print(f"{'engine':<10} {'total s':>8} {'p50 ms':>8} {'p95 ms':>8} {'search ms':>10} {'findings':>9} {'f1':>7}")
+        for engine, r in result["engines"].items():
+            f1 = f"{r['f1']:.4f}" if r["f1"] is not None else "-"
+            print(f"{engine:<10} {r['seconds']:>8.3f} {r['latency_ms']['p50']:>8.3f} {r['latency_ms']['p95']:>8.3f} "
+                  f"{r['search_ms']:>10.1f} {r['findings']:>9} {f1:>7}")
+        print(f"Files with different findings: {result['files_differing']}")
+        print()
+
+
+# The per-line pattern work of dvg.to_dvg as it was before the patterns were
+# compiled and guarded: three object-sanitizer searches on every line, and
+# get_vars, from pattern strings looked up in re's cache each time
+_OBJECT_VAR = r'(\$[A-Za-z_\x7f-\xff][\w\x7f-\xff]*)'
+
+
+def _line_patterns_uncompiled(line, sanitized_objects):
+    import re
+
+    m_san_call = re.search(_OBJECT_VAR + r'\s*->\s*sanitize\s*\(', line)
+    if m_san_call:
+        sanitized_objects.add(m_san_call.group(1))
+    found = None
+    m_get = re.search(_OBJECT_VAR + r'\s*=\s*' + _OBJECT_VAR + r'\s*->\s*get(?:Data|Value|[A-Za-z0-9_]*)\s*\(', line)
+    if m_get and m_get.group(2) in sanitized_objects:
+        found = (m_get.group(1),)
+    if not found:
+        m_prop = re.search(_OBJECT_VAR + r'\s*=\s*' + _OBJECT_VAR + r'\s*->\s*[A-Za-z_\x7f-\xff][\w\x7f-\xff]*\s*;', line)
+        if m_prop and m_prop.group(2) in sanitized_objects:
+            found = (m_prop.group(1),)
+    return found, re.findall(r'\$(?!_)\w+', line)
+
+
+def _line_patterns(line, sanitized_objects):
+    import dvg
+
+    found = dvg.object_sanitization(line, sanitized_objects) if "->" in line else None
+    return found, dvg.get_vars(line)
+
+
+def line_costs(corpus, repeat=1):
+    """Per-line cost of the line labelling pass and of dvg.to_dvg on the corpus.
+
+    Every file is comment-stripped once up front; only annotate_lines and
+    to_dvg are timed (best of repeat). The per-line pattern work of to_dvg
+    (object-sanitizer heuristics and get_vars) is also timed on its own,
+    compiled and guarded as dvg does it and from uncompiled, unguarded
+    patterns as it used to, so the drop is measured on the same lines.
+    Returns microseconds per line.
+    """
+    import mlkg_assembler as mlkg
+    import annotate
+    import dvg
+
+    files = []
+    for file, _kind, _expected in collect_files(corpus):
+        files.append(mlkg.remove_html_comments(mlkg.removeComments(file)))
+    n_lines = sum(len(lines) for lines in files) or 1
+
+    best_labels = best_dvg = None
+    best = {_line_patterns: None, _line_patterns_uncompiled: None}
+    for _ in range(max(1, repeat)):
+        labels = build = 0.0
+        for lines in files:
+            start = time.perf_counter()
+            annotations = annotate.annotate_lines(lines)
+            labels += time.perf_counter() - start
+            start = time.perf_counter()
+            dvg.to_dvg(lines, False, None, annotations)
+            build += time.perf_counter() - start
+        best_labels = labels if best_labels is None else min(best_labels, labels)
+        best_dvg = build if best_dvg is None else min(best_dvg, build)
+        for patterns in best:
+            start = time.perf_counter()
+            for lines in files:
+                sanitized_objects = set()
+                for line in lines:
+                    patterns(line, sanitized_objects)
+            elapsed = time.perf_counter() - start
+            best[patterns] = elapsed if best[patterns] is None else min(best[patterns], elapsed)
+    return {
+        "files": len(files),
+        "lines": n_lines,
+        "labels_us_per_line": round(best_labels / n_lines * 1e6, 3),
+        "dvg_us_per_line": round(best_dvg / n_lines * 1e6, 3),
+        "patterns_us_per_line": round(best[_line_patterns] / n_lines * 1e6, 3),
+        "patterns_uncompiled_us_per_line": round(best[_line_patterns_uncompiled] / n_lines * 1e6, 3),
+    }
+
+
+def scaling_function(blocks):
+    """Synthetic PHP function body using $query in `blocks` sequential if-blocks."""
+    lines = ["$query = $_GET['q'];"]
+    for i in range(blocks):
+        lines += [f"if (rand() > {i}) {{",
+                  f"$query = $query . '{i}';" if i % 10 == 0 else "echo $query;",
+                  "}"]
+    lines.append("mysql_query($query);")
+    return lines
+
+
+def scaling(sizes=(250, 500, 1000, 2000, 4000)):
+    """to_dvg time per size; near-linear growth keeps us/occurrence flat."""
+    import dvg
+
+    results = []
+    for blocks in sizes:
+        lines = scaling_function(blocks)
+        occurrences = sum(line.count("$query") for line in lines)
+        start = time.perf_counter()
+        dvg.to_dvg(lines)
+        elapsed = time.perf_counter() - start
+        results.append({"blocks": blocks, "occurrences": occurrences,
+                        "ms": round(elapsed * 1000, 3),
+                        "us_per_occurrence": round(elapsed / occurrences * 1e6, 3)})
+    return results
+
+
+def compare(result, baseline, max_slowdown, max_accuracy_drop):
+    """List of regression messages (empty when result is within thresholds)."""
+    problems = []
+    base_fps = baseline.get("files_per_second", 0.0)
+    if base_fps and result["files_per_second"] < base_fps * (1 - max_slowdown):
+        problems.append(f"throughput {result['files_per_second']} files/s is more than "
+                        f"{max_slowdown:.0%} below baseline {base_fps} files/s")
+    for kind, base_acc in baseline.get("accuracy", {}).items():
+        acc = result["accuracy"].get(kind)
+        if acc is None:
+            continue
+        for metric in ("precision", "recall", "f1"):
+            if acc[metric] < base_acc.get(metric, 0.0) - max_accuracy_drop:
+                problems.append(f"{kind} {metric} {acc[metric]} dropped below baseline {base_acc[metric]}")
+    return problems
+
+
+def print_report(result):
+    print(f"Corpus: {result['corpus']} ({result['files']} files, {result['errors']} errors)")
+    print(f"Throughput: {result['files_per_second']} files/s ({result['seconds']} s wall)")
+    lat = result["latency_ms"]
+    print(f"Latency ms: p50={lat['p50']} p95={lat['p95']} p99={lat['p99']} max={lat['max']}")
+    print(f"{'kind':<8} {'tp':>5} {'fp':>5} {'fn':>5} {'tn':>5} {'prec':>7} {'recall':>7} {'f1':>7}")
+    for kind, a in result["accuracy"].items():
+        print(f"{kind:<8} {a['tp']:>5} {a['fp']:>5} {a['fn']:>5} {a['tn']:>5} "
+              f"{a['precision']:>7.4f} {a['recall']:>7.4f} {a['f1']:>7.4f}")
+    if "stages_ms" in result:
+        total = sum(result["stages_ms"].values()) or 1.0
+        print(f"{'stage':<16} {'total ms':>12} {'share':>7}")
+        for stage, ms in result["stages_ms"].items():
+            print(f"{stage:<16} {ms:>12.1f} {ms / total:>7.1%}")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the SAT analyzer on the labelled Samples corpus")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Folder holding SQLi_/XSS_ Safe/Unsafe subfolders")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per file; the fastest is kept")
+    parser.add_argument("--output", default=None, help="Write this run's results as JSON")
+    parser.add_argument("--save-baseline", default=None, help="Write this run as the baseline JSON")
+    parser.add_argument("--baseline", default=None, help="Baseline JSON to compare against")
+    parser.add_argument("--max-slowdown", type=float, default=0.2, help="Allowed throughput drop (fraction, default 0.2)")
+    parser.add_argument("--scaling", action="store_true", help="Only time to_dvg on growing synthetic functions")
+    parser.add_argument("--lines", action="store_true", help="Only time line labelling and DVG construction per line")
+    parser.add_argument("--profile", action="store_true", help="Report time spent in each pipeline stage")
+    parser.add_argument("--engine", choices=ENGINES, default=None, help="Analysis engine to benchmark (default forward)")
+    parser.add_argument("--compare-engines", action="store_true",
+                        help="Only compare the forward and backward engines on --corpus and WebAppSample")
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.0, help="Allowed precision/recall/F1 drop")
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    if args.scaling:
+        print(f"{'blocks':>7} {'uses':>7} {'ms':>10} {'us/use':>8}")
+        for r in scaling():
+            print(f"{r['blocks']:>7} {r['occurrences']:>7} {r['ms']:>10.1f} {r['us_per_occurrence']:>8.2f}")
+        return 0
+    if args.lines:
+        costs = line_costs(args.corpus, args.repeat)
+        print(f"Lines: {costs['lines']} in {costs['files']} files")
+        print(f"Labelling: {costs['labels_us_per_line']} us/line")
+        print(f"DVG construction: {costs['dvg_us_per_line']} us/line")
+        print(f"DVG line patterns: {costs['patterns_us_per_line']} us/line "
+              f"(uncompiled, unguarded: {costs['patterns_uncompiled_us_per_line']} us/line)")
+        return 0
+    if args.compare_engines:
+        corpora = [args.corpus] + ([WEBAPP_CORPUS] if os.path.abspath(args.corpus) != WEBAPP_CORPUS else [])
+        results = compare_engines(corpora, args.repeat)
+        print_engines(results)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+                f.write("\n")
+        return 0
+    result = run(args.corpus, args.repeat, args.profile, args.engine)
+    print_report(result)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=2)
+                f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems = compare(result, baseline, args.max_slowdown, args.max_accuracy_drop)
+        if problems:
+            print("\nRegression against baseline:")
+            for p in problems:
+                print(" -", p)
+            return 1
+        print("\nNo regression against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,48 +1,39 @@
-# Matplotlib is optional; only used for drawing when explicitly requested
-try:
-    import matplotlib.pyplot as plt
-except Exception:
-    plt = None
-import re
-import dvg
+import annotate
 import networkx as nx
+# Matplotlib is optional; only imported when drawing is explicitly requested
+from graph_export import load_pyplot
 
 #function that given a file or function returns a pdg
 #if p == True prints the graph
-def to_cfg(file, p = False, line_mapping = None):
+#lines: annotate.annotate_lines of the function, computed here when not given
+def to_cfg(file, p = False, line_mapping = None, lines = None):
 
-    nodes = []
-    depth = 0
+    if lines is None:
+        lines = annotate.annotate_lines(file, line_mapping)
 
-    #For each line in the file or function
-    for i in range(len(file)):
-
-        #line contents
-        line = file[i].rstrip()
-
-        # label the line using original line numbers when available
-        mapped_line_num = line_mapping[i] if line_mapping and i < len(line_mapping) else (i + 1)
-        label = dvg.get_label(line, mapped_line_num)
-
-        #the line is empty or contains only '{' or '}'
-        x = re.search("^(}|{| )+$", line)
-
-        #if the line is not empty 
-        if len(line) > 0 and not x:
-
-            #generates a node(line number, depth, return statment?, conditional statments?)
-            nodes.append((i+1, depth, "return" in line, re.search("else|elif", line), label))
+    #graph that will save the cfg
+    g = nx.MultiDiGraph()
+    add_cfg_edges(g, lines)
 
-        #if contains '}'s reduces depth
-        if "}" in line:
-            depth -= line.count("}")
+    #if p then prints the graph
+    if p:
+        print(g)
+        plt = load_pyplot()
+        if plt is not None:
+            nx.draw(g, with_labels = True)
+            plt.show()
+        else:
+            print("[cfg] Plot requested but matplotlib is not installed; skipping graph rendering.")
+                
+    return g
 
-        #if contains '{'s increment depth
-        if "{" in line:
-            depth += line.count("{")
+#adds the cfg edges of the annotated lines to g
+#g: nx.MultiDiGraph, or compact_graph.GraphBuilder when building a pdg
+def add_cfg_edges(g, lines):
 
-    #graph that will save the cfg
-    g = nx.MultiDiGraph()
+    #generates a node(line number, depth, return statment?, conditional statments?)
+    #for every line that is not empty or only '{' / '}'
+    nodes = [(l.node, l.depth, l.is_return, l.is_else, l.label) for l in lines if not l.blank]
 
     #for each node
     for n in range(len(nodes)-1):
@@ -116,14 +107,3 @@ def to_cfg(file, p = False, line_mapping = None):
 
                 #keeps travelling the forward nodes
                 x += 1
-                
-    #if p then prints the graph
-    if p:
-        print(g)
-        if plt is not None:
-            nx.draw(g, with_labels = True)
-            plt.show()
-        else:
-            print("[cfg] Plot requested but matplotlib is not installed; skipping graph rendering.")
-                
-    return g
\ No newline at end of file
@@ -0,0 +1,195 @@
+# compact_graph.py
+#
+# Compact graph type for the PDGs kept in the knowledge graph. to_pdg used to
+# merge networkx MultiDiGraphs (the CFG and one DVG per variable) and keep
+# the result for the whole analysis. Here the merge runs on plain dicts
+# (GraphBuilder) and the result is frozen into a CompactGraph: integer node
+# ids, CSR adjacency arrays, a color bitfield per edge, and side tables for
+# the line and label of every node. to_networkx() converts back for export,
+# drawing and debugging.
+
+from array import array
+
+# Edge color bits: CFG only, DVG only, both
+BLUE = 1
+RED = 2
+GREEN = 4
+BITS = {"b": BLUE, "r": RED, "g": GREEN}
+COLORS = {BLUE: "b", RED: "r", GREEN: "g"}
+
+
+class GraphBuilder:
+    """Ordered multigraph with the node, successor and edge-key order of nx.MultiDiGraph.
+
+    Nodes are (line, label) pairs or "return"; each gets a dense integer id
+    when first added, and the graph is stored by id. Edges carry a color and
+    an optional label. Removing the last u -> v edge drops v from the
+    successors of u, so adding it back appends it, as networkx does; the
+    merge in to_pdg relies on that order.
+    """
+
+    def __init__(self):
+        # node -> id, and id -> node
+        self._ids = {}
+        self._nodes = []
+        # id -> successor id -> key -> (color, label)
+        self._succ = []
+
+    def node_id(self, node):
+        """Id of node, added to the graph if it is new."""
+        i = self._ids.get(node)
+        if i is None:
+            i = self._ids[node] = len(self._nodes)
+            self._nodes.append(node)
+            self._succ.append({})
+        return i
+
+    def add_edge(self, u, v, key=None, color="b", label=None):
+        i = self.node_id(u)
+        j = self.node_id(v)
+        keys = self._succ[i].get(j)
+        if keys is None:
+            keys = self._succ[i][j] = {}
+        if key is None:
+            key = len(keys)
+            while key in keys:
+                key += 1
+        keys[key] = (color, label)
+        return key
+
+    def edge(self, u, v, key):
+        """(color, label) of edge u -> v with key, None if there is none."""
+        i = self._ids.get(u)
+        j = self._ids.get(v)
+        keys = self._succ[i].get(j) if i is not None and j is not None else None
+        return keys.get(key) if keys else None
+
+    def remove_edge(self, u, v, key):
+        adj = self._succ[self._ids[u]]
+        j = self._ids[v]
+        del adj[j][key]
+        if not adj[j]:
+            del adj[j]
+
+    def edges(self):
+        """(u, v, key) of every edge, in networkx order."""
+        nodes = self._nodes
+        for i, adj in enumerate(self._succ):
+            for j, keys in adj.items():
+                for key in keys:
+                    yield nodes[i], nodes[j], key
+
+    def freeze(self):
+        return CompactGraph(self._nodes, self._succ)
+
+    def to_networkx(self):
+        return self.freeze().to_networkx()
+
+
+class CompactGraph:
+    """Read-only graph in CSR form over the integer node ids of a GraphBuilder.
+
+    Node i has the successors targets[offsets[i]:offsets[i + 1]], one entry
+    per distinct successor; bits holds the OR of the colors of the parallel
+    edges to it. Parallel edges p are edge_offsets[p]:edge_offsets[p + 1] in
+    the per-edge tables (key, color bit, label). Only the side tables keep
+    what a node was: node(i) rebuilds its (line, label) pair for export and
+    debugging.
+    """
+
+    def __init__(self, nodes, succ):
+        self.return_id = next((i for i, n in enumerate(nodes) if n == "return"), -1)
+        # indexes derived on demand (see reachability.py)
+        self.indexes = {}
+        self._pairs = None
+        # Side tables: line of each node (-1 for "return") and its label
+        self.lines = array("i", [n[0] if isinstance(n, tuple) else -1 for n in nodes])
+        self.labels = [n[1] if isinstance(n, tuple) else "" for n in nodes]
+
+        self.offsets = offsets = array("i", [0])
+        self.targets = targets = array("i")
+        self.bits = bits = bytearray()
+        self.edge_offsets = edge_offsets = array("i", [0])
+        self.edge_keys = edge_keys = array("i")
+        self.edge_bits = edge_bits = bytearray()
+        self.edge_labels = edge_labels = []
+        for adj in succ:
+            for j, keys in adj.items():
+                targets.append(j)
+                mask = 0
+                for key, (color, label) in keys.items():
+                    edge_keys.append(key)
+                    edge_bits.append(BITS[color])
+                    edge_labels.append(label)
+                    mask |= BITS[color]
+                bits.append(mask)
+                edge_offsets.append(len(edge_keys))
+            offsets.append(len(targets))
+
+    def __iter__(self):
+        return iter(range(len(self.lines)))
+
+    def __len__(self):
+        return len(self.lines)
+
+    def number_of_nodes(self):
+        return len(self.lines)
+
+    def number_of_edges(self):
+        return len(self.edge_keys)
+
+    def node(self, i):
+        """(line, label) of node i, or "return"."""
+        return "return" if i == self.return_id else (self.lines[i], self.labels[i])
+
+    def node_id(self, node):
+        """Id of a (line, label) pair or "return" (for export and debugging)."""
+        ids = self.indexes.get("node_ids")
+        if ids is None:
+            ids = self.indexes["node_ids"] = {self.node(i): i for i in range(len(self))}
+        return ids[node]
+
+    def successor_ids(self, i):
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+    def _pair(self, i, j):
+        # Position of successor j in the CSR arrays of i; the (i, j) -> p
+        # dict is built on the first lookup
+        pairs = self._pairs
+        if pairs is None:
+            pairs = self._pairs = {}
+            offsets, targets = self.offsets, self.targets
+            for u in range(len(self)):
+                for p in range(offsets[u], offsets[u + 1]):
+                    pairs[(u, targets[p])] = p
+        return pairs.get((i, j), -1)
+
+    def edge_mask(self, i, j):
+        """OR of the color bits of the edges i -> j (0 when there are none)."""
+        p = self._pair(i, j)
+        return self.bits[p] if p >= 0 else 0
+
+    def edge_label(self, i, j):
+        """Label of the first edge i -> j (None when unlabelled or absent)."""
+        p = self._pair(i, j)
+        return self.edge_labels[self.edge_offsets[p]] if p >= 0 else None
+
+    def _edge_data(self, e):
+        data = {"color": COLORS[self.edge_bits[e]]}
+        if self.edge_labels[e] is not None:
+            data["label"] = self.edge_labels[e]
+        return data
+
+    def to_networkx(self):
+        """The same graph as an nx.MultiDiGraph of (line, label) nodes (same node, edge and key order)."""
+        import networkx as nx
+
+        g = nx.MultiDiGraph()
+        nodes = [self.node(i) for i in range(len(self))]
+        g.add_nodes_from(nodes)
+        for i, u in enumerate(nodes):
+            for p in range(self.offsets[i], self.offsets[i + 1]):
+                v = nodes[self.targets[p]]
+                for e in range(self.edge_offsets[p], self.edge_offsets[p + 1]):
+                    g.add_edge(u, v, self.edge_keys[e], **self._edge_data(e))
+        return g
@@ -0,0 +1,37 @@
+class AnalysisContext:
+    """State of a single find_vuls analysis.
+
+    Holds everything the agents need to traverse one file, so several analyses
+    can run side by side (threads, or many files in one process) without
+    sharing module-level globals.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        # function name -> (pdg, labels, has_return, n_variables), for the
+        # functions whose PDG was built (see pdg.demand)
+        self.kg = {}
+        # function name -> list of processed (comment-stripped) lines
+        self.functions = {}
+        # function name -> processed line index -> original file line number
+        self.line_mappings = {}
+        # function call graph of the file (fcg.to_fcg)
+        self.call_graph = None
+        # findings counted while analysing this file
+        self.count_xss = 0
+        self.count_sqli = 0
+        # per-analysis GPT session (None when GPT is disabled)
+        self.gpt_agent = None
+        # profiling.Profiler collecting stage times (None unless profiling)
+        self.profile = None
+        # functions that can reach a function with sinks (None: no pruning)
+        self.sink_reachable = None
+        # longest call path followed, in functions (0: no limit)
+        self.max_call_depth = 0
+        # call paths cut short by max_call_depth
+        self.truncated_paths = 0
+        # summaries.FunctionSummaries of the file, built on first verification
+        self.summaries = None
+        # call path (tuple) -> (TravelAgent paths from it, paths cut short),
+        # shared by the entry points of a function
+        self.call_paths = {}
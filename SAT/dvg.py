@@ -1,11 +1,44 @@
-try:
-    import matplotlib.pyplot as plt
-except Exception:
-    plt = None
 import re
+import sys
+import bisect
+import heapq
 import networkx as nx
+from graph_export import load_pyplot
+
+# Patterns used on every line, compiled once
+_PHP_VAR = r'\$[A-Za-z_\x7f-\xff][\w\x7f-\xff]*'
+# "$obj->sanitize(...)"
+_SANITIZE_CALL = re.compile(r'(' + _PHP_VAR + r')\s*->\s*sanitize\s*\(')
+# "$var = $obj->getData(...)"
+_GETTER_ASSIGN = re.compile(r'(' + _PHP_VAR + r')\s*=\s*(' + _PHP_VAR + r')\s*->\s*get(?:Data|Value|[A-Za-z0-9_]*)\s*\(')
+# "$var = $obj->data;"
+_PROPERTY_ASSIGN = re.compile(r'(' + _PHP_VAR + r')\s*=\s*(' + _PHP_VAR + r')\s*->\s*[A-Za-z_\x7f-\xff][\w\x7f-\xff]*\s*;')
+_VARS = re.compile(r'\$(?!_)\w+')
+_ASSIGNED_VAR = re.compile(r"\$[a-zA-Z_\x7f-\xff][a-zA-Z0-9_\x7f-\xff]*")
+_NON_WORD = re.compile(r'\W')
+_CASTS = {}
+
+#lines: annotate.annotate_lines of the function, computed here when not given
+def to_dvg(file, p = False, line_mapping = None, lines = None):
+    if lines is None:
+        import annotate
+        lines = annotate.annotate_lines(file, line_mapping)
+    graphs = []
+    for var, edges in dvg_edges(variable_occurrences(lines)):
+        g = nx.MultiDiGraph()
+        g.add_edges_from(edges)
+        
+        plt = load_pyplot() if p and var == "$tainted" else None
+        if plt is not None:
+            plt.clf()
+            nx.draw(g, with_labels = True)
+            plt.show()
+        graphs.append((var,g))
 
-def to_dvg(file, p = False, line_mapping = None):
+    return graphs
+
+#var -> occurrences (node id, version, depth, branch, label[, is_definition]) in line order
+def variable_occurrences(lines):
     variables = {}
     braco = [0]*3 #ramifications
     camada = 0    #layer
@@ -14,71 +47,37 @@ def to_dvg(file, p = False, line_mapping = None):
     # Track objects that have had a sanitize() method invoked so that getters
     # like $var = $obj->getData() can be treated as sanitized assignments.
     sanitized_objects = set()
-    for i in range(len(file)):
-        line = file[i].rstrip()
-        # Get original line number from mapping if available (for labels only)
-        original_line_num = line_mapping[i] if line_mapping and i < len(line_mapping) else (i + 1)
-
-        # Heuristic 1: detect method call patterns "$obj->sanitize(...)"
-        # and remember the object variable as being sanitized.
-        try:
-            m_san_call = re.search(r'(\$[A-Za-z_\x7f-\xff][\w\x7f-\xff]*)\s*->\s*sanitize\s*\(', line)
-            if m_san_call:
-                sanitized_objects.add(m_san_call.group(1))
-        except Exception:
-            pass
-
-        # Heuristic 2: if we see an assignment from a getter on a previously
-        # sanitized object, e.g., "$tainted = $sanitizer->getData();",
-        # then mark the LHS variable as sanitized for SQLi purposes.
-        # This matches SARD patterns where sanitize() writes $this->data and
-        # getData() returns it.
+    for info in lines:
+        line = info.text
+        original_line_num = info.line_num
+
         synthetic_sanitization_vars = None
-        try:
-            m_get = re.search(
-                r'(\$[A-Za-z_\x7f-\xff][\w\x7f-\xff]*)\s*=\s*(\$[A-Za-z_\x7f-\xff][\w\x7f-\xff]*)\s*->\s*get(?:Data|Value|[A-Za-z0-9_]*)\s*\(',
-                line
-            )
-            if m_get and m_get.group(2) in sanitized_objects:
-                synthetic_sanitization_vars = (m_get.group(1),)
-        except Exception:
-            pass
-        # Heuristic 3: property access after sanitize, e.g., "$tainted = $obj->data;"
-        # If the source object was sanitized earlier, treat LHS as sanitized.
-        try:
-            if not synthetic_sanitization_vars:
-                m_prop = re.search(
-                    r'(\$[A-Za-z_\x7f-\xff][\w\x7f-\xff]*)\s*=\s*(\$[A-Za-z_\x7f-\xff][\w\x7f-\xff]*)\s*->\s*[A-Za-z_\x7f-\xff][\w\x7f-\xff]*\s*;',
-                    line
-                )
-                if m_prop and m_prop.group(2) in sanitized_objects:
-                    synthetic_sanitization_vars = (m_prop.group(1),)
-        except Exception:
-            pass
-        if "}" in line:
-            camada -= line.count("}")
-
-        if "else" in line or "elseif" in line or "if" in line or "case" in line:
+        # All three heuristics need a method call or property access
+        if "->" in line:
+            synthetic_sanitization_vars = object_sanitization(line, sanitized_objects)
+        camada -= info.closes
+
+        if info.branch:
             braco[camada] += 1
-            if not "{" in line:
+            if not info.opens:
                 down = True
         if "$" in line:
             if abs(camada) + 1 >= len(braco) - 1:
                 braco += [0]*abs(camada)
             index = line[line.index('$'):]
-            varss = get_vars(line)
-            label = get_label(line, original_line_num)
+            varss = info.vars
+            label = info.label
             # If this line is recognized as a getter assignment from a sanitized
             # object, inject a synthetic sqli_sanitization label targeting the LHS var.
             if synthetic_sanitization_vars:
-                label = ("sqli_sanitization", synthetic_sanitization_vars, original_line_num, label)
+                label = Label("sqli_sanitization", synthetic_sanitization_vars, original_line_num, label)
             for var in varss:
                 # IMPORTANT: use processed line index (i+1) as the node id to align with CFG/PDG nodes
-                node_id = i + 1
+                node_id = info.node
                 if str(var) not in variables:
                     variables[str(var)] = [(node_id, 0, camada, braco[camada-1], label)]
                 else:
-                    eq = index.find("=")
+                    eq = info.assign
                     versao = variables[str(var)][-1][1]
 
                     if eq != -1 and index[eq-1] not in "><!=" and line[0:eq+1].count(var) == 1 and line.count(var) == 1:
@@ -86,8 +85,7 @@ def to_dvg(file, p = False, line_mapping = None):
                     else:
                         variables[str(var)].append((node_id, versao, camada, braco[camada-1], label, False))
 
-        if "{" in line:
-            camada += line.count("{")
+        camada += info.opens
         if down2:
             camada -= 1
             down2 = False
@@ -96,124 +94,378 @@ def to_dvg(file, p = False, line_mapping = None):
             down = False
             down2 = True
 
-    graphs = []
-
-    
-    for var in variables:
-        repeated = [x[0] for x in variables[var]]
-        g = nx.MultiDiGraph()
-        nodes = variables[var]
-
-        for n in range(len(nodes)-1):
-            for k in range(n+1, len(nodes)):
+    return variables
+
+#(var, [(node, node), ...]) def-use edges of every variable, in to_dvg order
+def dvg_edges(variables):
+    edges = []
+    for var, nodes in variables.items():
+        edges.append((var, [((nodes[n][0], nodes[n][4]), (nodes[k][0], nodes[k][4]))
+                            for n, k in def_use_edges(nodes)]))
+    return edges
+
+def def_use_edges(nodes):
+    """Def-use edges between the occurrences of one variable, as (n, k) index pairs.
+
+    nodes are the occurrences in line order: (node id, version, depth,
+    branch, label[, is_definition]). Occurrence n reaches a later k when:
+      - k is at the same depth, in the same branch and of the same version;
+      - k is at another depth and of the same version, or its line uses the
+        variable more than once;
+      - k is the first later use (not a definition) at a shallower depth,
+        which also ends the scan for n.
+    Occurrences on the same line are never linked, except by the last rule.
+
+    Pairs come out in (n, k) order. Versions only grow along the list, so the
+    candidates of n are looked up in per-version/depth/branch index lists
+    instead of comparing n with every later occurrence.
+    """
+    count = len(nodes)
+    edges = []
+    if count < 2:
+        return edges
+
+    # Occurrences per node id (a line using the variable twice is "repeated")
+    per_id = {}
+    for x in nodes:
+        per_id[x[0]] = per_id.get(x[0], 0) + 1
+
+    if count <= _DIRECT_SCAN_MAX:
+        # Few occurrences (the usual case): comparing pairs is cheaper than indexing
+        for n in range(count - 1):
+            node_id, version, depth, branch = nodes[n][0], nodes[n][1], nodes[n][2], nodes[n][3]
+            for k in range(n + 1, count):
+                other = nodes[k]
+                if depth == other[2]:
+                    if branch == other[3] and version == other[1] and node_id != other[0]:
+                        edges.append((n, k))
+                elif depth > other[2] and not other[5]:
+                    edges.append((n, k))
+                    break
+                elif (version == other[1] or per_id[other[0]] >= 2) and node_id != other[0]:
+                    edges.append((n, k))
+        return edges
+
+    by_version_depth = {}
+    by_version_depth_branch = {}
+    repeated_by_depth = {}
+    line_end = [0] * count
+    version_end = [0] * count
+    for k in range(count):
+        node_id, version, depth, branch = nodes[k][0], nodes[k][1], nodes[k][2], nodes[k][3]
+        by_version_depth.setdefault((version, depth), []).append(k)
+        by_version_depth_branch.setdefault((version, depth, branch), []).append(k)
+        if per_id[node_id] >= 2:
+            repeated_by_depth.setdefault(depth, []).append(k)
+    for k in range(count - 1, -1, -1):
+        last = k == count - 1
+        line_end[k] = k if last or nodes[k + 1][0] != nodes[k][0] else line_end[k + 1]
+        version_end[k] = k if last or nodes[k + 1][1] != nodes[k][1] else version_end[k + 1]
+    depths = sorted({x[2] for x in nodes})
+
+    # First later non-definition at a smaller depth, per occurrence
+    stop = [None] * count
+    waiting = {}
+    for k in range(count):
+        depth = nodes[k][2]
+        if k > 0 and not nodes[k][5]:
+            for d in [d for d in waiting if d > depth]:
+                for n in waiting.pop(d):
+                    stop[n] = k
+        waiting.setdefault(depth, []).append(k)
+
+    for n in range(count - 1):
+        version, depth, branch = nodes[n][1], nodes[n][2], nodes[n][3]
+        lo = line_end[n] + 1
+        hi = stop[n] if stop[n] is not None else count
+        if lo < hi:
+            runs = [_index_range(by_version_depth_branch[(version, depth, branch)], lo, hi)]
+            for d in depths:
+                if d == depth:
+                    continue
+                runs.append(_index_range(by_version_depth.get((version, d), ()), lo, hi))
+                runs.append(_index_range(repeated_by_depth.get(d, ()), max(lo, version_end[n] + 1), hi))
+            runs = [r for r in runs if r]
+            if len(runs) == 1:
+                edges.extend((n, k) for k in runs[0])
+            elif runs:
+                edges.extend((n, k) for k in heapq.merge(*runs))
+        if stop[n] is not None:
+            edges.append((n, stop[n]))
+    return edges
+
+
+# Above this many occurrences of a variable the indexed builder is used
+_DIRECT_SCAN_MAX = 48
+
+
+def _index_range(indices, lo, hi):
+    # Entries of the sorted list indices with lo <= index < hi
+    if not indices:
+        return ()
+    return indices[bisect.bisect_left(indices, lo):bisect.bisect_left(indices, hi)]
+
+
+def object_sanitization(line, sanitized_objects):
+    """Object-sanitizer heuristics for one line.
+
+    Records objects on which ->sanitize(...) is called in sanitized_objects
+    and returns (lhs,) when the line assigns a getter result or property of
+    such an object, else None. This matches SARD patterns where sanitize()
+    writes $this->data and getData() returns it.
+    """
+    # Heuristic 1: detect method call patterns "$obj->sanitize(...)"
+    # and remember the object variable as being sanitized.
+    m_san_call = _SANITIZE_CALL.search(line)
+    if m_san_call:
+        sanitized_objects.add(m_san_call.group(1))
+
+    # Heuristics 2 and 3 only apply to assignments from a sanitized object
+    if not sanitized_objects or "=" not in line:
+        return None
+
+    # Heuristic 2: "$tainted = $sanitizer->getData();"
+    m_get = _GETTER_ASSIGN.search(line)
+    if m_get and m_get.group(2) in sanitized_objects:
+        return (m_get.group(1),)
+    # Heuristic 3: property access after sanitize, e.g., "$tainted = $obj->data;"
+    m_prop = _PROPERTY_ASSIGN.search(line)
+    if m_prop and m_prop.group(2) in sanitized_objects:
+        return (m_prop.group(1),)
+    return None
 
 
-                if (not(nodes[n][2] == nodes[k][2] and nodes[n][3] != nodes[k][3]) and
-                    not (nodes[n][2] == nodes[k][2] and nodes[n][1] != nodes[k][1])):
+ENTRY_POINT = ["$_GET", "$_POST", "$_COOKIE", "$_REQUEST",
+    "$_HTTP_GET_VARS", "$_HTTP_POST_VARS",
+    "$_HTTP_COOKIE_VARS", "$_HTTP_REQUEST_VARS",
+    "$_FILES", "$_SERVER", "$_SESSION", "$_ENV", "$argv", "$argc",
+    "$_HTTP_RAW_POST_DATA", "$HTTP_ENV_VARS", "$GLOBALS"]
+
+SQLI_SANITIZATION = [
+    "mysql_escape_string", "mysql_real_escape_string",
+    "mysqli_escape_string", "mysqli_real_escape_string",
+    "mysqli_stmt_bind_param", "mysqli::escape_string",
+    "mysqli::real_escape_string", "mysqli_stmt::bind_param",
+    # Common sanitizing numeric/string casts/filters
+    "floatval", "intval", "preg_replace",
+    # Object-method variants commonly used in SARD samples and real code
+    # e.g., $db->real_escape_string($var), $db->escape_string($var)
+    "->real_escape_string", "->escape_string",
+    # Many SARD samples use a custom object method called sanitize(...)
+    # that internally applies mysql_real_escape_string. Treat it as sanitizer.
+    "->sanitize(",
+    # Fallbacks for bare function tokens
+    "real_escape_string", "escape_string"
+]
+
+XSS_SANITIZATION = ["htmlentities", "htmlspecialchars", "strip_tags", "urlencode"]
+
+SQLI_SINK = ["mysql_query", "mysql_unbuffered_query", "mysql_db_query",
+    "mysqli_query", "mysqli_real_query", "mysqli_master_query",
+    "mysqli_multi_query", "mysqli_stmt_execute", "mysqli_execute",
+    "mysqli::query", "mysqli::multi_query", "mysqli::real_query",
+    "mysqli_stmt::execute"]
+
+XSS_SINK = ["echo", "print", "printf", "sprintf", "vprintf", "die", "exit",
+    "file_put_contents", "file_get_contents", "vfprintf", "fprintf", "fscanf"]
+
+# Treat outputs from OS/process-exec functions as tainted sources when assigned to a variable
+# This covers SARD "system" style samples that read from /tmp or commands and then use in SQL.
+SOURCE_FUNCS = ["system(", "shell_exec(", "exec(", "passthru(", "popen(", "proc_open("]
+
+# Treat outputs from file/stream read functions as tainted sources when assigned to a variable
+# Covers fopen+fgets/fread/fscanf combos and direct file_get_contents/file/stream_get_contents
+FILE_SOURCE_FUNCS = [
+    "fgets(", "fread(", "fscanf(", "stream_get_contents(", "file_get_contents(", "file("
+]
+
+CASTS = ["(int)", "(float)"]
+
+
+def _trie_regex(tokens):
+    """Regex alternation of tokens factored on shared prefixes (longest first)."""
+    trie = {}
+    for tok in tokens:
+        node = trie
+        for ch in tok:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node):
+        ends = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if ends:
+            # Greedy optional keeps the longest token at each position
+            return "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+_TOKENS = sorted(set(ENTRY_POINT + SQLI_SANITIZATION + XSS_SANITIZATION + SQLI_SINK
+                     + XSS_SINK + SOURCE_FUNCS + FILE_SOURCE_FUNCS + CASTS))
+# Lookahead so overlapping tokens are all seen in one scan of the line
+_TOKEN_RE = re.compile("(?=(" + _trie_regex(_TOKENS) + "))")
+# Tokens occurring inside each token (itself included): a match of the longest
+# token at a position implies all of them, e.g. "printf" implies "print"
+_IMPLIED = {t: frozenset(x for x in _TOKENS if x in t) for t in _TOKENS}
+
+
+def match_tokens(line):
+    """Set of knowledge-list tokens occurring anywhere in line."""
+    found = set()
+    for m in _TOKEN_RE.finditer(line):
+        found |= _IMPLIED[m.group(1)]
+    return found
+
+
+def _first(tokens, found):
+    # Lists are checked in their declared order, as a scan of each list would
+    for t in tokens:
+        if t in found:
+            return t
+    return None
 
-                    if nodes[n][2] > nodes[k][2] and not nodes[k][5]:
 
-                        g.add_edge((nodes[n][0], nodes[n][4]), (nodes[k][0], nodes[k][4]))
-                        break
-                        
-                    if ((not nodes[n][1] != nodes[k][1] or repeated.count(nodes[k][0]) >= 2) and
-                        not nodes[n][0] == nodes[k][0]):
-                            g.add_edge((nodes[n][0], nodes[n][4]), (nodes[k][0], nodes[k][4]))
-        
-        if p and var == "$tainted" and plt is not None:
-            plt.clf()
-            nx.draw(g, with_labels = True)
-            plt.show()
-        graphs.append((var,g))
+# Label kinds as bits; Label.mask is the union over a label and the labels it wraps
+ENTRY = 1
+SQLI_SINK_KIND = 2
+XSS_SINK_KIND = 4
+SQLI_SANITIZER = 8
+XSS_SANITIZER = 16
+CAST_SANITIZER = 32
+SINK = SQLI_SINK_KIND | XSS_SINK_KIND
+SANITIZER = SQLI_SANITIZER | XSS_SANITIZER | CAST_SANITIZER
+KINDS = {
+    "entry_point": ENTRY,
+    "sqli_sink": SQLI_SINK_KIND,
+    "xss_sink": XSS_SINK_KIND,
+    "sqli_sanitization": SQLI_SANITIZER,
+    "xss_sanitization": XSS_SANITIZER,
+    "cast_sanitization": CAST_SANITIZER,
+}
+
+_interned = {}
+
+
+def intern_vars(names):
+    """One shared tuple (of interned names) per distinct variable list."""
+    names = tuple(names)
+    shared = _interned.get(names)
+    if shared is None:
+        shared = _interned[names] = tuple(sys.intern(n) for n in names)
+    return shared
+
+
+class Label:
+    """Label of a line: (kind, vars, line, meta).
+
+    meta is the label of an earlier match on the same line (or "", or the
+    source function name for entry points), so a line matching several
+    lists keeps all of them. Labels behave like those 4-tuples (indexing,
+    len, equality and hash), but the hash and the kind mask of the whole
+    chain are computed once.
+    """
+
+    __slots__ = ("kind", "vars", "line", "meta", "bit", "mask", "_hash")
+
+    def __init__(self, kind, vars, line, meta):
+        self.kind = kind
+        if isinstance(vars, (list, tuple)):
+            vars = intern_vars(vars)
+        elif isinstance(vars, str):
+            vars = sys.intern(vars)
+        self.vars = vars
+        self.line = line
+        self.meta = meta
+        # kind bit of this label, and of the whole chain
+        self.bit = KINDS.get(kind, 0)
+        if isinstance(meta, Label):
+            self.mask = self.bit | meta.mask
+        else:
+            self.mask = self.bit | (SANITIZER if "sanitization" in meta else 0)
+        self._hash = hash((kind, vars, line, meta))
+
+    def astuple(self):
+        return (self.kind, self.vars, self.line, self.meta)
+
+    def __getitem__(self, i):
+        return self.astuple()[i]
+
+    def __len__(self):
+        return 4
+
+    def __iter__(self):
+        return iter(self.astuple())
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, Label):
+            return self._hash == other._hash and self.astuple() == other.astuple()
+        if isinstance(other, tuple):
+            return self.astuple() == other
+        return NotImplemented
+
+    def __ne__(self, other):
+        eq = self.__eq__(other)
+        return eq if eq is NotImplemented else not eq
+
+    def __repr__(self):
+        return repr(self.astuple())
 
-    return graphs
 
 def get_label(line, line_num):
     
     label = ""
 
-    entry_point = ["$_GET", "$_POST", "$_COOKIE", "$_REQUEST",
-        "$_HTTP_GET_VARS", "$_HTTP_POST_VARS",
-        "$_HTTP_COOKIE_VARS", "$_HTTP_REQUEST_VARS",
-        "$_FILES", "$_SERVER", "$_SESSION", "$_ENV", "$argv", "$argc",
-        "$_HTTP_RAW_POST_DATA", "$HTTP_ENV_VARS", "$GLOBALS"]
-    
-    sqli_sanitization = [
-        "mysql_escape_string", "mysql_real_escape_string",
-        "mysqli_escape_string", "mysqli_real_escape_string",
-        "mysqli_stmt_bind_param", "mysqli::escape_string",
-        "mysqli::real_escape_string", "mysqli_stmt::bind_param",
-        # Common sanitizing numeric/string casts/filters
-        "floatval", "intval", "preg_replace",
-        # Object-method variants commonly used in SARD samples and real code
-        # e.g., $db->real_escape_string($var), $db->escape_string($var)
-        "->real_escape_string", "->escape_string",
-        # Many SARD samples use a custom object method called sanitize(...)
-        # that internally applies mysql_real_escape_string. Treat it as sanitizer.
-        "->sanitize(",
-        # Fallbacks for bare function tokens
-        "real_escape_string", "escape_string"
-    ]
-
-    xss_sanitization = ["htmlentities", "htmlspecialchars", "strip_tags", "urlencode"]
-
-    sqli_sink = ["mysql_query", "mysql_unbuffered_query", "mysql_db_query",
-        "mysqli_query", "mysqli_real_query", "mysqli_master_query",
-        "mysqli_multi_query", "mysqli_stmt_execute", "mysqli_execute",
-        "mysqli::query", "mysqli::multi_query", "mysqli::real_query",
-        "mysqli_stmt::execute"]
-
-    xss_sink = ["echo", "print", "printf", "sprintf", "vprintf", "die", "exit",
-        "file_put_contents", "file_get_contents", "vfprintf", "fprintf", "fscanf"]
-
-    func = [x for x in sqli_sanitization if x in line]
+    found = match_tokens(line)
+    if not found:
+        return label
+
+    func = _first(SQLI_SANITIZATION, found)
     if func:
-        label = ("sqli_sanitization", tuple(get_vars_func(line, func[0])), line_num, label)
-        if func[0] == "(int)" or func[0] == "(float)":
-            label = ("sqli_sanitization", tuple(get_var_casted(line, func[0][1:-1])), line_num, label)
+        label = Label("sqli_sanitization", tuple(get_vars_func(line, func)), line_num, label)
 
-    func = [x for x in xss_sanitization if x in line]
+    func = _first(XSS_SANITIZATION, found)
     if func:
-        label = ("xss_sanitization", tuple(get_vars_func(line, func[0])), line_num, label) 
+        label = Label("xss_sanitization", tuple(get_vars_func(line, func)), line_num, label) 
 
-    func = [x for x in sqli_sink if x in line]
+    func = _first(SQLI_SINK, found)
     if func:
-        label = ("sqli_sink", tuple(get_vars_func(line, func[0])), line_num, label)
+        label = Label("sqli_sink", tuple(get_vars_func(line, func)), line_num, label)
 
-    func = [x for x in xss_sink if x in line]
+    func = _first(XSS_SINK, found)
     if func:
-        label = ("xss_sink", tuple(get_vars_func(line, func[0])), line_num, label)
+        label = Label("xss_sink", tuple(get_vars_func(line, func)), line_num, label)
 
-    # Treat outputs from OS/process-exec functions as tainted sources when assigned to a variable
-    # This covers SARD "system" style samples that read from /tmp or commands and then use in SQL.
-    source_funcs = ["system(", "shell_exec(", "exec(", "passthru(", "popen(", "proc_open("]
-    func = [x for x in source_funcs if x in line]
+    func = _first(SOURCE_FUNCS, found)
     if func:
         assigned = get_assigned_var(line)
         if assigned:
             # Mark as entry_point with meta indicating the source function (e.g., "system")
-            label = ("entry_point", assigned, line_num, func[0].rstrip("("))
-
-    # Treat outputs from file/stream read functions as tainted sources when assigned to a variable
-    # Covers fopen+fgets/fread/fscanf combos and direct file_get_contents/file/stream_get_contents
-    file_source_funcs = [
-        "fgets(", "fread(", "fscanf(", "stream_get_contents(", "file_get_contents(", "file("
-    ]
-    func = [x for x in file_source_funcs if x in line]
+            label = Label("entry_point", assigned, line_num, func.rstrip("("))
+
+    func = _first(FILE_SOURCE_FUNCS, found)
     if func:
         assigned = get_assigned_var(line)
         if assigned:
-            label = ("entry_point", assigned, line_num, func[0].rstrip("("))
+            label = Label("entry_point", assigned, line_num, func.rstrip("("))
 
-    func = [x for x in entry_point if x in line]
-    if func:
-        label = ("entry_point", get_entry(line), line_num, label)
+    if _first(ENTRY_POINT, found):
+        label = Label("entry_point", get_entry(line), line_num, label)
 
-    if "(int)" in line:
-        label = ("cast_sanitization", tuple(get_var_casted(line, "int")), line_num, label)
+    if "(int)" in found:
+        label = Label("cast_sanitization", tuple(get_var_casted(line, "int")), line_num, label)
 
-    if "(float)" in line:
-        label = ("cast_sanitization", tuple(get_var_casted(line, "float")), line_num, label)
+    if "(float)" in found:
+        label = Label("cast_sanitization", tuple(get_var_casted(line, "float")), line_num, label)
 
     return label
 
@@ -223,7 +475,7 @@ def get_entry(line):
     newline = line
     var = newline[newline.index('$'):]
     
-    match = re.search(r'\W', var[1:])
+    match = _NON_WORD.search(var[1:])
 
     if match:
         end = match.start()
@@ -234,8 +486,7 @@ def get_entry(line):
 
 def get_vars(line):
 
-    pattern = r'\$(?!_)\w+'  
-    return re.findall(pattern, line)
+    return _VARS.findall(line)
 
 
 def get_vars_func(line, func):
@@ -253,7 +504,7 @@ def get_assigned_var(line: str):
         sides = line.split("=", 1)
         if len(sides) > 1:
             lhs = sides[0]
-            m = re.search(r"\$[a-zA-Z_\x7f-\xff][a-zA-Z0-9_\x7f-\xff]*", lhs)
+            m = _ASSIGNED_VAR.search(lhs)
             if m:
                 return m.group(0)
     except Exception:
@@ -261,11 +512,14 @@ def get_assigned_var(line: str):
     return None
 
 def get_var_casted(php_code, casting_type):
-    # Define a regular expression pattern to match casting operations
-    pattern = r'\(\s*' + casting_type + r'\s*\)\s*\$([a-zA-Z_\x7f-\xff][a-zA-Z0-9_\x7f-\xff]*)\s*;'
+    # Regular expression matching the casting operation, compiled once per type
+    pattern = _CASTS.get(casting_type)
+    if pattern is None:
+        pattern = re.compile(r'\(\s*' + casting_type + r'\s*\)\s*\$([a-zA-Z_\x7f-\xff][a-zA-Z0-9_\x7f-\xff]*)\s*;')
+        _CASTS[casting_type] = pattern
 
     # Search for the pattern in the PHP code
-    match = re.search(pattern, php_code)
+    match = pattern.search(php_code)
 
     # If a match is found, return the variable name
     if match:
@@ -1,9 +1,17 @@
 import re
-try:
-    import matplotlib.pyplot as plt
-except Exception:
-    plt = None
 import networkx as nx
+from graph_export import load_pyplot
+
+FUNCTION_DEFINITION = re.compile(r'function\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*\(')
+FUNCTION_CALL = re.compile(r'(?<!function\s)([a-zA-Z_\x7f-\xff][a-zA-Z0-9_\x7f-\xff]*)\s*\(')
+
+# Names of the functions defined in a piece of PHP code, in order of appearance
+def defined_functions(php_code):
+    return FUNCTION_DEFINITION.findall(php_code)
+
+# Names of everything called in a piece of PHP code (builtins included)
+def called_functions(php_code):
+    return FUNCTION_CALL.findall(php_code)
 
 def to_fcg(file_path, p = False):
     # Create an empty directed graph
@@ -15,10 +23,9 @@ def to_fcg(file_path, p = False):
         php_code = file.read()
 
     # Extract user-defined function names using regular expressions
-    function_definitions = re.findall(r'function\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*\(', php_code)
+    function_definitions = defined_functions(php_code)
 
-    main_calls = re.findall(r'(?<!function\s)([a-zA-Z_\x7f-\xff][a-zA-Z0-9_\x7f-\xff]*)\s*\(', php_code)
-    main_calls = [x for x in main_calls if x in function_definitions]
+    main_calls = [x for x in called_functions(php_code) if x in function_definitions]
 
     # Helper function to find function calls within a given function definition
     def find_function_calls(function_definition):
@@ -46,6 +53,7 @@ def to_fcg(file_path, p = False):
     #if p then prints the graph
     if p:
         print(graph)
+        plt = load_pyplot()
         if plt is not None:
             nx.draw(graph, with_labels = True)
             plt.show()
@@ -0,0 +1,163 @@
+# findings_output.py
+#
+# Structured findings output. Every confirmed finding is published as one
+# record (the CSV row plus type, code and call-path fields) to:
+#   - a JSON Lines stream (MLKG_JSONL / --jsonl), one object per line,
+#     flushed as each file's findings are confirmed;
+#   - a SARIF 2.1.0 log (MLKG_SARIF / --sarif), written when the run ends.
+
+import os
+import json
+import atexit
+import threading
+from pathlib import Path
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+
+RULES = {
+    "xss": {
+        "id": "xss",
+        "name": "CrossSiteScripting",
+        "shortDescription": {"text": "Unsanitized user input reaches an output sink (XSS)"},
+        "properties": {"tags": ["security", "external/cwe/cwe-79"]},
+    },
+    "sqli": {
+        "id": "sqli",
+        "name": "SqlInjection",
+        "shortDescription": {"text": "Unsanitized user input reaches a database query (SQL injection)"},
+        "properties": {"tags": ["security", "external/cwe/cwe-89"]},
+    },
+}
+
+
+def _line(value):
+    return value if isinstance(value, int) else None
+
+
+def to_record(row):
+    """JSON record of a finding row (CSV fields plus the extra detail fields)."""
+    record = dict(row)
+    record["entry_line"] = _line(row.get("entry_line"))
+    record["sink_line"] = _line(row.get("sink_line"))
+    return record
+
+
+class JsonLinesWriter:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._f = open(path, "w", encoding="utf-8")
+
+    def write(self, record):
+        self._f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def flush(self):
+        self._f.flush()
+
+    def close(self):
+        self._f.close()
+
+
+def _uri(file_path):
+    rel = os.path.relpath(file_path)
+    if rel.startswith(".."):
+        return Path(os.path.abspath(file_path)).as_uri()
+    return rel.replace(os.sep, "/")
+
+
+def _location(file_path, line, code):
+    region = {"startLine": line}
+    if code:
+        region["snippet"] = {"text": code}
+    return {"physicalLocation": {"artifactLocation": {"uri": _uri(file_path)}, "region": region}}
+
+
+def to_sarif_result(record):
+    rule = record.get("vuln_type") or "sqli"
+    sink_line = record.get("sink_line")
+    entry_line = record.get("entry_line")
+    message = (f"{record.get('entry') or 'User input'} (line {entry_line}) reaches "
+               f"{record.get('sink') or rule} (line {sink_line})")
+    result = {
+        "ruleId": rule,
+        "ruleIndex": list(RULES).index(rule) if rule in RULES else 0,
+        "level": "warning" if record.get("sanitized") == "Yes" else "error",
+        "message": {"text": message},
+        "locations": [_location(record["file"], sink_line or 1, record.get("sink_code"))],
+        "partialFingerprints": {
+            "entrySink/v1": f"{record.get('entry_line')}:{record.get('sink_line')}:{record.get('sink')}",
+        },
+    }
+    if entry_line:
+        result["relatedLocations"] = [dict(_location(record["file"], entry_line, record.get("entry_code")),
+                                           id=0, message={"text": "Entry point"})]
+    if record.get("detection_note"):
+        result["properties"] = {"detectionNote": record["detection_note"],
+                                "gptVerdict": record.get("gpt_verdict", "")}
+    return result
+
+
+class SarifWriter:
+    def __init__(self, path):
+        self.path = path
+        self.results = []
+
+    def write(self, record):
+        self.results.append(to_sarif_result(record))
+
+    def flush(self):
+        pass
+
+    def close(self):
+        log = {
+            "$schema": SARIF_SCHEMA,
+            "version": "2.1.0",
+            "runs": [{
+                "tool": {"driver": {"name": "KAVe", "rules": list(RULES.values())}},
+                "results": self.results,
+            }],
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(log, f, indent=1, ensure_ascii=False)
+            f.write("\n")
+
+
+_writers = None
+_lock = threading.Lock()
+
+
+def _get_writers():
+    global _writers
+    if _writers is None:
+        _writers = []
+        if os.getenv("MLKG_JSONL"):
+            _writers.append(JsonLinesWriter(os.getenv("MLKG_JSONL")))
+        if os.getenv("MLKG_SARIF"):
+            _writers.append(SarifWriter(os.getenv("MLKG_SARIF")))
+        if _writers:
+            atexit.register(close)
+    return _writers
+
+
+def publish(rows):
+    """Publish one file's confirmed findings to the configured outputs."""
+    with _lock:
+        writers = _get_writers()
+        if not writers:
+            return
+        for row in rows:
+            record = to_record(row)
+            for w in writers:
+                w.write(record)
+        for w in writers:
+            w.flush()
+
+
+def close():
+    """Finish all outputs (writes the SARIF log)."""
+    global _writers
+    with _lock:
+        writers, _writers = _writers or [], []
+    for w in writers:
+        w.close()
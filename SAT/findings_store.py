@@ -0,0 +1,175 @@
+# findings_store.py
+#
+# SQLite-backed store of findings used when CSV deduplication is enabled
+# (MLKG_CSV_DEDUP=1). Rows are upserted in batched transactions against
+# unique keys, and AI_results/vulnerabilities.csv / file_summary.csv are
+# exported from the store once per run instead of being re-read and rewritten
+# after every file.
+#
+# Export without running an analysis:
+#   python SAT/findings_store.py [--db AI_results/findings.db] [--out AI_results]
+
+import os
+import csv
+import atexit
+import sqlite3
+import argparse
+import threading
+
+VULNERABILITY_FIELDS = [
+    "file", "entry", "entry_line", "sink", "sink_line", "sanitized", "detection_note", "gpt_verdict"
+]
+SUMMARY_FIELDS = ["file", "xss", "sqli"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vulnerabilities (
+    file TEXT NOT NULL,
+    entry TEXT,
+    entry_line TEXT NOT NULL,
+    sink TEXT NOT NULL,
+    sink_line TEXT NOT NULL,
+    sanitized TEXT,
+    detection_note TEXT,
+    gpt_verdict TEXT,
+    UNIQUE (file, entry_line, sink_line, sink)
+);
+CREATE TABLE IF NOT EXISTS file_summary (
+    file TEXT PRIMARY KEY,
+    xss INTEGER NOT NULL,
+    sqli INTEGER NOT NULL
+);
+"""
+
+
+def _text(value):
+    # Keys are compared as CSV text, as the previous read-rewrite dedup did
+    return "" if value is None else str(value)
+
+
+class FindingsStore:
+    def __init__(self, db_path, batch_size=200):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self._pending = []
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        fresh = not os.path.exists(db_path)
+        # WAL + busy timeout let several processes write to the same store
+        self.conn = sqlite3.connect(db_path, timeout=60, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        if fresh:
+            self._import_csv(os.path.dirname(os.path.abspath(db_path)))
+
+    def _import_csv(self, out_dir):
+        """Seed a new store from CSVs written before the store existed."""
+        vul_csv = os.path.join(out_dir, "vulnerabilities.csv")
+        summary_csv = os.path.join(out_dir, "file_summary.csv")
+        try:
+            rows, summaries = [], []
+            if os.path.exists(vul_csv):
+                with open(vul_csv, mode="r", newline="", encoding="utf-8") as rf:
+                    rows = [{k: r.get(k, "") for k in VULNERABILITY_FIELDS} for r in csv.DictReader(rf)]
+            if os.path.exists(summary_csv):
+                with open(summary_csv, mode="r", newline="", encoding="utf-8") as rf:
+                    summaries = [{"file": r.get("file", ""),
+                                  "xss": int(r.get("xss", 0) or 0),
+                                  "sqli": int(r.get("sqli", 0) or 0)} for r in csv.DictReader(rf)]
+            with self.conn:
+                self._insert_rows(rows)
+                for s in summaries:
+                    self._upsert_summary(s)
+        except Exception:
+            # A malformed legacy CSV should not block the run
+            pass
+
+    def _insert_rows(self, rows):
+        # First occurrence of a key wins, as with the CSV dedup
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO vulnerabilities VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [tuple(_text(r.get(k)) for k in VULNERABILITY_FIELDS) for r in rows])
+
+    def _upsert_summary(self, summary):
+        # Delete + insert moves the file to the end, like replacing its CSV row
+        self.conn.execute("DELETE FROM file_summary WHERE file = ?", (summary["file"],))
+        self.conn.execute("INSERT INTO file_summary VALUES (?, ?, ?)",
+                          (summary["file"], int(summary["xss"]), int(summary["sqli"])))
+
+    def add(self, csv_rows, summary):
+        """Queue one file's findings and summary row; written in batches."""
+        with self._lock:
+            self._pending.append((list(csv_rows), dict(summary)))
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        with self.conn:
+            for rows, summary in self._pending:
+                self._insert_rows(rows)
+                self._upsert_summary(summary)
+        self._pending = []
+
+    def export_csv(self, out_dir):
+        """Rewrite vulnerabilities.csv and file_summary.csv from the store."""
+        self.flush()
+        os.makedirs(out_dir, exist_ok=True)
+        with open(os.path.join(out_dir, "vulnerabilities.csv"), mode="w", newline="", encoding="utf-8") as wf:
+            writer = csv.writer(wf)
+            writer.writerow(VULNERABILITY_FIELDS)
+            writer.writerows(self.conn.execute(
+                f"SELECT {', '.join(VULNERABILITY_FIELDS)} FROM vulnerabilities ORDER BY rowid"))
+        with open(os.path.join(out_dir, "file_summary.csv"), mode="w", newline="", encoding="utf-8") as wf:
+            writer = csv.writer(wf)
+            writer.writerow(SUMMARY_FIELDS)
+            writer.writerows(self.conn.execute("SELECT file, xss, sqli FROM file_summary ORDER BY rowid"))
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store(out_dir):
+    """Process-wide store for out_dir; CSVs are exported from it at exit."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = FindingsStore(os.path.join(out_dir, "findings.db"))
+            atexit.register(finish, out_dir)
+        return _store
+
+
+def finish(out_dir):
+    """Flush pending rows and export the CSVs, if the store was used."""
+    global _store
+    with _store_lock:
+        store, _store = _store, None
+    if store is None:
+        return
+    try:
+        store.export_csv(out_dir)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the findings store as CSV")
+    parser.add_argument("--db", default=os.path.join(os.getcwd(), "AI_results", "findings.db"))
+    parser.add_argument("--out", default=None, help="Output folder (default: the store's folder)")
+    args = parser.parse_args()
+    if not os.path.exists(args.db):
+        print("Findings store not found:", args.db)
+    else:
+        s = FindingsStore(args.db)
+        s.export_csv(args.out or os.path.dirname(os.path.abspath(args.db)))
+        s.close()
@@ -0,0 +1,154 @@
+# git_diff.py
+#
+# Incremental scan support: work out which PHP files need analysing when only
+# the changes between two git revisions matter. Uses plain local git only.
+
+import os
+import re
+import subprocess
+import fcg
+
+_HUNK = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+
+
+def git(root, *args):
+    """Run a git command in root and return its stdout; raises RuntimeError on failure."""
+    try:
+        result = subprocess.run(["git", "-C", root] + list(args),
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                text=True, encoding="utf-8", errors="ignore")
+    except OSError as e:
+        raise RuntimeError(f"git is not available: {e}")
+    if result.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)} failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+def repo_root(path):
+    start = path if os.path.isdir(path) else os.path.dirname(os.path.abspath(path))
+    return os.path.abspath(git(start, "rev-parse", "--show-toplevel").strip())
+
+
+def is_checked_out(root, rev):
+    """True when rev resolves to the commit currently checked out in root."""
+    return git(root, "rev-parse", rev + "^{commit}").strip() == git(root, "rev-parse", "HEAD").strip()
+
+
+def _diff_args(base, head):
+    # Without a second revision compare against the working tree
+    return [base, head] if head else [base]
+
+
+def changed_hunks(root, base, head=None):
+    """Map each changed .php file (repo-relative) to its (old_ranges, new_ranges).
+
+    Ranges are inclusive (start, end) line pairs taken from a zero-context diff.
+    """
+    out = git(root, "diff", "-U0", "--no-color", "--no-ext-diff", "--no-renames",
+              *_diff_args(base, head), "--", "*.php")
+    hunks = {}
+    old_file = new_file = None
+    for line in out.splitlines():
+        if line.startswith("--- "):
+            old_file = line[6:] if line.startswith("--- a/") else None
+        elif line.startswith("+++ "):
+            new_file = line[6:] if line.startswith("+++ b/") else None
+            hunks.setdefault(new_file or old_file, ([], []))
+        else:
+            m = _HUNK.match(line)
+            if m:
+                old_start, old_len = int(m.group(1)), int(m.group(2) or 1)
+                new_start, new_len = int(m.group(3)), int(m.group(4) or 1)
+                old_ranges, new_ranges = hunks[new_file or old_file]
+                # A zero-length side still marks the position of an insertion/deletion
+                old_ranges.append((old_start, old_start + max(old_len, 1) - 1))
+                new_ranges.append((new_start, new_start + max(new_len, 1) - 1))
+    return hunks
+
+
+def function_spans(php_code):
+    """Return [(name, first_line, last_line)] for every function defined in php_code."""
+    spans = []
+    for m in fcg.FUNCTION_DEFINITION.finditer(php_code):
+        first = php_code.count("\n", 0, m.start()) + 1
+        open_pos = php_code.find("{", m.end())
+        if open_pos == -1:
+            spans.append((m.group(1), first, first))
+            continue
+        depth = 0
+        end_pos = len(php_code) - 1
+        for i in range(open_pos, len(php_code)):
+            c = php_code[i]
+            if c == "{":
+                depth += 1
+            elif c == "}":
+                depth -= 1
+                if depth == 0:
+                    end_pos = i
+                    break
+        spans.append((m.group(1), first, php_code.count("\n", 0, end_pos) + 1))
+    return spans
+
+
+def _overlaps(span, ranges):
+    return any(span[1] <= end and start <= span[2] for start, end in ranges)
+
+
+def _read_revision(root, rev, rel_path):
+    """Content of rel_path at rev (None for the working tree), or "" if absent."""
+    if rev is None:
+        try:
+            with open(os.path.join(root, rel_path), "r", encoding="utf8", errors="ignore") as f:
+                return f.read()
+        except OSError:
+            return ""
+    try:
+        return git(root, "show", f"{rev}:{rel_path}")
+    except RuntimeError:
+        return ""
+
+
+def touched_functions(root, hunks, base, head=None):
+    """Names of functions whose definition overlaps a change on either side of the diff."""
+    touched = set()
+    for rel_path, (old_ranges, new_ranges) in hunks.items():
+        for span in function_spans(_read_revision(root, base, rel_path)):
+            if _overlaps(span, old_ranges):
+                touched.add(span[0])
+        for span in function_spans(_read_revision(root, head, rel_path)):
+            if _overlaps(span, new_ranges):
+                touched.add(span[0])
+    return touched
+
+
+def plan(files, base, head=None):
+    """Split the files of a scan into those to re-analyse and those to carry forward.
+
+    A file is re-analysed when it changed between the revisions, or when it
+    defines or calls a function touched by the change. Returns
+    (changed, dependents) as sets of paths taken from files.
+    """
+    if not files:
+        return set(), set()
+    root = repo_root(files[0])
+    hunks = changed_hunks(root, base, head)
+    changed_abs = {os.path.normcase(os.path.realpath(os.path.join(root, p))) for p in hunks}
+    touched = touched_functions(root, hunks, base, head)
+
+    changed = set()
+    dependents = set()
+    for file in files:
+        if os.path.normcase(os.path.realpath(file)) in changed_abs:
+            changed.add(file)
+            continue
+        if not touched:
+            continue
+        try:
+            with open(file, "r", encoding="utf8", errors="ignore") as f:
+                php_code = f.read()
+        except OSError:
+            continue
+        names = set(fcg.defined_functions(php_code)) | set(fcg.called_functions(php_code))
+        if names & touched:
+            dependents.add(file)
+    return changed, dependents
@@ -0,0 +1,100 @@
+# graph_export.py
+#
+# Opt-in export of the graphs built for a file (CFG, per-variable DVGs, PDG
+# and FCG) as DOT or JSON. Nothing here runs unless --export-graphs is given,
+# and no drawing library is needed: DOT is written as plain text.
+
+import os
+import re
+import json
+
+FORMATS = ("dot", "json")
+
+
+def load_pyplot():
+    """Import matplotlib.pyplot on demand; None when it is not installed."""
+    try:
+        import matplotlib.pyplot as plt
+        return plt
+    except Exception:
+        return None
+
+
+def _node_fields(node):
+    # Graph nodes are (line, label) tuples, or the "return"/function-name strings
+    if isinstance(node, tuple) and node:
+        return node[0], node[1] if len(node) > 1 else ""
+    return None, ""
+
+
+def _ids(graph):
+    return {n: i for i, n in enumerate(graph.nodes)}
+
+
+def to_dot(graph, name):
+    ids = _ids(graph)
+    out = [f"digraph {json.dumps(name)} {{"]
+    for node, i in ids.items():
+        line, label = _node_fields(node)
+        text = str(node) if line is None else f"{line}: {label}" if label else str(line)
+        out.append(f"  n{i} [label={json.dumps(text)}];")
+    for u, v, data in graph.edges(data=True):
+        attrs = []
+        color = data.get("color")
+        if color:
+            attrs.append("color=" + {"b": "blue", "r": "red", "g": "green"}.get(color, color))
+        if data.get("label"):
+            attrs.append("label=" + json.dumps(str(data["label"])))
+        suffix = f" [{', '.join(attrs)}]" if attrs else ""
+        out.append(f"  n{ids[u]} -> n{ids[v]}{suffix};")
+    out.append("}")
+    return "\n".join(out) + "\n"
+
+
+def to_json(graph, name):
+    ids = _ids(graph)
+    nodes = []
+    for node, i in ids.items():
+        line, label = _node_fields(node)
+        nodes.append({"id": i, "name": str(node) if line is None else None,
+                      "line": line, "label": repr(label) if label else ""})
+    edges = [{"source": ids[u], "target": ids[v],
+              "color": data.get("color"), "label": data.get("label")}
+             for u, v, data in graph.edges(data=True)]
+    return json.dumps({"name": name, "nodes": nodes, "edges": edges}, indent=1) + "\n"
+
+
+def _write(out_dir, name, graph, fmt):
+    text = to_dot(graph, name) if fmt == "dot" else to_json(graph, name)
+    with open(os.path.join(out_dir, f"{name}.{fmt}"), "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _safe(name):
+    return re.sub(r"[^\w.-]+", "_", name) or "_"
+
+
+def export_file(out_dir, file_path_display, context, fmt="dot"):
+    """Write the graphs of one analysed file under out_dir/<file>/.
+
+    The PDGs and the FCG come from the context; the CFG and DVGs they were
+    merged from are rebuilt here, since find_vuls does not keep them.
+    """
+    import annotate
+    import cfg
+    import dvg
+
+    target = os.path.join(out_dir, _safe(os.path.relpath(file_path_display)))
+    os.makedirs(target, exist_ok=True)
+
+    if context.call_graph is not None:
+        _write(target, "fcg", context.call_graph, fmt)
+    for func, entry in context.kg.items():
+        lines = context.functions.get(func, [])
+        mapping = context.line_mappings.get(func)
+        func_name = _safe(func)
+        _write(target, f"{func_name}.pdg", entry[0].to_networkx(), fmt)
+        annotations = annotate.annotate_lines(lines, mapping)
+        _write(target, f"{func_name}.cfg", cfg.to_cfg(lines, False, mapping, annotations), fmt)
+        for var, g in dvg.to_dvg(lines, False, mapping, annotations):
+            _write(target, f"{func_name}.dvg.{_safe(var)}", g, fmt)
@@ -5,9 +5,16 @@ import sys
 import time
 import argparse
 import traceback
+import io
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
 
 # We'll import mlkg_assembler AFTER applying CLI flags to the environment
 mlkg_mod = None
+# Lazily built from MLKG_CACHE* flags; None when caching is disabled
+result_cache = False
+# profiling.ProfileSummary of the run when --profile is given
+profile_summary = None
 
 global count_xss
 global count_sqli
@@ -30,6 +37,20 @@ def apply_env_flags_from_args(args):
     set_flag("MLKG_GPT_BATCH_SIZE", args.gpt_batch_size)
     set_flag("MLKG_GPT_INCLUDE_FILE", args.gpt_include_file)
     set_flag("MLKG_CSV_DEDUP", args.csv_dedup)
+    if args.no_cache:
+        set_flag("MLKG_CACHE", 0)
+    set_flag("MLKG_CACHE_DIR", args.cache_dir)
+    set_flag("MLKG_CACHE_MAX_MB", args.cache_max_mb)
+    set_flag("MLKG_JSONL", args.jsonl)
+    set_flag("MLKG_SARIF", args.sarif)
+    set_flag("MLKG_EXPORT_GRAPHS", args.export_graphs)
+    set_flag("MLKG_EXPORT_FORMAT", args.export_format)
+    set_flag("MLKG_MAX_CALL_DEPTH", args.max_call_depth)
+    set_flag("MLKG_ENGINE", args.engine)
+    set_flag("MLKG_LAZY_PDG", args.lazy_pdg)
+    if args.profile:
+        set_flag("MLKG_PROFILE", 1)
+        set_flag("MLKG_PROFILE_OUT", args.profile)
 
 
 def parse_args(argv):
@@ -47,14 +68,191 @@ def parse_args(argv):
     parser.add_argument("--gpt-include-file", type=int, choices=[0, 1], default=None, help="Include full file in GPT prompts")
     parser.add_argument("--csv-dedup", type=int, choices=[0, 1], default=None, help="Deduplicate CSV across runs")
     parser.add_argument("--debug", type=int, choices=[0, 1], default=None, help="Enable debug logging")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the result cache")
+    parser.add_argument("--cache-dir", default=None, help="Result cache folder (default AI_results/cache)")
+    parser.add_argument("--cache-max-mb", type=float, default=None, help="Result cache size cap in MB (LRU eviction)")
+    parser.add_argument("--jsonl", metavar="PATH", default=None, help="Stream findings as JSON Lines to PATH")
+    parser.add_argument("--sarif", metavar="PATH", default=None, help="Write findings as a SARIF 2.1.0 log to PATH")
+    parser.add_argument("--export-graphs", metavar="DIR", default=None, help="Write CFG/DVG/PDG/FCG of each file to DIR")
+    parser.add_argument("--export-format", choices=["dot", "json"], default=None, help="Graph export format (default dot)")
+    parser.add_argument("--git-diff", nargs="+", metavar="REV", default=None,
+                        help="Only re-analyze files changed between BASE [HEAD] (default HEAD: working tree)")
+    parser.add_argument("--max-call-depth", type=int, default=None,
+                        help="Longest call path followed, in functions (default 0: no limit)")
+    parser.add_argument("--engine", choices=["forward", "backward"], default=None,
+                        help="Start from the entry points (forward, default) or slice back from the sinks (backward)")
+    parser.add_argument("--lazy-pdg", type=int, choices=[0, 1], default=None,
+                        help="Only build the PDGs an entry point can reach a sink through (default 1)")
+    parser.add_argument("--profile", nargs="?", metavar="PATH", default=None,
+                        const=os.path.join("AI_results", "profile.jsonl"),
+                        help="Time each pipeline stage; per-file records go to PATH (default AI_results/profile.jsonl)")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Worker processes for directory scans (default 1)")
 
     args = parser.parse_args(argv)
+    if args.git_diff and len(args.git_diff) > 2:
+        parser.error("--git-diff takes one or two revisions")
     # Resolve effective type: --type overrides positional if both provided
     args.effective_type = args.type if args.type is not None else args.type_pos
     return args
 
 
-def main(path, type=False):
+def run_find_vuls_captured(file, type=False):
+    """Analyze one file with its stdout captured.
+
+    Returns everything needed to reproduce a serial run elsewhere (another
+    process, or a later run via the result cache): the captured stdout, the
+    graph statistics, the XSS/SQLi counter deltas, the CSV rows and, when
+    profiling, the file's stage timings.
+    """
+    global mlkg_mod
+    if mlkg_mod is None:
+        import mlkg_assembler as _mlkg
+        mlkg_mod = _mlkg
+    from context import AnalysisContext
+
+    xss_before = mlkg_mod.count_xss
+    sqli_before = mlkg_mod.count_sqli
+    csv_results = []
+    stats = None
+    context = AnalysisContext(file)
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        try:
+            stats = mlkg_mod.find_vuls(file[:-4], type, csv_sink=csv_results, context=context)
+        except Exception as e:
+            print("Error processing file:", file)
+            print(e)
+            if os.getenv("MLKG_DEBUG", "0") == "1":
+                traceback.print_exc()
+    d_xss = mlkg_mod.count_xss - xss_before
+    d_sqli = mlkg_mod.count_sqli - sqli_before
+    # The deltas are added back by merge_result, wherever the result is replayed
+    mlkg_mod.count_xss = xss_before
+    mlkg_mod.count_sqli = sqli_before
+    profile = context.profile.record(file) if context.profile is not None else None
+    return (out.getvalue(), stats, d_xss, d_sqli, csv_results, profile)
+
+
+def get_result_cache():
+    global result_cache
+    if result_cache is False:
+        import result_cache as _rc
+        result_cache = _rc.from_env()
+    return result_cache
+
+
+def analyze_file(file, type=False, refresh=False):
+    """Analyze one file, replaying a cached result when its content is unchanged.
+
+    With refresh the file is always re-analysed (and its cache entry rewritten).
+    """
+    cache = get_result_cache()
+    if cache is None:
+        return run_find_vuls_captured(file, type)
+
+    try:
+        key = cache.key(file, type)
+    except OSError:
+        return run_find_vuls_captured(file, type)
+    record = None if refresh else cache.get(key)
+    if record is not None:
+        # Entries are content-addressed; point the CSV rows at this file's path
+        csv_results = []
+        for _display, rows, xss_found, sqli_found in record["csv"]:
+            rows = [dict(r, file=file) for r in rows]
+            csv_results.append((file, rows, xss_found, sqli_found))
+        return (record["output"], record["stats"],
+                record["count_xss"], record["count_sqli"], csv_results, None)
+
+    result = run_find_vuls_captured(file, type)
+    output, stats, d_xss, d_sqli, csv_results, _profile = result
+    if stats is not None:
+        cache.put(key, {"output": output, "stats": list(stats),
+                        "count_xss": d_xss, "count_sqli": d_sqli,
+                        "csv": [list(c) for c in csv_results]})
+    return result
+
+
+def merge_result(result):
+    """Fold one file's result into the run output, totals and CSVs."""
+    output, stats, d_xss, d_sqli, csv_results, profile = result
+    sys.stdout.write(output)
+    if stats is not None:
+        statistics.append(stats)
+    mlkg_mod.count_xss += d_xss
+    mlkg_mod.count_sqli += d_sqli
+    start = time.perf_counter()
+    for csv_args in csv_results:
+        mlkg_mod.publish_results(*csv_args)
+    if profile is not None and profile_summary is not None:
+        # The CSV stage of a captured run happens here, not in find_vuls
+        csv_ms = (time.perf_counter() - start) * 1000
+        profile["stages_ms"]["csv"] = round(csv_ms, 3)
+        profile["total_ms"] = round(profile["total_ms"] + csv_ms, 3)
+        profile_summary.add(profile)
+
+
+def run_parallel(files, type, jobs, refresh=()):
+    """Fan files out to a process pool and merge results in file order."""
+    chunksize = max(1, len(files) // (jobs * 8))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        results = pool.map(analyze_file, files, [type] * len(files),
+                           [file in refresh for file in files], chunksize=chunksize)
+        for file, result in zip(files, results):
+            print(file)
+            merge_result(result)
+
+
+def run_serial(files, type, refresh=()):
+    for file in files:
+        print(file)
+        if get_result_cache() is not None:
+            merge_result(analyze_file(file, type, file in refresh))
+            continue
+        try:
+            if profile_summary is not None:
+                from context import AnalysisContext
+                context = AnalysisContext(file)
+                statistics.append(mlkg_mod.find_vuls(file[:-4], type, context=context))
+                profile_summary.add(context.profile.record(file))
+            else:
+                statistics.append(mlkg_mod.find_vuls(file[:-4], type))
+        except Exception as e:
+            print("Error processing file:", file)
+            print(e)
+            if os.getenv("MLKG_DEBUG", "0") == "1":
+                traceback.print_exc()
+
+
+def plan_incremental(files, revisions):
+    """Restrict a scan to what changed between two git revisions.
+
+    Returns (files, refresh): the files to report and the subset that must be
+    re-analysed. Unchanged files are carried forward from the result cache.
+    Falls back to a full scan (refresh=None) when git cannot answer.
+    """
+    import git_diff
+    base = revisions[0]
+    head = revisions[1] if len(revisions) > 1 else None
+    try:
+        changed, dependents = git_diff.plan(files, base, head)
+        if head and files and not git_diff.is_checked_out(git_diff.repo_root(files[0]), head):
+            print(f"[WARN] {head} is not checked out; files are analyzed as they are on disk.")
+    except RuntimeError as e:
+        print("Incremental scan unavailable, running a full scan:", e)
+        return files, None
+
+    refresh = changed | dependents
+    print(f"Incremental scan: {len(changed)} changed, {len(dependents)} dependent, "
+          f"{len(files) - len(refresh)} carried forward")
+    if get_result_cache() is None:
+        # Without the cache there is nothing to carry forward from
+        print("Result cache disabled: only changed and dependent files are reported.")
+        files = [f for f in files if f in refresh]
+    return files, refresh
+
+
+def main(path, type=False, jobs=1, git_diff=None):
 
     start = time.perf_counter()
 
@@ -64,19 +262,22 @@ def main(path, type=False):
         import mlkg_assembler as _mlkg
         mlkg_mod = _mlkg
 
+    global profile_summary
+    if os.getenv("MLKG_PROFILE", "0") == "1":
+        import profiling
+        profile_out = os.getenv("MLKG_PROFILE_OUT") or os.path.join("AI_results", "profile.jsonl")
+        os.makedirs(os.path.dirname(os.path.abspath(profile_out)), exist_ok=True)
+        profile_summary = profiling.ProfileSummary(profile_out)
+
     # Checking if the path is a file or a directory
     if os.path.isfile(path):
         # If it's a file
         if path.endswith('.php'):
             # Process the single PHP file
-            print(path)
-            try:
-                statistics.append(mlkg_mod.find_vuls(path[:-4], type))
-            except Exception as e:
-                print("Error processing file:", path)
-                print(e)
-                if os.getenv("MLKG_DEBUG", "0") == "1":
-                    traceback.print_exc()
+            files, refresh = [path], ()
+            if git_diff:
+                files, refresh = plan_incremental(files, git_diff)
+            run_serial(files, type, refresh or ())
         else:
             print("The provided file is not a PHP file.")
 
@@ -89,18 +290,30 @@ def main(path, type=False):
                  if filename.endswith('.php')]
         files.sort()
 
-        for file in files:
-            print(file)
-            try:
-                statistics.append(mlkg_mod.find_vuls(file[:-4], type))
-            except Exception as e:
-                print("Error processing file:", file)
-                print(e)
-                if os.getenv("MLKG_DEBUG", "0") == "1":
-                    traceback.print_exc()
+        refresh = ()
+        if git_diff:
+            files, refresh = plan_incremental(files, git_diff)
+            refresh = refresh or ()
+
+        if jobs and jobs > 1 and len(files) > 1:
+            run_parallel(files, type, jobs, refresh)
+        else:
+            run_serial(files, type, refresh)
     else:
         print("The provided path does not exist.")
 
+    if get_result_cache() is not None:
+        get_result_cache().prune()
+
+    if os.getenv("MLKG_JSONL") or os.getenv("MLKG_SARIF"):
+        import findings_output
+        findings_output.close()
+
+    if os.getenv("MLKG_CSV_DEDUP", "0") == "1":
+        # Export the deduplicated CSVs from the findings store once per run
+        import findings_store
+        findings_store.finish(os.path.join(os.getcwd(), "AI_results"))
+
     load_vulstats()
 
     print("Total vulnerabilities found:\nXSS:", count_xss, "\nSQLi:", count_sqli)
@@ -111,6 +324,10 @@ def main(path, type=False):
     elapsed = end - start
     print("\nElapsed time:", "{:.2f}".format(elapsed), "seconds")
 
+    if profile_summary is not None:
+        profile_summary.close()
+        profile_summary.print_table()
+
 
 def load_vulstats():
     try:
@@ -135,7 +352,12 @@ def print_graphstats():
     
     print("\nGraph stats:")
     print("N grafs:", sum([x[0] for x in statistics]))
-    print("N functions:", sum([x[1] for x in statistics]))
+    functions = sum([x[1] for x in statistics])
+    print("N functions:", functions)
+    built = sum([x[6] for x in statistics])
+    if built != functions:
+        # Lazy PDGs: the graph, variable, node and edge counts cover the built ones
+        print("N PDGs built:", f"{built} / {functions}")
     print("N variables:", sum([x[2] for x in statistics]))
     print("N nodes:", sum([x[3] for x in statistics]))
     print("N edges:", sum([x[4] for x in statistics]))
@@ -146,7 +368,7 @@ if __name__ == "__main__":
     apply_env_flags_from_args(args)
 
     # Run
-    main(args.path, args.effective_type)
+    main(args.path, args.effective_type, args.jobs, args.git_diff)
  
 
 #####Não me lembro o que faz este type
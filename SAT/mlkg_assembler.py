@@ -1,21 +1,22 @@
 import pdg
+import dvg
+import annotate
 import re
-import networkx as nx
-# Matplotlib is optional; only used for drawing when explicitly requested
-try:
-    import matplotlib.pyplot as plt
-except Exception:
-    plt = None
-from networkx.drawing import nx_agraph
 import fcg
 import agents
 import os
 import csv
-
-kg = {}
-functions = []
+import threading
+import profiling
+import traversal
+from context import AnalysisContext
+from summaries import FunctionSummaries
+
+# Run-level totals; each analysis counts into its own AnalysisContext and
+# adds its result here once it finishes.
 count_sqli = 0
 count_xss = 0
+_totals_lock = threading.Lock()
 
 # Flags controlled by environment variables
 DEBUG_ASSEMBLER = os.getenv("MLKG_DEBUG", "0") == "1"
@@ -27,28 +28,42 @@ try:
     GPT_BATCH_SIZE = int(os.getenv("MLKG_GPT_BATCH_SIZE", "20"))
 except Exception:
     GPT_BATCH_SIZE = 20
-
-gpt_agent = None
-
-def _ensure_gpt_agent():
-    """Initialize GPT agent on-demand.
+# Longest call path (in functions) the TravelAgent follows; 0 = no limit
+try:
+    MAX_CALL_DEPTH = int(os.getenv("MLKG_MAX_CALL_DEPTH", "0"))
+except Exception:
+    MAX_CALL_DEPTH = 0
+# Analysis direction (--engine): "forward" follows every entry point down its
+# call paths (TravelAgent); "backward" slices back from the sinks (SliceAgent)
+ENGINE = os.getenv("MLKG_ENGINE", "forward")
+# PDGs are only built for the functions an entry point can reach a sink
+# through (--lazy-pdg 0 builds every one)
+LAZY_PDG = os.getenv("MLKG_LAZY_PDG", "1") == "1"
+# Per-stage timing of every analysis (--profile)
+PROFILE = os.getenv("MLKG_PROFILE", "0") == "1"
+# Graph export is opt-in (--export-graphs); by default no graph is laid out or written
+EXPORT_GRAPHS_DIR = os.getenv("MLKG_EXPORT_GRAPHS", "")
+EXPORT_GRAPHS_FORMAT = os.getenv("MLKG_EXPORT_FORMAT", "dot")
+
+def _ensure_gpt_agent(context):
+    """Initialize the GPT agent of an analysis on-demand.
 
     Returns the agent instance or None if GPT is unavailable.
     """
-    global gpt_agent, ENABLE_GPT
-    if gpt_agent is not None:
-        return gpt_agent
+    global ENABLE_GPT
+    if context.gpt_agent is not None:
+        return context.gpt_agent
     if not ENABLE_GPT:
         return None
     try:
         from ai_agents import GPTConclusionAgent
-        gpt_agent = GPTConclusionAgent("GPTConclusionAgent")
-        return gpt_agent
+        context.gpt_agent = GPTConclusionAgent("GPTConclusionAgent")
+        return context.gpt_agent
     except Exception as _e:
         if DEBUG_ASSEMBLER:
             print("[DEBUG] GPT init failed, disabling GPT:", _e)
         ENABLE_GPT = False
-        gpt_agent = None
+        context.gpt_agent = None
         return None
 
 def removeComments(file_path, return_mapping=False):
@@ -128,13 +143,63 @@ def get_code_without_comments(file_path: str) -> str:
     return re.sub(pattern, "", code, flags=re.MULTILINE | re.DOTALL)
 
 
+_FUNCTION_NAME = re.compile(r'^function\s+&?\s*([A-Za-z_\x7f-\xff][\w\x7f-\xff]*)')
+
+def split_functions(lines, line_mapping):
+    """Split processed lines into `_main` and one body per top-level function.
+
+    Single pass over the file. Returns {name: (lines, original_line_numbers)}
+    with `_main` first; a function defined twice keeps its first body, and only
+    bodies whose braces close are returned.
+    """
+    def original(i):
+        return line_mapping[i] if i < len(line_mapping) else 0
+
+    main, main_mapping = [], []
+    segments = {"_main": (main, main_mapping)}
+    name = None
+    body, body_mapping = [], []
+
+    pilha = -1
+    rem = False
+    for i, l in enumerate(lines):
+        if l.startswith("function"):
+            if l.count("{") == 0:
+                rem = True
+            pilha = 1
+            m = _FUNCTION_NAME.match(l)
+            name = m.group(1) if m else None
+            body, body_mapping = [l], [original(i)]
+        elif pilha > 0:
+            if rem:
+                rem = False
+                pilha -= 1
+            pilha += l.count("{")
+            pilha -= l.count("}")
+            body.append(l)
+            body_mapping.append(original(i))
+        if pilha == 0:
+            pilha = -1
+            if name and name not in segments:
+                segments[name] = (body, body_mapping)
+            name = None
+        elif pilha == -1:
+            main.append(l)
+            main_mapping.append(original(i))
+
+    return segments
+
 def is_sanitized(node):
     """Safely determine if a node (entry/sink or nested) indicates sanitization.
 
-    Accepts tuples/lists like (label, var, line, meta), plain strings, or nested structures.
+    Accepts dvg.Label records, tuples/lists like (label, var, line, meta), plain strings, or nested structures.
     Never raises on unexpected shapes.
     """
     try:
+        # dvg.Label: kinds of the whole chain are precomputed
+        if isinstance(node, dvg.Label):
+            return bool(node.mask & dvg.SANITIZER)
+
         # tuple/list: (label, var, line, meta)
         if isinstance(node, (list, tuple)):
             label = node[0] if len(node) > 0 else None
@@ -163,17 +228,27 @@ def is_sanitized(node):
     except Exception:
         return False
 
-def find_vuls(path, type = False):
+def find_vuls(path, type = False, csv_sink = None, context = None):
 
-    global kg
-    global functions
     global count_sqli
     global count_xss
 
+    # Each analysis owns its state; callers may pass a context to inspect it afterwards
+    if context is None:
+        context = AnalysisContext(path)
+    kg = context.kg
+    functions = context.functions
+    # Track processed->original line mappings per function name
+    function_line_mappings = context.line_mappings
+    if context.profile is None and PROFILE:
+        context.profile = profiling.Profiler()
+    prof = context.profile
+
     # Preserve display file path before local variables may shadow 'path'
     file_path_display = f"{path}.php"
 
     # Get processed lines with mapping to original line numbers
+    t = profiling.start(prof)
     processed_lines, processed_to_original_map, original_lines = removeComments(path + ".php", return_mapping=True)
     file = remove_html_comments(processed_lines)
 
@@ -191,93 +266,69 @@ def find_vuls(path, type = False):
             final_mapping.append(processed_to_original_map[i])
 
     processed_to_original_map = final_mapping
+    profiling.stop(prof, "strip_comments", t)
 
     # Prepare string versions of code
     code = "\n".join(file)                 # processed, comment-stripped
     original_code_str = "\n".join(original_lines)  # original file content with original line order
 
     # Build function call graph once and reuse
+    t = profiling.start(prof)
     g = fcg.to_fcg(path + ".php", False)
-    kg = {}
-    functions = {}
-    # Track processed->original line mappings per function name
-    function_line_mappings = {}
-    main = []
+    profiling.stop(prof, "fcg", t)
+    context.call_graph = g
 
     nodes = [x[0] for x in list(g.nodes.data())]
 
-    pilha = -1
-    rem = False
-    main_indices = []
-    for i, l in enumerate(file):
-        x = re.search("^function", l)
-        if x:
-            if l.count("{") == 0:
-                rem = True
-            pilha = 1
-        elif pilha > 0:
-            if rem:
-                rem = False
-                pilha -= 1
-            pilha += l.count("{")
-            pilha -= l.count("}")
-        if pilha == 0:
-            pilha = -1
-        elif pilha == -1:
-            main.append(l)
-            main_indices.append(i)
+    # Split the file into _main and every function body in a single pass
+    t = profiling.start(prof)
+    segments = split_functions(file, processed_to_original_map)
+    profiling.stop(prof, "segmentation", t)
+    main, main_line_mapping = segments["_main"]
 
     functions["_main"] = main
-    # Build line mapping for main function using recorded indices
-    main_line_mapping = [processed_to_original_map[idx] if idx < len(processed_to_original_map) else 0 for idx in main_indices]
     function_line_mappings["_main"] = main_line_mapping
-    kg["_main"] = pdg.to_pdg(main, False, main_line_mapping)
+    for n in nodes[1:]:
+        if n in segments:
+            functions[n], function_line_mappings[n] = segments[n]
+
+    # Label every function first; the labels decide which PDGs can be needed,
+    # and to_pdg reuses them
+    t = profiling.start(prof)
+    annotated = {n: annotate.annotate_lines(functions[n], function_line_mappings[n]) for n in functions}
+    profiling.stop(prof, "labels", t)
+    scans = {n: pdg.prescan(lines) for n, lines in annotated.items()}
+    # Graph export needs every PDG
+    needed = pdg.demand(g, scans) if LAZY_PDG and not EXPORT_GRAPHS_DIR else set(functions)
 
     if DEBUG_ASSEMBLER:
         print("[DEBUG] Processed lines:", processed_lines)
         print("[DEBUG] Processed to original map:", processed_to_original_map)
         print("[DEBUG] Original lines:", original_lines)
-        print("[DEBUG] main_indices:", main_indices)
         print("[DEBUG] main_line_mapping:", main_line_mapping)
         print("[DEBUG] function_line_mappings:", function_line_mappings)
 
-    for n in nodes[1:]:
-
-        pilha = -1
-        function = []
-        func_line_indices = []  # track which processed line each function line corresponds to
-        for idx, l in enumerate(file):
-            x = re.search("^function.*"+ n, l)
-            if x:
-                pilha = 1
-                function.append(l)
-                func_line_indices.append(idx)
-            elif pilha > 0:
-                pilha += l.count("{")
-                pilha -= l.count("}")
-                function.append(l)
-                func_line_indices.append(idx)
-            if pilha == 0:
-                functions[n] = function
-                # Build line mapping for this function
-                func_line_mapping = [processed_to_original_map[i] if i < len(processed_to_original_map) else 0 
-                                     for i in func_line_indices]
-                function_line_mappings[n] = func_line_mapping
-                p = pdg.to_pdg(function, False, func_line_mapping)
-                kg[n] = p
-                if len(p[1]) == 0 and not p[2]:
-                    g.remove_node(n)
-                #elif len(p[1]) == 0:
-                #    kg[n] = p + "connector"
-                else:
-                    kg[n] = p
-                break
-
+    for n in functions:
+        if n not in needed:
+            # Not built; dropped from the call graph when its labels show it would be
+            if n != "_main" and not scans[n][2]:
+                g.remove_node(n)
+            continue
+        p = pdg.to_pdg(functions[n], False, function_line_mappings[n], prof, annotated[n])
+        kg[n] = p
+        if n != "_main" and len(p[1]) == 0 and not p[2]:
+            g.remove_node(n)
+        #elif len(p[1]) == 0:
+        #    kg[n] = p + "connector"
+
+    # The graph counts cover the PDGs built; with lazy PDGs that can be fewer
+    # than the functions, so the number built is returned as well
     grafos = sum([x[3] + 2 for x in kg.values()]) + 1
     funcoes = len(functions)
+    construidos = len(kg)
     variaveis = sum([x[3] for x in kg.values()])
-    nos = sum([len(x[0].nodes()) for x in kg.values()]) + len(g.nodes())
-    edges = sum([len(x[0].edges()) for x in kg.values()]) + len(g.edges())
+    nos = sum([x[0].number_of_nodes() for x in kg.values()]) + len(g.nodes())
+    edges = sum([x[0].number_of_edges() for x in kg.values()]) + len(g.edges())
 
     possible_vulnerabilities = []
     vulnerabilities = []
@@ -286,13 +337,11 @@ def find_vuls(path, type = False):
     local_xss_found = False
     local_sqli_found = False
 
-    agents.load_mlkg()
-
     # If GPT is enabled, run the GPT advisor.
     # (Previously it only ran in debug or "GPT-only" mode, which made the UI's "GPT assistance" option appear inactive.)
     run_gpt = ENABLE_GPT
     if run_gpt:
-        agent = _ensure_gpt_agent()
+        agent = _ensure_gpt_agent(context)
         if agent is None:
             # Be explicit so users know GPT was not used.
             print("[WARN] GPT assistance was enabled but could not be initialized (check OPENAI_API_KEY and that the 'openai' package is installed).")
@@ -304,10 +353,22 @@ def find_vuls(path, type = False):
                 # If begin_file fails, proceed without GPT.
                 run_gpt = False
 
+    if EXPORT_GRAPHS_DIR:
+        try:
+            import graph_export
+            graph_export.export_file(EXPORT_GRAPHS_DIR, file_path_display, context, EXPORT_GRAPHS_FORMAT)
+        except Exception as e:
+            print("[WARN] Graph export failed:", e)
+
+    t = profiling.start(prof)
+    # Call paths are only followed through functions that can still reach a sink
+    sink_functions = {f for f in kg if any("sink" in x[0] for x in kg[f][1])}
+    context.sink_reachable = traversal.can_reach(g, sink_functions)
+    context.max_call_depth = MAX_CALL_DEPTH
+    backward = ENGINE == "backward"
+    # function -> entry points to slice for, with the backward engine
+    entries = {}
     for func in kg:
-        if plt is not None:
-            colors = nx.get_edge_attributes(kg[func][0],'color').values()
-            nx.draw(kg[func][0], with_labels = True, edge_color=colors)
         if len(kg[func][1]) > 0:
             for y in [z for z in kg[func][1] if z[0] == "entry_point"]:
                     if not is_sanitized(y):
@@ -320,25 +381,43 @@ def find_vuls(path, type = False):
                             pdg_index = 0
 
                         entry_for_travel = (y[0], y[1], pdg_index)
-                        travel_agent = agents.TravelAgent("Travel Agent", g, kg, entry_for_travel)
-                        possible_vulnerabilities += travel_agent.start_traversal([func])
+                        if backward:
+                            entries.setdefault(func, []).append(entry_for_travel)
+                        else:
+                            travel_agent = agents.TravelAgent("Travel Agent", entry_for_travel, context)
+                            possible_vulnerabilities += travel_agent.start_traversal([func])
                         if y[3] and "sink" in y[3][0] and (not type or y[3] and type in y[3][0]):
                             vulnerabilities.append((True, y, y, func))
                             if "xss" in y[3][0]:
-                                count_xss+=1
+                                context.count_xss += 1
                             if "sqli" in y[3][0]:
-                                count_sqli+=1
+                                context.count_sqli += 1
+
+    if backward:
+        slice_agent = agents.SliceAgent("Slice Agent", context)
+        possible_vulnerabilities = slice_agent.start_slicing(entries, type)
+
+    if context.truncated_paths:
+        print(f"[WARN] {context.truncated_paths} call path(s) reached the depth cap of "
+              f"{MAX_CALL_DEPTH} functions; longer paths were not explored.")
+    profiling.stop(prof, "slicing" if backward else "travel", t)
 
     # Prepare collection for optional GPT batch
     gpt_items = []
     gpt_items_keys = set()
     # run_gpt already computed above
 
+    t = profiling.start(prof)
+    # Register every entry point first, so each function's taint is solved once for all of them
+    if context.summaries is None:
+        context.summaries = FunctionSummaries(context)
+    for trial in possible_vulnerabilities:
+        context.summaries.add_source(trial[0][3], trial[0][2], trial[0][1])
     for trial in possible_vulnerabilities:
         for sink in trial[1]:
             if not type or type in sink[0]:
                 if not is_sanitized(sink):
-                    verification_agent = agents.VerificationAgent(0, trial[0], sink, trial[2])
+                    verification_agent = agents.VerificationAgent(0, trial[0], sink, trial[2], context)
                     vres = verification_agent.start_verification(trial[2], trial[0][1])
                     if isinstance(vres, list):
                         if DEBUG_ASSEMBLER:
@@ -413,12 +492,22 @@ def find_vuls(path, type = False):
                         "_sink": sink,
                     })
 
+    if DEBUG_ASSEMBLER and context.summaries is not None:
+        for func in kg:
+            try:
+                print(f"[DEBUG] summary {func}:", context.summaries.summary(func))
+            except Exception as e:
+                print(f"[DEBUG] summary {func} unavailable:", e)
+
+    profiling.stop(prof, "verification", t)
+
+    t = profiling.start(prof)
     # If batching is enabled, send all GPT items in one or more batches
     if run_gpt and GPT_BATCH and gpt_items:
         batches = [gpt_items[i:i+GPT_BATCH_SIZE] for i in range(0, len(gpt_items), GPT_BATCH_SIZE)]
         for batch in batches:
             try:
-                results = _ensure_gpt_agent().analyse_batch(batch, path=None)
+                results = _ensure_gpt_agent(context).analyse_batch(batch, path=None)
             except Exception as e:
                 if DEBUG_ASSEMBLER:
                     print("[DEBUG] GPT analyse_batch() failed:", str(e))
@@ -444,7 +533,7 @@ def find_vuls(path, type = False):
     if run_gpt and not GPT_BATCH and gpt_items:
         for it in gpt_items:
             try:
-                gpt_summary = _ensure_gpt_agent().analyse(
+                gpt_summary = _ensure_gpt_agent(context).analyse(
                     it["entry"], it["sink"], it["path"], php_code=None,
                     entry_line=it["entry_line"], sink_line=it["sink_line"],
                     sanitization=it["sanitization"],
@@ -467,6 +556,8 @@ def find_vuls(path, type = False):
                     gpt_summary.get("verdict", "")
                 ))
 
+    profiling.stop(prof, "gpt", t)
+
     vuls = len([x for x in vulnerabilities if x[0]])
 
     # Prepare code lines for context/snippets
@@ -525,7 +616,7 @@ def find_vuls(path, type = False):
             meta = entry[3]
             if isinstance(meta, str):
                 actual_source = meta
-            elif isinstance(meta, (list, tuple)) and meta:
+            elif isinstance(meta, (list, tuple, dvg.Label)) and meta:
                 actual_source = str(meta[0]) if meta[0] else None
         
         return (var, line, actual_source)
@@ -547,7 +638,7 @@ def find_vuls(path, type = False):
         # Try to extract function name from metadata
         if len(sink) > 3 and sink[3]:
             meta = sink[3]
-            if isinstance(meta, (list, tuple)) and meta:
+            if isinstance(meta, (list, tuple, dvg.Label)) and meta:
                 func_name = meta[0] if meta[0] else None
             elif isinstance(meta, str):
                 func_name = meta
@@ -664,9 +755,9 @@ def find_vuls(path, type = False):
         try:
             if sink and isinstance(sink[0], str):
                 if "xss" in sink[0]:
-                    count_xss += 1
+                    context.count_xss += 1
                 if "sqli" in sink[0]:
-                    count_sqli += 1
+                    context.count_sqli += 1
         except Exception:
             pass
 
@@ -683,6 +774,12 @@ def find_vuls(path, type = False):
                 "sanitized": "Yes" if ("Detected" in sanit_detected) else "No",
                 "detection_note": (vul[5] if len(vul) > 5 else ""),
                 "gpt_verdict": (vul[6] if len(vul) > 6 else ""),
+                # Detail fields for the structured outputs (not CSV columns)
+                "vuln_type": "xss" if "xss" in str(sink[0]) else "sqli",
+                "function": func_ctx,
+                "call_path": list(ctx_path) if isinstance(ctx_path, (list, tuple)) else [func_ctx],
+                "entry_code": snippet_e,
+                "sink_code": snippet_s,
             })
         except Exception:
             pass
@@ -690,151 +787,131 @@ def find_vuls(path, type = False):
     print(f"Vulnerabilities detected: {printed}")
     print("\n")
 
+    # Derive per-file flags from printed findings as a fallback
+    try:
+        if not local_xss_found:
+            local_xss_found = any('xss' in str(row.get('sink', '')) for row in csv_rows)
+        if not local_sqli_found:
+            local_sqli_found = any('sqli' in str(row.get('sink', '')) for row in csv_rows)
+    except Exception:
+        pass
+
+    if csv_sink is not None:
+        # Caller (e.g. a parallel worker) writes the rows itself, in its own order
+        csv_sink.append((file_path_display, csv_rows, local_xss_found, local_sqli_found))
+    else:
+        t = profiling.start(prof)
+        publish_results(file_path_display, csv_rows, local_xss_found, local_sqli_found)
+        profiling.stop(prof, "csv", t)
+
+    # End GPT per-file session
+    if context.gpt_agent is not None:
+        try:
+            usage = context.gpt_agent.end_file()
+            if DEBUG_ASSEMBLER and usage:
+                print(f"[DEBUG] GPT per-file usage for {file_path_display}: calls={usage.get('calls')}, prompt_tokens={usage.get('prompt')}, completion_tokens={usage.get('completion')}, total_tokens={usage.get('total')}")
+        except Exception:
+            pass
+
+    with _totals_lock:
+        count_xss += context.count_xss
+        count_sqli += context.count_sqli
+
+    return (grafos, funcoes, variaveis, nos, edges, vuls > 0, construidos)
+
+
+def publish_results(file_path_display, csv_rows, local_xss_found, local_sqli_found):
+    """Commit one file's findings: CSV (or findings store) plus JSONL/SARIF outputs."""
+    write_csv_results(file_path_display, csv_rows, local_xss_found, local_sqli_found)
+    try:
+        import findings_output
+        findings_output.publish(csv_rows)
+    except Exception as out_exc:
+        if DEBUG_ASSEMBLER:
+            print("[DEBUG] Failed to publish structured findings:", out_exc)
+
+# CSV paths whose header has already been checked by this process
+_migrated_csv = set()
+
+def write_csv_results(file_path_display, csv_rows, local_xss_found, local_sqli_found):
+    """Record one file's findings in AI_results/vulnerabilities.csv and file_summary.csv.
+
+    With MLKG_CSV_DEDUP=1 the rows go to the SQLite findings store instead, and
+    the CSVs are exported from it when the run ends.
+    """
+    out_dir = os.path.join(os.getcwd(), "AI_results")
+    row_obj = {
+        "file": file_path_display,
+        "xss": 1 if local_xss_found else 0,
+        "sqli": 1 if local_sqli_found else 0,
+    }
+    if os.getenv("MLKG_CSV_DEDUP", "0") == "1":
+        try:
+            import findings_store
+            findings_store.get_store(out_dir).add(csv_rows, row_obj)
+        except Exception as store_exc:
+            if DEBUG_ASSEMBLER:
+                print("[DEBUG] Failed to write to findings store:", store_exc)
+        return
+
     # Write CSV if any rows were collected
     try:
         if csv_rows:
-            out_dir = os.path.join(os.getcwd(), "AI_results")
             os.makedirs(out_dir, exist_ok=True)
             out_csv = os.path.join(out_dir, "vulnerabilities.csv")
             write_header = not os.path.exists(out_csv)
-            dedup_enabled = os.getenv("MLKG_CSV_DEDUP", "0") == "1"
 
-            # Migrate header to include new columns if needed
+            # Migrate header to include new columns if needed (once per run)
             desired_fields = [
                 "file", "entry", "entry_line", "sink", "sink_line", "sanitized", "detection_note", "gpt_verdict"
             ]
-            if os.path.exists(out_csv):
+            if os.path.exists(out_csv) and out_csv not in _migrated_csv:
+                _migrated_csv.add(out_csv)
                 try:
                     with open(out_csv, mode="r", encoding="utf-8", newline="") as rf:
-                        reader = csv.reader(rf)
-                        existing_rows = list(reader)
-                    if existing_rows:
-                        existing_header = existing_rows[0]
-                        if set(desired_fields) - set(existing_header):
-                            with open(out_csv, mode="w", encoding="utf-8", newline="") as wf:
-                                w = csv.writer(wf)
-                                w.writerow(desired_fields)
-                                for r in existing_rows[1:]:
-                                    if len(r) < len(desired_fields):
-                                        r = r + [""] * (len(desired_fields) - len(r))
-                                    elif len(r) > len(desired_fields):
-                                        r = r[:len(desired_fields)]
-                                    w.writerow(r)
-                            write_header = False
+                        existing_header = next(csv.reader(rf), None)
+                    if existing_header and set(desired_fields) - set(existing_header):
+                        with open(out_csv, mode="r", encoding="utf-8", newline="") as rf:
+                            existing_rows = list(csv.reader(rf))
+                        with open(out_csv, mode="w", encoding="utf-8", newline="") as wf:
+                            w = csv.writer(wf)
+                            w.writerow(desired_fields)
+                            for r in existing_rows[1:]:
+                                if len(r) < len(desired_fields):
+                                    r = r + [""] * (len(desired_fields) - len(r))
+                                elif len(r) > len(desired_fields):
+                                    r = r[:len(desired_fields)]
+                                w.writerow(r)
+                        write_header = False
                 except Exception:
                     # If migration fails, proceed; file will have mixed headers
                     pass
-            if dedup_enabled:
-                # Load existing rows and deduplicate across runs using a stable key
-                existing: list[dict] = []
-                try:
-                    if os.path.exists(out_csv):
-                        with open(out_csv, mode="r", newline="", encoding="utf-8") as rf:
-                            reader = csv.DictReader(rf)
-                            for r in reader:
-                                existing.append({k: r.get(k, "") for k in desired_fields})
-                except Exception as e:
-                    if DEBUG_ASSEMBLER:
-                        print("[DEBUG] Failed to read existing vulnerabilities.csv for dedup:", e)
-                def key_of(d):
-                    return (
-                        str(d.get("file", "")),
-                        str(d.get("entry_line", "")),
-                        str(d.get("sink_line", "")),
-                        str(d.get("sink", "")),
-                    )
-                seen = {key_of(r) for r in existing}
-                appended = 0
+            with open(out_csv, mode="a", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=desired_fields, extrasaction="ignore")
+                if write_header:
+                    writer.writeheader()
                 for row in csv_rows:
-                    k = key_of(row)
-                    if k not in seen:
-                        existing.append(row)
-                        seen.add(k)
-                        appended += 1
-                try:
-                    with open(out_csv, mode="w", newline="", encoding="utf-8") as wf:
-                        writer = csv.DictWriter(wf, fieldnames=desired_fields)
-                        writer.writeheader()
-                        for r in existing:
-                            writer.writerow(r)
-                    if DEBUG_ASSEMBLER:
-                        print(f"[DEBUG] vulnerabilities.csv dedup applied, appended {appended} new unique rows")
-                except Exception as e:
-                    if DEBUG_ASSEMBLER:
-                        print("[DEBUG] Failed to write deduped vulnerabilities.csv:", e)
-            else:
-                with open(out_csv, mode="a", newline="", encoding="utf-8") as f:
-                    writer = csv.DictWriter(f, fieldnames=[
-                        "file", "entry", "entry_line", "sink", "sink_line", "sanitized", "detection_note", "gpt_verdict"
-                    ])
-                    if write_header:
-                        writer.writeheader()
-                    for row in csv_rows:
-                        writer.writerow(row)
+                    writer.writerow(row)
     except Exception as csv_exc:
         if DEBUG_ASSEMBLER:
             print("[DEBUG] Failed to write CSV:", csv_exc)
 
-    # Derive per-file flags from printed findings as a fallback
-    try:
-        if not local_xss_found:
-            local_xss_found = any('xss' in str(row.get('sink', '')) for row in csv_rows)
-        if not local_sqli_found:
-            local_sqli_found = any('sqli' in str(row.get('sink', '')) for row in csv_rows)
-    except Exception:
-        pass
-
     # Write per-file summary CSV: file,xss,sqli where values are 0 (safe) or 1 (vulnerable)
     try:
-        out_dir = os.path.join(os.getcwd(), "AI_results")
         os.makedirs(out_dir, exist_ok=True)
         summary_csv = os.path.join(out_dir, "file_summary.csv")
         write_header = not os.path.exists(summary_csv)
-        dedup_enabled = os.getenv("MLKG_CSV_DEDUP", "0") == "1"
-        row_obj = {
-            "file": file_path_display,
-            "xss": 1 if local_xss_found else 0,
-            "sqli": 1 if local_sqli_found else 0,
-        }
-        if dedup_enabled and os.path.exists(summary_csv):
-            # Replace existing row for this file
-            existing_rows = []
-            try:
-                with open(summary_csv, mode="r", newline="", encoding="utf-8") as rf:
-                    reader = csv.DictReader(rf)
-                    for r in reader:
-                        if r.get("file") != file_path_display:
-                            existing_rows.append({"file": r.get("file", ""),
-                                                  "xss": int(r.get("xss", 0) or 0),
-                                                  "sqli": int(r.get("sqli", 0) or 0)})
-            except Exception as e:
-                if DEBUG_ASSEMBLER:
-                    print("[DEBUG] Failed to read file_summary.csv for dedup:", e)
-            existing_rows.append(row_obj)
-            try:
-                with open(summary_csv, mode="w", newline="", encoding="utf-8") as wf:
-                    writer = csv.DictWriter(wf, fieldnames=["file", "xss", "sqli"])
-                    writer.writeheader()
-                    for r in existing_rows:
-                        writer.writerow(r)
-                if DEBUG_ASSEMBLER:
-                    print("[DEBUG] file_summary.csv dedup applied (replaced existing row for file)")
-            except Exception as e:
-                if DEBUG_ASSEMBLER:
-                    print("[DEBUG] Failed to write deduped file_summary.csv:", e)
-        else:
-            with open(summary_csv, mode="a", newline="", encoding="utf-8") as f:
-                writer = csv.DictWriter(f, fieldnames=["file", "xss", "sqli"])
-                if write_header:
-                    writer.writeheader()
-                writer.writerow(row_obj)
+        with open(summary_csv, mode="a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["file", "xss", "sqli"])
+            if write_header:
+                writer.writeheader()
+            writer.writerow(row_obj)
     except Exception as csv2_exc:
         # Robust fallback: ensure directory exists and retry; if still failing, rebuild from vulnerabilities
         try:
             if DEBUG_ASSEMBLER:
                 print("[DEBUG] Failed to write file summary CSV:", csv2_exc)
                 print("[DEBUG] Retrying after ensuring directory exists...")
-            out_dir = os.path.join(os.getcwd(), "AI_results")
             os.makedirs(out_dir, exist_ok=True)
             summary_csv = os.path.join(out_dir, "file_summary.csv")
             # Try a minimal append write
@@ -842,11 +919,7 @@ def find_vuls(path, type = False):
                 writer = csv.DictWriter(f, fieldnames=["file", "xss", "sqli"])
                 if os.stat(summary_csv).st_size == 0:
                     writer.writeheader()
-                writer.writerow({
-                    "file": file_path_display,
-                    "xss": 1 if local_xss_found else 0,
-                    "sqli": 1 if local_sqli_found else 0,
-                })
+                writer.writerow(row_obj)
         except Exception as csv2_retry_exc:
             if DEBUG_ASSEMBLER:
                 print("[DEBUG] Retry failed for file summary CSV:", csv2_retry_exc)
@@ -858,14 +931,3 @@ def find_vuls(path, type = False):
             except Exception as rebuild_exc:
                 if DEBUG_ASSEMBLER:
                     print("[DEBUG] Fallback rebuild failed:", rebuild_exc)
-
-    # End GPT per-file session
-    if ENABLE_GPT:
-        try:
-            usage = gpt_agent.end_file()
-            if DEBUG_ASSEMBLER and usage:
-                print(f"[DEBUG] GPT per-file usage for {file_path_display}: calls={usage.get('calls')}, prompt_tokens={usage.get('prompt')}, completion_tokens={usage.get('completion')}, total_tokens={usage.get('total')}")
-        except Exception:
-            pass
-
-    return (grafos, funcoes, variaveis, nos, edges, vuls > 0)
@@ -1,49 +1,97 @@
+import annotate
 import cfg
 import dvg
-# Matplotlib is optional; only used when printing graphs
-try:
-    import matplotlib.pyplot as plt
-except Exception:
-    plt = None
+import profiling
+import traversal
 import networkx as nx
+from compact_graph import GraphBuilder
+# Matplotlib is optional; only imported when printing graphs
+from graph_export import load_pyplot
 
 flow_edges = ""
 
-def to_pdg(func, p = False, line_mapping = None):
+#profile: optional profiling.Profiler that receives cfg/dvg/pdg_merge times
+#lines: annotate.annotate_lines(func, line_mapping), when the caller already has it
+def to_pdg(func, p = False, line_mapping = None, profile = None, lines = None):
     
     global flow_edges
-    pdg = cfg.to_cfg(func, p, line_mapping)
-    d = dvg.to_dvg(func, p, line_mapping)
-
-    for g in d:
-                
-        for edge in g[1].edges:
-
-            if pdg.has_edge(edge[0],edge[1], edge[2]):
-                if 'label' in pdg.edges.get((edge[0],edge[1], edge[2])).keys():
-                    l = pdg.edges.get((edge[0],edge[1], edge[2]))['label']
-                    pdg.remove_edge(edge[0],edge[1], edge[2])
-                    pdg.add_edge(edge[0],edge[1], edge[2], color='g', label = (l + '.' + g[0]))
-                else:
-                    pdg.remove_edge(edge[0],edge[1], edge[2])
-                    pdg.add_edge(edge[0],edge[1], edge[2], color='g', label = g[0])
-            else:
+    # Label every line once; the CFG and the DVGs are built from the same annotations
+    if lines is None:
+        t = profiling.start(profile)
+        lines = annotate.annotate_lines(func, line_mapping)
+        profiling.stop(profile, "labels", t)
+    t = profiling.start(profile)
+    pdg = GraphBuilder()
+    cfg.add_cfg_edges(pdg, lines)
+    profiling.stop(profile, "cfg", t)
+    t = profiling.start(profile)
+    d = dvg.dvg_edges(dvg.variable_occurrences(lines))
+    profiling.stop(profile, "dvg", t)
+    t = profiling.start(profile)
+
+    for var, edges in d:
 
-                pdg.add_edge(edge[0],edge[1], edge[2], color='r', label = g[0])
+        #the dvg of var, for its edge keys and edge order
+        g = GraphBuilder()
+        for u, v in edges:
+            g.add_edge(u, v)
 
+        for u, v, key in g.edges():
+
+            edge = pdg.edge(u, v, key)
+            if edge is not None:
+                #re-added, so v moves after the other successors of u
+                pdg.remove_edge(u, v, key)
+                pdg.add_edge(u, v, key, color='g', label = var if edge[1] is None else (edge[1] + '.' + var))
+            else:
 
-    colors = nx.get_edge_attributes(pdg,'color').values()
-    lab = nx.get_edge_attributes(pdg,'label')
+                pdg.add_edge(u, v, key, color='r', label = var)
+
+    pdg = pdg.freeze()
 
     if(p):
-        print(pdg.edges)
+        g = pdg.to_networkx()
+        print(g.edges)
+        colors = nx.get_edge_attributes(g,'color').values()
+        plt = load_pyplot()
         if plt is not None:
-            nx.draw(pdg, with_labels = True, edge_color=colors)
+            nx.draw(g, with_labels = True, edge_color=colors)
             plt.show()
 
-    labels = [x[1] for x in pdg.nodes if x[1] != "" and x != "return"]
-    ret = len([x[1] for x in pdg.nodes if x == "return"]) > 0 
+    labels = [label for label in pdg.labels if label != ""]
+    ret = pdg.return_id >= 0
+    profiling.stop(profile, "pdg_merge", t)
 	
     return (pdg, labels, ret, len(d))
 
 
+#what the line labels of a function say about its pdg, before building it:
+#(has an entry point, has a sink, may keep a label or a "return" node)
+#the pdg only has entry point and sink labels the lines have, and a label or
+#a "return" node only when a line is labelled, returns or may get an object
+#sanitization label (dvg.object_sanitization, on "->" lines)
+def prescan(lines):
+    kinds = [l.label[0] for l in lines if l.label != ""]
+    return ("entry_point" in kinds,
+            any("sink" in kind for kind in kinds),
+            bool(kinds) or any(l.is_return or "->" in l.text for l in lines))
+
+
+#functions whose pdg the analysis can need: the ones with an entry point, and
+#the ones they call (directly or not) through functions that may still reach
+#a sink, as TravelAgent follows them
+#call_graph: the fcg; scans: function name -> prescan() of its lines
+def demand(call_graph, scans):
+    g = call_graph.copy()
+    #functions certain to be dropped from the call graph once built
+    g.remove_nodes_from([f for f, scan in scans.items() if f != "_main" and not scan[2] and f in g])
+    allowed = traversal.can_reach(g, {f for f, scan in scans.items() if scan[1]})
+    needed = {f for f, scan in scans.items() if scan[0]}
+    seen = set(needed)
+    stack = [f for f in needed if f in g]
+    while stack:
+        for callee in g.successors(stack.pop()):
+            if callee in allowed and callee not in seen:
+                seen.add(callee)
+                stack.append(callee)
+    return needed | (seen & set(scans))
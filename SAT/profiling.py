@@ -0,0 +1,84 @@
+# profiling.py
+#
+# Per-stage timing of find_vuls (--profile). Each analysis gets a Profiler on
+# its AnalysisContext; stages add their wall time to it and the agents count
+# the graph nodes they visit. main.py writes one JSON record per file and
+# prints a run-level summary table.
+
+import json
+import time
+
+# Stages in pipeline order (used for the summary table)
+STAGES = [
+    "strip_comments", "fcg", "segmentation", "labels", "cfg", "dvg", "pdg_merge",
+    "travel", "slicing", "verification", "gpt", "csv",
+]
+
+
+class Profiler:
+    def __init__(self):
+        self.times = {}
+        self.visits = {}
+
+    def add(self, stage, seconds):
+        self.times[stage] = self.times.get(stage, 0.0) + seconds
+
+    def visit(self, agent, count=1):
+        self.visits[agent] = self.visits.get(agent, 0) + count
+
+    def record(self, file):
+        """JSON-ready per-file record; stage times in milliseconds."""
+        return {
+            "file": file,
+            "stages_ms": {s: round(t * 1000, 3) for s, t in self.times.items()},
+            "total_ms": round(sum(self.times.values()) * 1000, 3),
+            "visits": dict(self.visits),
+        }
+
+
+def start(profile):
+    """Start timing a stage; returns None when profiling is off."""
+    return time.perf_counter() if profile is not None else None
+
+
+def stop(profile, stage, started):
+    if profile is not None:
+        profile.add(stage, time.perf_counter() - started)
+
+
+class ProfileSummary:
+    """Aggregates per-file records and writes them as JSON Lines."""
+
+    def __init__(self, jsonl_path=None):
+        self.files = 0
+        self.stage_ms = {}
+        self.visits = {}
+        self._out = open(jsonl_path, "w", encoding="utf-8") if jsonl_path else None
+
+    def add(self, record):
+        self.files += 1
+        for stage, ms in record.get("stages_ms", {}).items():
+            self.stage_ms[stage] = self.stage_ms.get(stage, 0.0) + ms
+        for agent, n in record.get("visits", {}).items():
+            self.visits[agent] = self.visits.get(agent, 0) + n
+        if self._out is not None:
+            self._out.write(json.dumps(record) + "\n")
+
+    def close(self):
+        if self._out is not None:
+            self._out.close()
+            self._out = None
+
+    def print_table(self):
+        total = sum(self.stage_ms.values()) or 1.0
+        print(f"\nProfile ({self.files} files):")
+        print(f"{'stage':<16} {'total ms':>12} {'ms/file':>10} {'share':>7}")
+        ordered = [s for s in STAGES if s in self.stage_ms] + \
+                  sorted(s for s in self.stage_ms if s not in STAGES)
+        for stage in ordered:
+            ms = self.stage_ms[stage]
+            print(f"{stage:<16} {ms:>12.1f} {ms / max(self.files, 1):>10.3f} {ms / total:>7.1%}")
+        if self.visits:
+            print(f"{'agent':<20} {'nodes visited':>14}")
+            for agent, n in sorted(self.visits.items()):
+                print(f"{agent:<20} {n:>14}")
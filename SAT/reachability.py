@@ -0,0 +1,179 @@
+# reachability.py
+#
+# Per-PDG reachability index. For one kind of edges (data, control or any),
+# the transitive closure of a compact_graph.CompactGraph is kept as one
+# bitset (an int) per node, computed once over the strongly connected
+# components. "Can node A reach a node labelled B?" is then a bit test:
+# FlowAgent answers from it, and the verification rejects entry points that
+# cannot reach a sink before solving their taint. The query functions at the
+# end work on the knowledge graph (AnalysisContext.kg) directly.
+
+from compact_graph import BLUE, RED, GREEN
+
+# Edge kinds (color bits an edge must have one of)
+DATA = GREEN | RED
+CONTROL = BLUE | GREEN
+ANY = BLUE | RED | GREEN
+
+# Closures take nodes^2 bits; bigger graphs are searched instead
+MAX_NODES = 5000
+
+
+class ReachabilityIndex:
+    """Nodes reachable from each node of graph along edges of the given colors.
+
+    closure[u] has bit v set when a path of one or more edges leads from u
+    to v (so u itself only when it is on a cycle). The "return" node is left
+    out, as the agents never step into it.
+    """
+
+    def __init__(self, graph, colors):
+        self.colors = colors
+        self.closure = _closure(graph, colors)
+
+    def reaches(self, u, v):
+        return bool(self.closure[u] >> v & 1)
+
+    def reaches_any(self, u, targets):
+        """True when u reaches a node in targets (a bitset of node ids)."""
+        return bool(self.closure[u] & targets)
+
+    def reachable(self, u):
+        closure = self.closure[u]
+        return [v for v in range(closure.bit_length()) if closure >> v & 1]
+
+
+def _closure(graph, colors):
+    offsets, targets, bits = graph.offsets, graph.targets, graph.bits
+    skip = graph.return_id
+    count = len(graph)
+
+    def successors(node):
+        return [targets[p] for p in range(offsets[node], offsets[node + 1])
+                if bits[p] & colors and targets[p] != skip]
+
+    # Iterative Tarjan: components come out after every component they reach
+    closure = [0] * count
+    index = [-1] * count
+    low = [0] * count
+    on_stack = [False] * count
+    stack = []
+    counter = 0
+    for root in range(count):
+        if index[root] != -1:
+            continue
+        work = [(root, iter(successors(root)))]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        while work:
+            node, it = work[-1]
+            child = next(it, None)
+            if child is not None:
+                if index[child] == -1:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack[child] = True
+                    work.append((child, iter(successors(child))))
+                elif on_stack[child]:
+                    low[node] = min(low[node], index[child])
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] != index[node]:
+                continue
+            members = []
+            while True:
+                member = stack.pop()
+                on_stack[member] = False
+                members.append(member)
+                if member == node:
+                    break
+            component = 0
+            for member in members:
+                component |= 1 << member
+            reach = 0
+            cyclic = len(members) > 1
+            for member in members:
+                for s in successors(member):
+                    if component >> s & 1:
+                        cyclic = True
+                    else:
+                        reach |= (1 << s) | closure[s]
+            if cyclic:
+                reach |= component
+            for member in members:
+                closure[member] = reach
+    return closure
+
+
+def index(graph, colors):
+    """ReachabilityIndex of graph for colors, built on the first query; None for graphs over MAX_NODES."""
+    if len(graph) > MAX_NODES:
+        return None
+    key = ("reachability", colors)
+    found = graph.indexes.get(key)
+    if found is None:
+        found = graph.indexes[key] = ReachabilityIndex(graph, colors)
+    return found
+
+
+def label_nodes(graph, label):
+    """Bitset of the nodes of graph carrying label."""
+    nodes = graph.indexes.get("labels")
+    if nodes is None:
+        nodes = graph.indexes["labels"] = {}
+        for i, node_label in enumerate(graph.labels):
+            if node_label != "":
+                nodes[node_label] = nodes.get(node_label, 0) | (1 << i)
+    return nodes.get(label, 0)
+
+
+def reaches_label(graph, node, label, colors):
+    """Whether node reaches a node labelled label, from the index; None over MAX_NODES."""
+    found = index(graph, colors)
+    if found is None:
+        return None
+    return found.reaches_any(node, label_nodes(graph, label))
+
+
+# Queries over the knowledge graph (function name -> (pdg, labels, ...))
+
+def can_reach(kg, func, source, target, colors=ANY):
+    """True when node id source of func reaches node id target."""
+    graph = kg[func][0]
+    found = index(graph, colors)
+    if found is not None:
+        return found.reaches(source, target)
+    import traversal
+    return traversal.reaches(graph, source, lambda n, s, c: bool(c & colors), lambda s: s == target)
+
+
+def reachable_sinks(kg, func, source, colors=DATA):
+    """Sink labels of func reachable from node id source."""
+    graph = kg[func][0]
+    return [label for label in kg[func][1] if "sink" in label[0] and
+            _reaches(graph, source, label, colors)]
+
+
+def entry_sink_pairs(kg, func, colors=DATA):
+    """(entry point label, sink label) pairs of func where the entry point reaches the sink."""
+    graph = kg[func][0]
+    pairs = []
+    for i, label in enumerate(graph.labels):
+        if label != "" and label[0] == "entry_point":
+            pairs.extend((label, sink) for sink in reachable_sinks(kg, func, i, colors))
+    return pairs
+
+
+def _reaches(graph, source, label, colors):
+    found = reaches_label(graph, source, label, colors)
+    if found is None:
+        import traversal
+        found = traversal.reaches(graph, source, lambda n, s, c: bool(c & colors),
+                                  lambda s: graph.labels[s] == label)
+    return found
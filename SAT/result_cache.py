@@ -0,0 +1,125 @@
+# result_cache.py
+#
+# Content-addressed on-disk cache of per-file analysis results, so unchanged
+# files are not re-parsed on every scan. One JSON file per entry; the file
+# mtime doubles as the LRU timestamp.
+
+import os
+import glob
+import json
+import hashlib
+import tempfile
+
+# Environment flags that change what find_vuls reports for a given file
+KEY_FLAGS = [
+    "MLKG_GPT_ENABLED", "MLKG_GPT_ONLY", "MLKG_GPT_BATCH",
+    "MLKG_GPT_BATCH_SIZE", "MLKG_GPT_INCLUDE_FILE", "MLKG_MAX_CALL_DEPTH", "MLKG_ENGINE",
+    "MLKG_LAZY_PDG",
+]
+
+_analyzer_version = None
+
+
+def analyzer_version():
+    """Hash of the analyzer sources; any code change invalidates older entries."""
+    global _analyzer_version
+    if _analyzer_version is None:
+        h = hashlib.sha256()
+        base = os.path.dirname(os.path.abspath(__file__))
+        for name in sorted(glob.glob(os.path.join(base, "*.py"))):
+            h.update(os.path.basename(name).encode("utf-8"))
+            with open(name, "rb") as f:
+                h.update(f.read())
+        _analyzer_version = h.hexdigest()[:16]
+    return _analyzer_version
+
+
+class ResultCache:
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, file_path, type=False):
+        """Cache key for a file: content hash, analyzer version, sink filter and flags."""
+        h = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            h.update(f.read())
+        h.update(b"\0" + analyzer_version().encode("utf-8"))
+        h.update(b"\0" + str(type or "").encode("utf-8"))
+        for name in KEY_FLAGS:
+            h.update(b"\0" + f"{name}={os.getenv(name, '')}".encode("utf-8"))
+        return h.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def get(self, key):
+        """Return the stored record for key, or None. Hits refresh the LRU timestamp."""
+        entry = self._entry_path(key)
+        try:
+            with open(entry, "r", encoding="utf-8") as f:
+                record = json.load(f)
+            os.utime(entry, None)
+            return record
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, record):
+        """Store a record atomically (safe with several writer processes)."""
+        tmp = None
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(record, f)
+            os.replace(tmp, self._entry_path(key))
+        except (OSError, TypeError, ValueError):
+            if tmp is not None:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+
+    def prune(self):
+        """Evict least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for name in glob.glob(os.path.join(self.cache_dir, "*.json")):
+            try:
+                st = os.stat(name)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+            total += st.st_size
+        entries.sort()
+        for _mtime, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(name)
+                total -= size
+            except OSError:
+                pass
+        return total
+
+
+def from_env():
+    """Build the cache configured by MLKG_CACHE* flags, or None when disabled."""
+    if os.getenv("MLKG_CACHE", "1") != "1" or os.getenv("MLKG_DEBUG", "0") == "1":
+        # Debug output is for diagnosing a live run, never replay it
+        return None
+    if os.getenv("MLKG_EXPORT_GRAPHS"):
+        # Exporting needs the graphs, which a cache hit never builds
+        return None
+    if os.getenv("MLKG_PROFILE", "0") == "1":
+        # A replayed result has no stage timings to report
+        return None
+    cache_dir = os.getenv("MLKG_CACHE_DIR") or os.path.join(os.getcwd(), "AI_results", "cache")
+    try:
+        max_mb = float(os.getenv("MLKG_CACHE_MAX_MB", "512"))
+    except Exception:
+        max_mb = 512.0
+    try:
+        return ResultCache(cache_dir, int(max_mb * 1024 * 1024))
+    except OSError:
+        return None
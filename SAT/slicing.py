@@ -0,0 +1,126 @@
+# slicing.py
+#
+# Backward slices over the data edges of a PDG (compact_graph.CompactGraph,
+# integer node ids), for the backward engine (--engine backward). The forward
+# engine starts at every entry point and follows it down every call path;
+# sinks are usually far rarer than entry points, so the backward engine starts
+# at the sinks instead (SliceAgent, agents.py). A slice runs the transfer
+# function of taint.solve in reverse, from roots (the variables of a sink)
+# back to every node:
+#   R_out(n) = root variables of n + R_in(m) over the data edges n -> m
+#   R_in(m)  = R_out(m) - variables sanitized on m's line
+#              + the variables m's right side uses, when m assigns one of R_out(m)
+# A variable tainted at node n can reach a root only if it is in the slice at
+# n. Uses are substring tests in taint.solve ("var in rhs"), so the variables
+# a right side uses are kept as the node that uses them rather than as names.
+# Sanitizers jumped over by an edge (taint._skip) are not subtracted, so a
+# slice may keep more than the solver taints, never less; SliceAgent's
+# candidates are still verified forward.
+
+from collections import deque
+
+import taint
+from compact_graph import GREEN, RED
+
+
+class Slice:
+    """Variables that can reach the roots of a backward slice, per node."""
+
+    __slots__ = ("roots", "names", "uses", "texts")
+
+    def __init__(self, roots, names, uses, texts):
+        # node id -> variables a root needs tainted after the node
+        self.roots = roots
+        # node id -> variables whose taint after the node reaches a root
+        self.names = names
+        # node id -> nodes whose right-side uses reach a root through it
+        self.uses = uses
+        # node id -> (left side, right side) of its assignment
+        self.texts = texts
+
+    def relevant(self, node, var):
+        """True when var, tainted at node (on its line, or as a source there), can reach a root."""
+        if var in self.roots.get(node, ()) or var in self.names.get(node, ()):
+            return True
+        return any(_uses(self.texts[u], var) for u in self.uses.get(node, ()))
+
+    def __len__(self):
+        """Number of nodes in the slice."""
+        return len(set(self.names) | set(self.uses))
+
+
+def _uses(text, var):
+    lhs, rhs = text
+    return var in rhs and var not in lhs
+
+
+def data_predecessors(graph):
+    """Node id -> data-edge predecessors (the reverse of what taint.solve follows)."""
+    preds = graph.indexes.get("data_predecessors")
+    if preds is None:
+        offsets, targets, bits = graph.offsets, graph.targets, graph.bits
+        skip = graph.return_id
+        preds = graph.indexes["data_predecessors"] = [[] for _ in range(len(graph))]
+        for node in range(len(graph)):
+            if node == skip:
+                continue
+            for p in range(offsets[node], offsets[node + 1]):
+                if targets[p] != skip and bits[p] & (GREEN | RED):
+                    preds[targets[p]].append(node)
+    return preds
+
+
+def backward_slice(graph, lines, roots):
+    """Slice of graph back from roots, a {node id: variables tainted after it} dict.
+
+    lines are the processed lines of the function.
+    """
+    preds = data_predecessors(graph)
+    line_of = graph.lines
+    texts = {}
+    # R_out without the roots (what the successors need), and R_in
+    names = {}
+    uses = {}
+    in_names = {}
+    in_uses = {}
+    work = deque(roots)
+    queued = set(roots)
+    while work:
+        node = work.popleft()
+        queued.discard(node)
+        out_names = names.get(node, set()) | set(roots.get(node, ()))
+        out_uses = uses.get(node, set())
+
+        # R_in = R_out - kill + uses of the right side, when it assigns a needed variable
+        killed = taint._sanitizing(graph, node)
+        needed = {var for var in out_names if var not in killed}
+        needed_uses = set(out_uses)
+        lhs, rhs, dependent = taint._assignment(lines[line_of[node] - 1])
+        if dependent and dependent not in killed and (
+                dependent in out_names or any(_uses(texts[u], dependent) for u in out_uses)):
+            texts[node] = (lhs, rhs)
+            needed_uses.add(node)
+        if node in in_names and needed == in_names[node] and needed_uses == in_uses[node]:
+            continue
+        in_names[node] = needed
+        in_uses[node] = needed_uses
+
+        for pred in preds[node]:
+            pred_names = names.setdefault(pred, set())
+            pred_uses = uses.setdefault(pred, set())
+            if needed <= pred_names and needed_uses <= pred_uses:
+                continue
+            pred_names |= needed
+            pred_uses |= needed_uses
+            if pred not in queued:
+                queued.add(pred)
+                work.append(pred)
+    return Slice(roots, names, uses, texts)
+
+
+def label_roots(graph, label):
+    """Roots for a sink label: every node carrying it needs the sink's variables."""
+    variables = label[1] if isinstance(label[1], (list, tuple)) else ()
+    if not variables:
+        return {}
+    return {n: set(variables) for n, node_label in enumerate(graph.labels) if node_label == label}
@@ -0,0 +1,266 @@
+# summaries.py
+#
+# Per-function taint summaries for interprocedural verification. Every trial
+# used to re-walk the PDG of each function on its call path, so a helper
+# reached along many paths was traversed again for each one. The facts the
+# verification needs are pure functions of the file being analysed:
+#   - which callee parameter a tainted variable is bound to at a call
+#     (TranslationAgent),
+#   - which variables are tainted at each sink when a variable is tainted at
+#     a given line (DataAgent, solved in one pass for all the sinks and all
+#     the entry points and parameters of the function),
+#   - whether the sink is reachable through control flow (FlowAgent),
+#   - which parameters reach a return statement (the same solve).
+# They are computed on first use and kept for the rest of the file, so
+# verifying a call path composes cached per-function results. The return
+# summaries are also composed at call sites: when a call's result is
+# assigned, the solver only sees the arguments that reach the callee's
+# return value (lines).
+
+import re
+
+import networkx as nx
+
+import agents
+import dvg
+import pdg
+import reachability
+
+
+_RETURN = re.compile(r"\breturn\b(.*)")
+# A call by name, not a method or static call
+_CALL = re.compile(r"(?<![\w$>:])(\w+)\s*\(")
+
+
+class FunctionSummaries:
+    def __init__(self, context):
+        self.context = context
+        self._nodes = {}
+        self._bindings = {}
+        self._sources = {}
+        self._taint = {}
+        self._data = {}
+        self._flow = {}
+        self._returns = {}
+        self._graphs = {}
+        self._lines = {}
+        self._recursive = None
+
+    def node(self, func, index):
+        """PDG node id of func for processed line index + 1."""
+        nodes = self._nodes.get(func)
+        if nodes is None:
+            nodes = self._nodes[func] = {}
+            graph = self.graph(func)
+            for n, line in enumerate(graph.lines):
+                # First node per line, as the linear scan used to pick
+                if n != graph.return_id and line not in nodes:
+                    nodes[line] = n
+        if index + 1 not in nodes:
+            raise IndexError(f"no PDG node for line {index + 1} of {func}")
+        return nodes[index + 1]
+
+    def graph(self, func):
+        """PDG of func: the knowledge graph's, or one built here when lazy construction skipped it."""
+        if func in self.context.kg:
+            return self.context.kg[func][0]
+        graph = self._graphs.get(func)
+        if graph is None:
+            graph = self._graphs[func] = pdg.to_pdg(
+                self.context.functions[func], False, self.context.line_mappings.get(func))[0]
+        return graph
+
+    def binding(self, func, start, var, callee):
+        """Parameter of callee bound to var by the calls reachable from start ("" if none)."""
+        key = (func, start, var, callee)
+        if key not in self._bindings:
+            translations = agents.TranslationAgent(f"{func}_translation", self.context).translate(
+                self.graph(func), self.node(func, start), var, func, callee)
+            self._bindings[key] = translations[-1] if translations else ""
+        return self._bindings[key]
+
+    def reaches_sink(self, func, start, var, sink):
+        """True when var, tainted at line start of func, reaches sink."""
+        key = (func, start, var, sink)
+        if key not in self._data and reachability.reaches_label(
+                self.graph(func), self.node(func, start), sink, reachability.DATA) is False:
+            # Rejected by the reachability index, without solving the taint
+            self._data[key] = False
+        if key not in self._data:
+            data_agent = agents.DataAgent(self.graph(func), [var], sink, func, self.context)
+            self._data[key] = data_agent.sink_tainted(*self.tainted(func, start, var, data_agent))
+        if not self._data[key]:
+            return False
+        key = (func, start, sink)
+        if key not in self._flow:
+            flow_agent = agents.FlowAgent(self.graph(func), sink, self.context)
+            self._flow[key] = flow_agent.flow(self.node(func, start)) == "vulnerable"
+        return self._flow[key]
+
+    def add_source(self, func, start, var):
+        """Register var tainted at line start of func, to be solved with the other sources of func."""
+        sources = self._function_sources(func)
+        if (start, var) not in sources:
+            try:
+                sources[(start, var)] = self.node(func, start)
+            except IndexError:
+                pass
+
+    def _function_sources(self, func):
+        # (line, variable) -> PDG node id; the parameters of func are always sources
+        sources = self._sources.get(func)
+        if sources is None:
+            sources = self._sources[func] = {}
+            for param in self._params(func):
+                self.add_source(func, 0, param)
+        return sources
+
+    def tainted(self, func, start, var, data_agent):
+        """(taint.Taint of the sources of func, bit of var tainted at line start).
+
+        Every registered source of func is solved in the same pass; a new
+        source makes the next call solve them all again.
+        """
+        sources = self._function_sources(func)
+        if (start, var) not in sources:
+            sources[(start, var)] = self.node(func, start)
+        solved = self._taint.get(func)
+        if solved is None or len(solved[0]) < len(sources):
+            keys = list(sources)
+            solved = self._taint[func] = (
+                {key: i for i, key in enumerate(keys)},
+                data_agent.solve([(sources[key], [key[1]]) for key in keys]))
+        return solved[1], solved[0][(start, var)]
+
+    def returns(self, func):
+        """Parameters of func whose taint reaches the value of one of its return statements."""
+        found = self._returns.get(func)
+        if found is None:
+            found = self._returns[func] = self._returned(func)
+        return found
+
+    def _returned(self, func):
+        params = self._params(func)
+        if not params:
+            return []
+        graph = self.graph(func)
+        lines = self.lines(func)
+        data_agent = agents.DataAgent(graph, [], None, func, self.context)
+        try:
+            header = self.node(func, 0)
+            bits = {p: self.tainted(func, 0, p, data_agent)[1] for p in params}
+        except IndexError:
+            # No PDG node to start from: assume every parameter is returned
+            return params
+        solution = self._taint[func][1]
+        returned = 0
+        for node in range(len(graph)):
+            match = node != graph.return_id and _RETURN.search(lines[graph.lines[node] - 1])
+            if not match:
+                continue
+            for var, sources in solution.variables(solution.out.get(node, 0)).items():
+                if var in match.group(1):
+                    returned |= sources
+            if node == header:
+                # The parameters are only seeded there, not in its facts
+                for p in params:
+                    if p in match.group(1):
+                        returned |= 1 << bits[p]
+        return [p for p in params if returned >> bits[p] & 1]
+
+    def lines(self, func):
+        """Lines of func as the taint solver reads them.
+
+        A call to a function of the file on the right side of an assignment
+        keeps only the arguments that reach the callee's return value, so
+        the assigned variable is only tainted through those. Calls into
+        recursive functions are kept whole.
+        """
+        found = self._lines.get(func)
+        if found is None:
+            found = self.context.functions[func]
+            # The header of a function is its own declaration, not a call
+            skip = 0 if func == "_main" else 1
+            found = self._lines[func] = found[:skip] + [self._returned_arguments(line) for line in found[skip:]]
+        return found
+
+    def _returned_arguments(self, line):
+        sides = line.split("=", 1)
+        if len(sides) < 2 or "(" not in sides[1]:
+            return line
+        rhs = sides[1]
+        functions = self.context.functions
+        # Right to left, so the offsets of the earlier calls stay valid
+        for match in reversed(list(_CALL.finditer(rhs))):
+            callee = match.group(1)
+            if callee == "_main" or not functions.get(callee) or callee in self.recursive():
+                continue
+            found = _arguments(rhs, match.end())
+            if found is None:
+                continue
+            args, end = found
+            if any("{" in arg or "}" in arg for arg in args):
+                continue
+            params = self._params(callee)
+            returned = set(self.returns(callee))
+            # Arguments past the declared parameters are kept (func_get_args)
+            kept = [arg.strip() for i, arg in enumerate(args) if i >= len(params) or params[i] in returned]
+            rhs = rhs[:match.end()] + ", ".join(kept) + rhs[end:]
+        return sides[0] + "=" + rhs
+
+    def recursive(self):
+        """Functions of the file that can call themselves, directly or not."""
+        if self._recursive is None:
+            functions = self.context.functions
+            calls = nx.DiGraph()
+            for func, lines in functions.items():
+                for line in lines[0 if func == "_main" else 1:]:
+                    for match in _CALL.finditer(line):
+                        if match.group(1) in functions and match.group(1) != "_main":
+                            calls.add_edge(func, match.group(1))
+            self._recursive = {func for component in nx.strongly_connected_components(calls)
+                               for func in component
+                               if len(component) > 1 or calls.has_edge(func, func)}
+        return self._recursive
+
+    def _params(self, func):
+        if func != "_main" and self.context.functions.get(func):
+            return dvg.get_vars_func(self.context.functions[func][0], func)
+        return []
+
+    def summary(self, func):
+        """Which parameters of func reach which of its sinks and its return value, and its sanitizers."""
+        labels = self.context.kg[func][1]
+        sinks = [x for x in labels if "sink" in x[0]]
+        return {
+            "params": {p: [s for s in sinks if self.reaches_sink(func, 0, p, s)] for p in self._params(func)},
+            "returns": self.returns(func),
+            "sanitizers": [x for x in labels if "sanitization" in x[0]],
+        }
+
+
+def _arguments(text, start):
+    """(arguments, offset of the closing parenthesis) of the call whose "(" ends at start; None if unclosed."""
+    args = []
+    depth = 0
+    quote = None
+    begin = start
+    for i in range(start, len(text)):
+        ch = text[i]
+        if quote:
+            if ch == quote and text[i - 1] != "\\":
+                quote = None
+        elif ch in "'\"":
+            quote = ch
+        elif ch in "([":
+            depth += 1
+        elif ch in ")]":
+            if depth == 0:
+                if text[begin:i].strip() or args:
+                    args.append(text[begin:i])
+                return args, i
+            depth -= 1
+        elif ch == "," and depth == 0:
+            args.append(text[begin:i])
+            begin = i + 1
+    return None
@@ -0,0 +1,279 @@
+# taint.py
+#
+# Worklist taint solver over the data edges of a PDG (compact_graph
+# CompactGraph, integer node ids). DataAgent used to walk the PDG depth-first
+# and update one shared list of tainted variables as it went, so its answer
+# depended on the visit order. Here every node gets its own tainted set,
+# computed to a fixpoint:
+#   IN(n)  = union of OUT(p) over the data edges p -> n
+#   OUT(n) = IN(n) + variables assigned from a tainted one on n's line (gen)
+#            - variables sanitized on n's line (kill)
+# Sanitizers also kill along edges that jump over their line, when they run
+# on every path between the edge's ends (_skip).
+# Facts carry the sources (entry points, parameters) they come from, so all
+# the sources of a function are solved in one pass. A node's facts are one
+# int: variable number v owns bits [v * width, (v + 1) * width), one per
+# source, so unions, kills and subset tests are integer operations.
+# Sets only grow, so every node is re-queued a bounded number of times.
+
+import re
+from collections import deque
+
+import dvg
+from compact_graph import GREEN, RED
+
+_LHS_VAR = re.compile(r'\$([^\s]+)')
+
+
+def dependent_variable(line, var):
+    """Variable assigned on line from an expression using var ("" if none)."""
+    lhs, rhs, dependent = _assignment(line)
+    if dependent and var in rhs and var not in lhs:
+        return dependent
+    return ""
+
+
+def _assignment(line):
+    # (left side, right side, variable assigned) of the first "=" on line
+    sides = line.split("=", 1)
+    if len(sides) > 1:
+        match = _LHS_VAR.search(sides[0])
+        if match:
+            return sides[0], sides[1], match.group(0).strip()
+    return "", "", ""
+
+
+class Taint:
+    """Solution of solve: packed facts per node and per label, and the variable numbering."""
+
+    __slots__ = ("out", "labels", "names", "width")
+
+    def __init__(self, out, labels, names, width):
+        # node id -> packed facts after the node
+        self.out = out
+        # label -> packed facts over the nodes carrying it
+        self.labels = labels
+        # variable -> number
+        self.names = names
+        # bits per variable (number of sources)
+        self.width = width
+
+    def sources(self, label, var):
+        """Bitset of the sources tainting var at the nodes labelled label."""
+        number = self.names.get(var)
+        if number is None:
+            return 0
+        return (self.labels.get(label, 0) >> (number * self.width)) & ((1 << self.width) - 1)
+
+    def variables(self, facts):
+        """{variable: bitset of sources} of packed facts."""
+        full = (1 << self.width) - 1
+        found = {}
+        for var, number in self.names.items():
+            sources = (facts >> (number * self.width)) & full
+            if sources:
+                found[var] = sources
+        return found
+
+
+def _sanitizing(graph, node):
+    label = graph.labels[node]
+    if label != "" and label.bit & dvg.SANITIZER and isinstance(label.vars, (list, tuple)):
+        return label.vars
+    return ()
+
+
+def _reach(graph, sources):
+    """Node id -> bitset of the sources reaching it along data edges (starts only via an edge)."""
+    offsets, targets, bits = graph.offsets, graph.targets, graph.bits
+    reached = {}
+    work = deque((start, 1 << i) for i, (start, _) in enumerate(sources))
+    while work:
+        node, mask = work.popleft()
+        for p in range(offsets[node], offsets[node + 1]):
+            successor = targets[p]
+            if successor == graph.return_id or not bits[p] & (GREEN | RED):
+                continue
+            if mask & ~reached.get(successor, 0):
+                reached[successor] = reached.get(successor, 0) | mask
+                work.append((successor, reached[successor]))
+    return reached
+
+
+def solve(graph, sources, lines):
+    """Tainted variables after every node reached along data edges, for many sources at once.
+
+    sources are (start node id, variables tainted there) pairs; source i
+    owns bit i of every variable, so one pass gives the same sets as
+    solving each source on its own. lines are the processed lines of the
+    function. Returns a Taint; a start node only has facts when an edge
+    leads back to it.
+    """
+    offsets, targets, bits = graph.offsets, graph.targets, graph.bits
+    skip = graph.return_id
+    line_of = graph.lines
+    width = max(len(sources), 1)
+    full = (1 << width) - 1
+    reached = _reach(graph, sources)
+
+    # Number every variable that can be tainted: the seeds, and whatever a
+    # reachable line assigns
+    names = {}
+    for _, tainted in sources:
+        for var in tainted:
+            names.setdefault(var, len(names))
+    parsed = {}
+    for node in reached:
+        parsed[node] = _assignment(lines[line_of[node] - 1])
+        if parsed[node][2]:
+            names.setdefault(parsed[node][2], len(names))
+
+    # Per node: slots of the variables its right side uses (gen), slot of
+    # the variable it assigns, and the facts it kills
+    gen = {}
+    kill = {}
+    sanitizers = []
+    for node in reached:
+        lhs, rhs, dependent = parsed[node]
+        if dependent:
+            used = [n * width for var, n in names.items() if var in rhs and var not in lhs]
+            if used:
+                gen[node] = (used, names[dependent] * width)
+        killed = {names[var] for var in _sanitizing(graph, node) if var in names}
+        if killed:
+            kill[node] = sum(full << (n * width) for n in killed)
+            # for _skip: only the sources that reach the sanitizer
+            sanitizers.append((line_of[node], sum(reached[node] << (n * width) for n in killed)))
+
+    seeds = {}
+    for i, (start, tainted) in enumerate(sources):
+        for var in tainted:
+            seeds[start] = seeds.get(start, 0) | (1 << (names[var] * width + i))
+
+    skipped = {}
+    nesting = _nesting(lines) if sanitizers else None
+    ins = {}
+    out = {}
+    work = deque(seeds)
+    queued = set(seeds)
+    while work:
+        node = work.popleft()
+        queued.discard(node)
+        current = out.get(node, 0) | seeds.get(node, 0)
+        for p in range(offsets[node], offsets[node + 1]):
+            successor = targets[p]
+            # Data dependencies only; pure control-flow edges are not followed
+            if successor == skip or not bits[p] & (GREEN | RED):
+                continue
+            passed = current
+            if passed and sanitizers:
+                span = (line_of[node], line_of[successor])
+                if span not in skipped:
+                    skipped[span] = _skip(sanitizers, *span, nesting, lines)
+                passed &= ~skipped[span]
+            before = ins.get(successor)
+            if before is not None and not passed & ~before:
+                continue
+            after = ins[successor] = passed if before is None else before | passed
+
+            # OUT = IN + gen - kill
+            result = after
+            if successor in gen:
+                used, slot = gen[successor]
+                tainted = 0
+                for u in used:
+                    tainted |= after >> u
+                tainted &= full
+                if tainted:
+                    result |= tainted << slot
+            if successor in kill:
+                result &= ~kill[successor]
+
+            if result != out.get(successor):
+                out[successor] = result
+                if successor not in queued:
+                    queued.add(successor)
+                    work.append(successor)
+    labels = {}
+    for node, facts in out.items():
+        label = graph.labels[node]
+        if label != "" and facts:
+            labels[label] = labels.get(label, 0) | facts
+    return Taint(out, labels, names, width)
+
+
+# A def-use edge can jump over a line that sanitizes the variable in place,
+# e.g. "$x = (int) $x;" uses $x twice, so the DVG does not treat it as a new
+# definition. Taint does not travel along such an edge, for the sources that
+# reach the sanitizer, when the sanitizer runs on every path from the edge's
+# source to its target: it dominates the target (_dominates) or follows the
+# source in its block (_post_dominates). A sanitizer in a branch or a loop
+# that only one end is in leaves the taint alone.
+def _skip(sanitizers, source_line, target_line, nesting, lines):
+    mask = 0
+    for line, facts in sanitizers:
+        if source_line < line < target_line and (_dominates(nesting, line, target_line)
+                                                 or _post_dominates(nesting, lines, source_line, line)):
+            mask |= facts
+    return mask
+
+
+_CONDITIONAL = re.compile(r"^\s*(}\s*)?(if|else|elseif|while|for|foreach|switch|case|default)\b")
+# Statements that leave a block for somewhere other than its end
+_JUMP = re.compile(r"\b(break|continue|goto)\b")
+
+
+def _nesting(lines):
+    """Per processed line: (depth at its start, lowest depth on it, depth after its leading "}"s, conditional)."""
+    found = []
+    depth = 0
+    for text in lines:
+        low = running = depth
+        lead = None
+        for ch in text:
+            if ch == "{":
+                running += 1
+            elif ch == "}":
+                running -= 1
+                low = min(low, running)
+                continue
+            elif ch in " \t":
+                continue
+            if lead is None:
+                lead = running
+        conditional = "{" in text or "}" in text or _CONDITIONAL.match(text) is not None
+        found.append((depth, low, running if lead is None else lead, conditional))
+        depth = running
+    return found
+
+
+def _dominates(nesting, line, target):
+    # line (an unconditional statement) is on every path to target: target
+    # is in the same block or a nested one, and no line between them leaves
+    # that block (a "}" that closes it, e.g. "} else {")
+    depth, _, _, conditional = nesting[line - 1]
+    if conditional:
+        return False
+    for k in range(line, target - 1):
+        if nesting[k][1] < depth:
+            return False
+    return nesting[target - 1][2] >= depth
+
+
+def _post_dominates(nesting, lines, source, line):
+    # line (an unconditional statement) is on every path from source (an
+    # unconditional statement of the same block) to whatever follows: no line
+    # between them leaves the block or jumps out of a loop. Paths that return
+    # or exit never reach the target, so they are allowed
+    depth, _, _, conditional = nesting[line - 1]
+    if conditional or nesting[source - 1][3] or nesting[source - 1][0] != depth:
+        return False
+    for k in range(source, line - 1):
+        if nesting[k][1] < depth or _JUMP.search(lines[k]):
+            return False
+    return True
+
+
+def tainted_labels(taint):
+    """Label -> {variable: bitset of sources} over the nodes carrying it."""
+    return {label: taint.variables(facts) for label, facts in taint.labels.items()}
@@ -0,0 +1,51 @@
+# Shared helpers for the SAT tests. The analyzer modules import each other as
+# top-level modules (as when running SAT/main.py), so SAT/ goes on sys.path.
+
+import os
+import sys
+
+import pytest
+
+SAT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE_DIR = os.path.dirname(SAT_DIR)
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+if SAT_DIR not in sys.path:
+    sys.path.insert(0, SAT_DIR)
+
+
+def function_pdg(code):
+    """(pdg, labels, processed lines) of a PHP snippet analysed as _main."""
+    import pdg
+
+    lines = [line for line in code.strip("\n").split("\n")]
+    return pdg.to_pdg(lines, False, list(range(1, len(lines) + 1)))[:2] + (lines,)
+
+
+def findings(path, **flags):
+    """(entry line, sink line, sink) of every finding find_vuls reports for a .php file.
+
+    flags override mlkg_assembler module flags for this run (e.g. ENGINE="backward").
+    """
+    import mlkg_assembler
+    from context import AnalysisContext
+
+    saved = {name: getattr(mlkg_assembler, name) for name in flags}
+    try:
+        for name, value in flags.items():
+            setattr(mlkg_assembler, name, value)
+        sink = []
+        mlkg_assembler.find_vuls(path[:-4], False, csv_sink=sink, context=AnalysisContext(path))
+    finally:
+        for name, value in saved.items():
+            setattr(mlkg_assembler, name, value)
+    return [(row["entry_line"], row["sink_line"], row["sink"]) for _, rows, _, _ in sink for row in rows]
+
+
+@pytest.fixture
+def php_file(tmp_path):
+    """Write PHP code to a temporary file and return its path."""
+    def write(code, name="test.php"):
+        path = tmp_path / name
+        path.write_text(code)
+        return str(path)
+    return write
@@ -0,0 +1,41 @@
+<?php
+function run($q, $n) {
+    $sql = "SELECT * FROM t WHERE id=" . $q;
+    mysql_query($sql);
+    echo $n;
+}
+function mid($a) {
+    run($a, 1);
+}
+function clean($v) {
+    $v = (int) $v;
+    run($v, 2);
+}
+function unused_sink($x) {
+    echo $x;
+    mysql_query($x);
+}
+function no_labels($a, $b) {
+    $c = $a + $b;
+}
+function read_input() {
+    $name = $_GET['name'];
+    echo $name;
+    return $name;
+}
+function helper($h) {
+    return $h . "x";
+}
+$x = $_GET['id'];
+$y = $_POST['n'];
+mid($x);
+run($_GET['z'], $y);
+clean($_GET['c']);
+$z = intval($_GET['k']);
+run($z, 2);
+$w = helper($_COOKIE['w']);
+echo $w;
+no_labels(1, 2);
+read_input();
+echo $_GET['e'];
+?>
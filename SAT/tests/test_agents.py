@@ -0,0 +1,56 @@
+from conftest import findings
+
+SHOW = """<?php
+function show($p) {
+    mysql_query($p);
+}
+$a = $_GET['x'];
+$b = 1;
+%s
+?>
+"""
+
+
+def test_argument_past_the_declared_parameters_binds_nothing(php_file):
+    # $a is passed third, but show declares one parameter
+    assert findings(php_file(SHOW % "show($b, $b, $a);")) == []
+
+
+def test_argument_in_range_still_binds(php_file):
+    assert findings(php_file(SHOW % "show($a, $b, $b);")) == [(5, 3, "sqli_sink")]
+
+
+# Forward binding needs no data flow from the entry point to the call, and a
+# failed binding is verified as "-" in the callee
+ENGINES = {
+    "overwritten": """<?php
+function show($p) {
+    mysql_query($p);
+}
+$a = $_GET['x'];
+$a = "safe";
+show($a);
+?>
+""",
+    "unbound": """<?php
+function show($p) {
+    $q = "a-" . $p;
+    mysql_query($q);
+}
+function mid($m) {
+    show(1);
+}
+$a = $_GET['x'];
+show(1);
+mid($a);
+?>
+""",
+}
+
+
+def test_backward_engine_finds_what_forward_verifies(php_file):
+    for name, code in ENGINES.items():
+        path = php_file(code, name + ".php")
+        forward = findings(path)
+        assert forward, name
+        assert findings(path, ENGINE="backward") == forward, name
@@ -0,0 +1,22 @@
+import glob
+import os
+
+import benchmark
+import mlkg_assembler
+from conftest import BASE_DIR
+
+
+def test_uncompiled_line_patterns_match_dvg():
+    # The baseline --lines compares against must do the same work as dvg
+    files = sorted(glob.glob(os.path.join(BASE_DIR, "Samples", "*", "*.php")))[::20]
+    lines = ["$s = new Sanitizer();", "$s->sanitize($x);", "$a = $s->getData();",
+             "$b = $s->data;", "$c = $t->getValue();"]
+    checked = [lines]
+    for path in files:
+        checked.append(mlkg_assembler.remove_html_comments(mlkg_assembler.removeComments(path)))
+    for lines in checked:
+        compiled, uncompiled = set(), set()
+        for line in lines:
+            assert benchmark._line_patterns(line, compiled) == \
+                benchmark._line_patterns_uncompiled(line, uncompiled), line
+        assert compiled == uncompiled
@@ -0,0 +1,49 @@
+import networkx as nx
+
+from compact_graph import BLUE, RED, GraphBuilder
+
+
+def build(edges):
+    builder, reference = GraphBuilder(), nx.MultiDiGraph()
+    for u, v, color in edges:
+        builder.add_edge(u, v, color=color)
+        reference.add_edge(u, v, color=color)
+    return builder, reference
+
+
+def test_freeze_keeps_networkx_order_and_keys():
+    builder, reference = build([((1, ""), (2, ""), "b"), ((1, ""), (3, ""), "r"),
+                                ((1, ""), (2, ""), "r"), ((2, ""), "return", "b")])
+    graph = builder.freeze()
+    assert [graph.node(i) for i in graph] == list(reference.nodes)
+    assert list(graph.to_networkx().edges(keys=True, data=True)) == list(reference.edges(keys=True, data=True))
+    assert graph.number_of_edges() == reference.number_of_edges()
+
+
+def test_nodes_are_dense_ids_with_side_tables():
+    builder, _ = build([((1, ""), (2, "x"), "b"), ((2, "x"), "return", "b")])
+    graph = builder.freeze()
+    assert list(graph) == [0, 1, 2]
+    assert list(graph.lines) == [1, 2, -1]
+    assert graph.labels == ["", "x", ""]
+    assert graph.return_id == 2
+    assert graph.node_id((2, "x")) == 1
+
+
+def test_edge_lookup():
+    builder, _ = build([((1, ""), (2, ""), "b"), ((1, ""), (2, ""), "r"), ((2, ""), (3, ""), "r")])
+    graph = builder.freeze()
+    assert graph.edge_mask(0, 1) == BLUE | RED
+    assert graph.edge_mask(1, 0) == 0
+    assert graph.edge_mask(9, 0) == 0
+    assert graph.edge_label(0, 1) is None
+    assert list(graph.successor_ids(0)) == [1]
+
+
+def test_removed_edge_moves_successor_last():
+    builder = GraphBuilder()
+    builder.add_edge((1, ""), (2, ""))
+    builder.add_edge((1, ""), (3, ""))
+    builder.remove_edge((1, ""), (2, ""), 0)
+    builder.add_edge((1, ""), (2, ""), 0, color="g")
+    assert list(builder.freeze().successor_ids(0)) == [2, 1]
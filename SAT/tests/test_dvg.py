@@ -0,0 +1,63 @@
+import glob
+import os
+import random
+
+import annotate
+import dvg
+import mlkg_assembler
+from conftest import BASE_DIR
+
+
+def random_function(seed, statements=120):
+    """Function body using $a/$b in nested ifs, else branches and loops."""
+    rng = random.Random(seed)
+    lines = ["$a = $_GET['a'];", "$b = $_POST['b'];"]
+    depth = 0
+    for _ in range(statements):
+        choice = rng.random()
+        if choice < 0.15 and depth < 4:
+            lines.append(f"if ($a > {rng.randint(0, 9)}) {{")
+            depth += 1
+        elif choice < 0.22 and depth < 4:
+            lines.append("while ($b) {")
+            depth += 1
+        elif choice < 0.32 and depth:
+            lines.append("} else {" if rng.random() < 0.5 else "}")
+            if lines[-1] == "}":
+                depth -= 1
+        else:
+            lines.append(rng.choice([
+                "$a = $a . 'x';", "$b = $a;", "echo $a;", "$a = $b . $b;",
+                "mysql_query($b);", "$c = $a . $b;", "$a = (int) $a;", "echo $b . $a;"]))
+    lines += ["}"] * depth
+    return lines
+
+
+def occurrences(lines):
+    return dvg.variable_occurrences(annotate.annotate_lines(lines))
+
+
+def both_paths(nodes, monkeypatch):
+    monkeypatch.setattr(dvg, "_DIRECT_SCAN_MAX", len(nodes) + 1)
+    direct = dvg.def_use_edges(nodes)
+    monkeypatch.setattr(dvg, "_DIRECT_SCAN_MAX", 0)
+    return direct, dvg.def_use_edges(nodes)
+
+
+def test_indexed_def_use_edges_match_the_direct_scan(monkeypatch):
+    checked = 0
+    for seed in range(40):
+        for var, nodes in occurrences(random_function(seed)).items():
+            direct, indexed = both_paths(nodes, monkeypatch)
+            assert indexed == direct, (seed, var)
+            checked += len(nodes) > 48
+    # Most variables are over the threshold that switches to the index
+    assert checked >= 40
+
+
+def test_indexed_def_use_edges_match_on_samples(monkeypatch):
+    for path in sorted(glob.glob(os.path.join(BASE_DIR, "Samples", "*", "*.php")))[::25]:
+        lines = mlkg_assembler.remove_html_comments(mlkg_assembler.removeComments(path))
+        for var, nodes in occurrences(lines).items():
+            direct, indexed = both_paths(nodes, monkeypatch)
+            assert indexed == direct, (path, var)
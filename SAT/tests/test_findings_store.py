@@ -0,0 +1,38 @@
+import csv
+
+import findings_store
+
+
+def row(entry_line, sink_line, sink="sqli_sink", note=""):
+    return {"file": "a.php", "entry": "$_GET", "entry_line": entry_line, "sink": sink,
+            "sink_line": sink_line, "sanitized": "No", "detection_note": note, "gpt_verdict": ""}
+
+
+def read(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_rows_are_unique_and_first_wins(tmp_path):
+    store = findings_store.FindingsStore(str(tmp_path / "findings.db"), batch_size=1)
+    store.add([row(3, 7, note="first"), row(3, 7, note="second"), row(3, 8)], {"file": "a.php", "xss": 0, "sqli": 1})
+    # Line numbers as ints and as CSV text are the same key
+    store.add([row("3", "7", note="third")], {"file": "a.php", "xss": 1, "sqli": 1})
+    store.export_csv(str(tmp_path))
+    store.close()
+
+    rows = read(tmp_path / "vulnerabilities.csv")
+    assert [(r["entry_line"], r["sink_line"], r["detection_note"]) for r in rows] == [("3", "7", "first"), ("3", "8", "")]
+    assert read(tmp_path / "file_summary.csv") == [{"file": "a.php", "xss": "1", "sqli": "1"}]
+
+
+def test_new_store_imports_existing_csv(tmp_path):
+    with open(tmp_path / "vulnerabilities.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=findings_store.VULNERABILITY_FIELDS)
+        writer.writeheader()
+        writer.writerow(row(1, 2))
+    store = findings_store.FindingsStore(str(tmp_path / "findings.db"))
+    store.add([row(1, 2, note="again")], {"file": "a.php", "xss": 0, "sqli": 1})
+    store.export_csv(str(tmp_path))
+    store.close()
+    assert [r["detection_note"] for r in read(tmp_path / "vulnerabilities.csv")] == [""]
@@ -0,0 +1,56 @@
+import subprocess
+
+import pytest
+
+import git_diff
+
+BEFORE = """<?php
+function keep($a) {
+    return $a;
+}
+function edit($b) {
+    return $b;
+}
+echo keep(1);
+"""
+
+AFTER = BEFORE.replace("    return $b;\n", "    $b = trim($b);\n    return $b;\n")
+
+
+def run(root, *args):
+    subprocess.run(["git", "-C", str(root)] + list(args), check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    try:
+        run(tmp_path, "init", "-q")
+    except (OSError, subprocess.CalledProcessError):
+        pytest.skip("git is not available")
+    run(tmp_path, "config", "user.email", "t@example.com")
+    run(tmp_path, "config", "user.name", "t")
+    (tmp_path / "a.php").write_text(BEFORE)
+    (tmp_path / "b.php").write_text("<?php\necho edit(1);\n")
+    (tmp_path / "c.php").write_text("<?php\necho 1;\n")
+    run(tmp_path, "add", ".")
+    run(tmp_path, "commit", "-q", "-m", "base")
+    return tmp_path
+
+
+def test_changed_hunks(repo):
+    (repo / "a.php").write_text(AFTER)
+    hunks = git_diff.changed_hunks(str(repo), "HEAD")
+    # One added line after line 5: the old side keeps its position
+    assert hunks == {"a.php": ([(5, 5)], [(6, 6)])}
+
+
+def test_function_spans():
+    assert git_diff.function_spans(BEFORE) == [("keep", 2, 4), ("edit", 5, 7)]
+
+
+def test_plan_includes_callers_of_touched_functions(repo):
+    (repo / "a.php").write_text(AFTER)
+    files = [str(repo / name) for name in ("a.php", "b.php", "c.php")]
+    changed, dependents = git_diff.plan(files, "HEAD")
+    assert changed == {files[0]}
+    assert dependents == {files[1]}
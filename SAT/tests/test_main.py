@@ -0,0 +1,34 @@
+import glob
+import os
+import shutil
+import subprocess
+import sys
+
+from conftest import BASE_DIR, SAT_DIR
+
+
+def scan(corpus, cwd, *args):
+    """(stdout without the timing line, {csv name: content}) of SAT/main.py on corpus."""
+    os.makedirs(cwd)
+    run = subprocess.run([sys.executable, os.path.join(SAT_DIR, "main.py"), str(corpus), "--no-cache"] + list(args),
+                         cwd=cwd, capture_output=True, text=True, check=True)
+    output = [line for line in run.stdout.splitlines() if not line.startswith("Elapsed time")]
+    csvs = {}
+    for path in glob.glob(os.path.join(cwd, "AI_results", "*.csv")):
+        with open(path, encoding="utf-8") as f:
+            csvs[os.path.basename(path)] = f.read()
+    return output, csvs
+
+
+def test_jobs_give_the_same_report_and_csvs_as_a_serial_run(tmp_path):
+    corpus = tmp_path / "corpus"
+    files = sorted(glob.glob(os.path.join(BASE_DIR, "Samples", "*", "*.php")))[::50]
+    files += sorted(glob.glob(os.path.join(BASE_DIR, "WebAppSample", "**", "*.php"), recursive=True))
+    for i, path in enumerate(files):
+        os.makedirs(corpus / str(i))
+        shutil.copy(path, corpus / str(i))
+
+    serial = scan(corpus, str(tmp_path / "serial"))
+    parallel = scan(corpus, str(tmp_path / "parallel"), "--jobs", "3")
+    assert serial[1]
+    assert parallel == serial
@@ -0,0 +1,38 @@
+import glob
+import os
+
+import mlkg_assembler
+from context import AnalysisContext
+from conftest import BASE_DIR, DATA_DIR, findings
+
+FUNCTIONS = os.path.join(DATA_DIR, "functions.php")
+
+
+def built(path, lazy, monkeypatch):
+    monkeypatch.setattr(mlkg_assembler, "LAZY_PDG", lazy)
+    context = AnalysisContext(path)
+    stats = mlkg_assembler.find_vuls(path[:-4], False, csv_sink=[], context=context)
+    assert stats[6] == len(context.kg) and stats[1] == len(context.functions)
+    return set(context.kg)
+
+
+def test_lazy_pdgs_skip_functions_no_entry_point_reaches(monkeypatch):
+    lazy = built(FUNCTIONS, True, monkeypatch)
+    eager = built(FUNCTIONS, False, monkeypatch)
+    assert "unused_sink" in eager - lazy
+    assert {"_main", "run", "clean"} <= lazy < eager
+
+
+def test_lazy_pdgs_keep_the_findings_of_a_multi_function_file():
+    for engine in ("forward", "backward"):
+        eager = findings(FUNCTIONS, ENGINE=engine, LAZY_PDG=False)
+        assert len(eager) == 4
+        assert findings(FUNCTIONS, ENGINE=engine, LAZY_PDG=True) == eager
+
+
+def test_lazy_pdgs_keep_the_findings_of_the_samples():
+    files = sorted(glob.glob(os.path.join(BASE_DIR, "Samples", "*", "*.php")))
+    assert files
+    differ = [path for path in files
+              if findings(path, LAZY_PDG=True) != findings(path, LAZY_PDG=False)]
+    assert differ == []
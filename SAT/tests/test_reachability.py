@@ -0,0 +1,42 @@
+import reachability
+from conftest import function_pdg
+
+CODE = '$a = $_GET["x"];\nif ($a) {\n$b = $a;\n} else {\n$b = "";\n}\nmysql_query($b);\necho "done";'
+
+
+def search(graph, start, colors):
+    seen, stack = set(), [start]
+    while stack:
+        node = stack.pop()
+        for p in range(graph.offsets[node], graph.offsets[node + 1]):
+            successor = graph.targets[p]
+            if graph.bits[p] & colors and successor != graph.return_id and successor not in seen:
+                seen.add(successor)
+                stack.append(successor)
+    return seen
+
+
+def test_closure_matches_a_search():
+    graph = function_pdg(CODE)[0]
+    for colors in (reachability.DATA, reachability.CONTROL, reachability.ANY):
+        index = reachability.ReachabilityIndex(graph, colors)
+        for node in range(len(graph)):
+            assert set(index.reachable(node)) == search(graph, node, colors)
+
+
+def test_index_is_built_on_the_first_query():
+    graph = function_pdg(CODE)[0]
+    found = reachability.index(graph, reachability.ANY)
+    assert isinstance(found, reachability.ReachabilityIndex)
+    assert reachability.index(graph, reachability.ANY) is found
+    assert reachability.index(graph, reachability.DATA) is not found
+
+
+def test_kg_queries():
+    graph, labels, _ = function_pdg(CODE)
+    kg = {"_main": (graph, labels)}
+    entry = next(i for i in range(len(graph)) if graph.labels[i] != "" and graph.labels[i][0] == "entry_point")
+    sink = next(label for label in labels if "sqli" in label[0])
+    assert sink in reachability.reachable_sinks(kg, "_main", entry)
+    assert any(pair[1] == sink for pair in reachability.entry_sink_pairs(kg, "_main"))
+    assert reachability.can_reach(kg, "_main", entry, graph.labels.index(sink))
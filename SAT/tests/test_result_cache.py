@@ -0,0 +1,32 @@
+import result_cache
+
+
+def test_key_depends_on_content_filter_and_flags(tmp_path, monkeypatch):
+    cache = result_cache.ResultCache(str(tmp_path / "cache"), 1 << 20)
+    php = tmp_path / "a.php"
+    php.write_text("<?php echo 1; ?>")
+    for name in result_cache.KEY_FLAGS:
+        monkeypatch.delenv(name, raising=False)
+    base = cache.key(str(php))
+    assert cache.key(str(php)) == base
+    assert cache.key(str(php), "xss") != base
+
+    monkeypatch.setenv("MLKG_ENGINE", "backward")
+    assert cache.key(str(php)) != base
+    monkeypatch.delenv("MLKG_ENGINE")
+    monkeypatch.setenv("MLKG_LAZY_PDG", "0")
+    assert cache.key(str(php)) != base
+    monkeypatch.delenv("MLKG_LAZY_PDG")
+    assert cache.key(str(php)) == base
+
+    php.write_text("<?php echo 2; ?>")
+    assert cache.key(str(php)) != base
+
+
+def test_put_get_and_prune(tmp_path):
+    cache = result_cache.ResultCache(str(tmp_path), 0)
+    assert cache.get("missing") is None
+    cache.put("k", {"rows": [1, 2]})
+    assert cache.get("k") == {"rows": [1, 2]}
+    cache.prune()
+    assert cache.get("k") is None
@@ -0,0 +1,50 @@
+import glob
+import os
+import re
+
+import mlkg_assembler
+import pdg
+import slicing
+import taint
+from conftest import BASE_DIR, function_pdg
+
+
+def test_slice_keeps_the_sources_of_a_sink():
+    graph, labels, lines = function_pdg('$a = $_GET["x"];\n$c = "y";\n$b = "x" . $a;\nmysql_query($b);')
+    sink = next(label for label in labels if "sink" in label[0])
+    found = slicing.backward_slice(graph, lines, slicing.label_roots(graph, sink))
+    first = [i for i in range(len(graph)) if graph.lines[i] == 1][0]
+    second = [i for i in range(len(graph)) if graph.lines[i] == 2][0]
+    assert found.relevant(first, "$a")
+    assert not found.relevant(second, "$c")
+
+
+def test_sink_without_variables_has_no_roots():
+    graph = function_pdg('$a = $_GET["x"];\nmysql_query($a);')[0]
+    assert slicing.label_roots(graph, ("sqli_sink", "")) == {}
+
+
+def test_slice_covers_every_source_the_solver_taints():
+    # Every (node, variable) the solver finds reaching a sink is in its slice
+    files = sorted(glob.glob(os.path.join(BASE_DIR, "Samples", "*", "*.php")))[::40]
+    checked = 0
+    for path in files:
+        lines, mapping, _ = mlkg_assembler.removeComments(path, return_mapping=True)
+        for body, body_mapping in mlkg_assembler.split_functions(lines, mapping).values():
+            graph, labels = pdg.to_pdg(body, False, body_mapping)[:2]
+            names = sorted(set(re.findall(r"\$\w+", "\n".join(body))) |
+                           {label[1] for label in labels if label[0] == "entry_point"})
+            sources = [(n, [v]) for n in range(len(graph)) if n != graph.return_id for v in names]
+            if not sources:
+                continue
+            solution = taint.solve(graph, sources, body)
+            for sink in [label for label in labels if "sink" in label[0]]:
+                found = slicing.backward_slice(graph, body, slicing.label_roots(graph, sink))
+                tainted = 0
+                for var in (sink[1] if isinstance(sink[1], (list, tuple)) else ()):
+                    tainted |= solution.sources(sink, var)
+                for i, (node, (var,)) in enumerate(sources):
+                    if tainted >> i & 1:
+                        checked += 1
+                        assert found.relevant(node, var), (path, graph.node(node), var)
+    assert checked > 0
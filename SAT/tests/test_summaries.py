@@ -0,0 +1,79 @@
+import pytest
+
+import mlkg_assembler
+from conftest import findings
+from context import AnalysisContext
+from summaries import FunctionSummaries
+
+CODE = """<?php
+function direct($p, $q) {
+    return $p;
+}
+function through($p, $q) {
+    $x = "a" . $q;
+    if ($p) {
+        return $x;
+    }
+    return "none";
+}
+function cleaned($p) {
+    $p = (int) $p;
+    mysql_query("q" . $p);
+    return $p;
+}
+function unused($p) {
+    mysql_query($p);
+    return 1;
+}
+echo direct($_GET['x'], 1) . through(1, $_GET['y']) . cleaned($_GET['z']) . unused($_GET['w']);
+?>
+"""
+
+
+def summaries(path, monkeypatch):
+    monkeypatch.setattr(mlkg_assembler, "LAZY_PDG", False)
+    context = AnalysisContext(path)
+    mlkg_assembler.find_vuls(path[:-4], False, csv_sink=[], context=context)
+    return context.summaries or FunctionSummaries(context)
+
+
+def test_parameters_reaching_return(php_file, monkeypatch):
+    found = summaries(php_file(CODE), monkeypatch)
+    assert found.returns("direct") == ["$p"]
+    assert found.returns("through") == ["$q"]
+    assert found.returns("cleaned") == []
+    assert found.returns("unused") == []
+    assert found.returns("_main") == []
+
+
+def test_summary(php_file, monkeypatch):
+    found = summaries(php_file(CODE), monkeypatch)
+    unused = found.summary("unused")
+    assert [sink[0] for sink in unused["params"]["$p"]] == ["sqli_sink"]
+    assert unused["returns"] == []
+    cleaned = found.summary("cleaned")
+    assert cleaned["params"] == {"$p": []}
+    assert [label[0] for label in cleaned["sanitizers"]] == ["cast_sanitization"]
+
+
+RETURNED = """<?php
+function pass_through($p) {
+    return $p;
+}
+function fixed($p) {
+    return "x";
+}
+$a = $_GET['a'];
+$b = pass_through($a);
+mysql_query($b);
+$c = fixed($a);
+mysql_query($c);
+?>
+"""
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_assigned_call_keeps_only_returned_arguments(php_file, lazy):
+    sinks = {sink_line for _, sink_line, _ in findings(php_file(RETURNED), LAZY_PDG=lazy)}
+    assert 10 in sinks
+    assert 12 not in sinks
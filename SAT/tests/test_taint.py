@@ -0,0 +1,75 @@
+import taint
+from conftest import function_pdg
+
+
+def node_at(graph, line):
+    return next(i for i in range(len(graph)) if graph.lines[i] == line)
+
+
+def sink_sources(code, sources):
+    """Bitset of the sources tainting a variable of the sink, for (line, var) sources."""
+    graph, labels, lines = function_pdg(code)
+    solution = taint.solve(graph, [(node_at(graph, line), [var]) for line, var in sources], lines)
+    sink = next(label for label in labels if "sink" in label[0])
+    found = 0
+    for var in sink[1]:
+        found |= solution.sources(sink, var)
+    return found
+
+
+def test_dependent_variable():
+    assert taint.dependent_variable('$b = "x" . $a;', "$a") == "$b"
+    assert taint.dependent_variable('$a = $a . "x";', "$a") == ""
+    assert taint.dependent_variable("echo $a;", "$a") == ""
+
+
+def test_taint_flows_through_assignments():
+    code = '$a = $_GET["x"];\n$b = "x" . $a;\nmysql_query($b);'
+    assert sink_sources(code, [(1, "$a")]) == 1
+
+
+def test_untainted_source_does_not_reach_sink():
+    code = '$a = $_GET["x"];\n$b = "x";\nmysql_query($b);'
+    assert sink_sources(code, [(1, "$a")]) == 0
+
+
+def test_sanitizer_on_the_path_kills_taint():
+    code = '$a = $_GET["x"];\n$a = (int) $a;\nmysql_query("q" . $a);'
+    assert sink_sources(code, [(1, "$a")]) == 0
+    code = '$a = $_GET["x"];\n$a = mysql_real_escape_string($a);\nmysql_query("q" . $a);'
+    assert sink_sources(code, [(1, "$a")]) == 0
+
+
+def test_sanitizer_kills_only_when_it_runs_on_every_path():
+    # The def-use edge from line 1 to the sink jumps over the cast; it only
+    # kills the taint when the cast cannot be skipped on the way to the sink
+    source = '$a = $_GET["x"];\n'
+    sink = 'mysql_query("q" . $a);'
+    assert sink_sources(source + 'if ($c) {\n$a = (int) $a;\n}\n' + sink, [(1, "$a")]) == 1
+    assert sink_sources(source + 'if ($c) {\n$a = (int) $a;\n} else {\n' + sink + '\n}', [(1, "$a")]) == 1
+    assert sink_sources(source + 'while ($c) {\n$a = (int) $a;\n}\n' + sink, [(1, "$a")]) == 1
+    assert sink_sources(source + 'if ($c) $a = (int) $a;\n' + sink, [(1, "$a")]) == 1
+    assert sink_sources(source + 'if ($c) {\n$a = (int) $a;\n' + sink + '\n}', [(1, "$a")]) == 0
+    assert sink_sources(source + '$a = (int) $a;\nif ($c) {\n' + sink + '\n}', [(1, "$a")]) == 0
+    # The cast follows the source in its block, so it runs before leaving it
+    branch = 'if ($c) {\n$a = $_GET["x"];\n$b = 1;\n$a = (int) $a;\n$d = 2;\n}\n'
+    assert sink_sources(branch + sink, [(2, "$a")]) == 0
+    escape = 'while ($c) {\n$a = $_GET["x"];\nif ($d) {\ncontinue;\n}\n$a = (int) $a;\n}\n'
+    assert sink_sources(escape + sink, [(2, "$a")]) == 1
+
+
+def test_sources_are_solved_independently():
+    code = ('$a = $_GET["x"];\n$c = $_GET["y"];\n$c = (int) $c;\n'
+            '$b = $a . $c;\nmysql_query($b);')
+    # Only source 0 ($a) reaches the sink; $c is cast first
+    both = sink_sources(code, [(1, "$a"), (2, "$c")])
+    assert both == 1
+    assert sink_sources(code, [(2, "$c")]) == 0
+    assert sink_sources(code, [(1, "$a")]) == 1
+
+
+def test_variables_unpacks_facts():
+    graph, labels, lines = function_pdg('$a = $_GET["x"];\n$b = "x" . $a;\nmysql_query($b);')
+    solution = taint.solve(graph, [(node_at(graph, 1), ["$a"]), (node_at(graph, 2), ["$b"])], lines)
+    facts = solution.out[node_at(graph, 3)]
+    assert solution.variables(facts) == {"$a": 1, "$b": 3}
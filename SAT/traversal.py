@@ -0,0 +1,135 @@
+# traversal.py
+#
+# Iterative traversal core shared by the agents (agents.py). The searches use
+# an explicit stack instead of recursion, so large functions cannot hit the
+# recursion limit, and keep visited nodes in sets. They yield the same
+# results, in the same order, as the recursive agents they replace.
+# Call paths run on the networkx call graph; searches inside a function run
+# on its compact_graph.CompactGraph PDG, over integer node ids.
+
+import networkx as nx
+
+_DONE = object()
+
+
+def can_reach(graph, targets):
+    """Nodes of graph from which some node in targets is reachable (targets included).
+
+    The graph is condensed into its strongly connected components, and
+    reachability is propagated over the condensation in reverse topological
+    order, so each component and edge is looked at once.
+    """
+    condensed = nx.condensation(nx.DiGraph(graph))
+    members = condensed.graph["mapping"]
+    marked = set()
+    for component in condensed.nodes:
+        if any(n in targets for n in condensed.nodes[component]["members"]):
+            marked.add(component)
+    for component in reversed(list(nx.topological_sort(condensed))):
+        if component not in marked and any(c in marked for c in condensed.successors(component)):
+            marked.add(component)
+    return {n for n, component in members.items() if component in marked}
+
+
+def simple_paths(graph, path, allowed=None, max_depth=None, truncated=None):
+    """Every simple path in graph that extends path, depth-first in pre-order.
+
+    path itself comes first. One path stack is shared by the whole search;
+    each yielded path is a copy of it. Only nodes in allowed (when given)
+    are entered. Paths stop growing at max_depth nodes; truncated(path) is
+    called for each path cut short that way.
+    """
+    path = list(path)
+    on_path = set(path)
+    stack = [iter(list(graph.successors(path[-1])))]
+    yield list(path)
+    while stack:
+        node = next(stack[-1], _DONE)
+        if node is _DONE:
+            stack.pop()
+            if stack:
+                on_path.discard(path.pop())
+            continue
+        if node in on_path or (allowed is not None and node not in allowed):
+            continue
+        if max_depth and len(path) >= max_depth:
+            if truncated is not None:
+                truncated(path)
+            # The rest of this node's callees would be cut short too
+            stack[-1] = iter(())
+            continue
+        path.append(node)
+        on_path.add(node)
+        yield list(path)
+        stack.append(iter(list(graph.successors(node))))
+
+
+def reaches(graph, start, accept, is_target, before=None, visited=None):
+    """Depth-first search of a CompactGraph from node id start, skipping "return".
+
+    For every successor examined, in order:
+      - before(node, successor) runs first, if given, even for visited nodes;
+      - unvisited successors with accept(node, successor, colors), colors
+        being the color bits of the edges between them, are either the
+        target (is_target(successor) ends the search, returning True) or
+        are marked visited and searched next.
+    Returns False when no target is reached. visited (a set of ids) may be
+    passed in to share it between searches.
+    """
+    if visited is None:
+        visited = set()
+    offsets, targets, bits = graph.offsets, graph.targets, graph.bits
+    skip = graph.return_id
+    # [node, position of its next successor in targets]
+    stack = [[start, offsets[start]]]
+    while stack:
+        top = stack[-1]
+        node, p = top
+        if p == offsets[node + 1]:
+            stack.pop()
+            continue
+        top[1] = p + 1
+        successor = targets[p]
+        if successor == skip:
+            continue
+        if before is not None:
+            before(node, successor)
+        if successor in visited or not accept(node, successor, bits[p]):
+            continue
+        if is_target(successor):
+            return True
+        visited.add(successor)
+        stack.append([successor, offsets[successor]])
+    return False
+
+
+def last_match(graph, start, match):
+    """Last value of match(node) in a depth-first pre-order walk of every path from start.
+
+    graph is a CompactGraph and nodes are its ids. match(node) returns a
+    value or None. The walk follows every path, so a node reachable along
+    several paths is walked once per path. The result only depends on the
+    last path with a match, so it is computed bottom-up with one evaluation
+    per node. Returns None when nothing matches.
+    """
+    skip = graph.return_id
+    memo = {}
+    stack = [(start, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if node in memo:
+            continue
+        successors = [s for s in graph.successor_ids(node) if s != skip]
+        if not expanded:
+            stack.append((node, True))
+            stack.extend((s, False) for s in successors if s not in memo)
+            continue
+        result = None
+        for s in reversed(successors):
+            if memo.get(s) is not None:
+                result = memo[s]
+                break
+        if result is None:
+            result = match(node)
+        memo[node] = result
+    return memo[start]